@@ -0,0 +1,201 @@
+"""网络路径基准测试
+
+在独立的临时工作目录（data/ 与配置都与真实数据隔离）中启动替身服务器，把应用的接口地址重定向过去，
+然后逐项测量：
+- search：search_on_bilibili（关闭搜索缓存，每轮换一个关键词）
+- crawl：create_video_list_file（默认每轮清空 UP 主数据与检查点，即冷启动抓取）
+- download：download_music（每轮一个新视频，含取流、下载与 ffmpeg 转码）
+
+每项输出单次操作耗时的 p50/p95、替身服务器收到的请求数与 requests/s，以及各接口的服务端耗时分布。
+
+    python -m benchmarks.bench --iterations 5 --latency-ms 50 --risk-rate 0.02 --json result.json
+
+需要 ffmpeg 在 PATH 中（或位于项目 ffmpeg/bin 下）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer, add_fault_arguments, fault_from_args, make_bvid, percentile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCENARIOS = ("search", "crawl", "download")
+
+
+def prepare_workdir(workdir: Path, base_url: str, args: argparse.Namespace) -> None:
+    """创建隔离的工作目录：get_main_path() 在 cwd 同时存在 ffmpeg/ 与 data/ 时以 cwd 为根目录"""
+    (workdir / "data").mkdir(parents=True, exist_ok=True)
+    bin_dir = workdir / "ffmpeg" / "bin"
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    # Windows 下 detect_ffmpeg 只查找 <根目录>/ffmpeg/bin/ffmpeg.exe 与 PATH
+    bundled = REPO_ROOT / "ffmpeg" / "bin" / "ffmpeg.exe"
+    if bundled.exists() and not (bin_dir / bundled.name).exists():
+        try:
+            os.link(bundled, bin_dir / bundled.name)
+        except OSError:
+            shutil.copy2(bundled, bin_dir / bundled.name)
+
+    config = {
+        "Network": {"ApiBaseOverride": base_url},
+        "Search": {
+            "CacheTTL": 0,
+            "PageCount": args.search_pages,
+            "UpList": list(range(1001, 1001 + args.up_count)),
+            "BackfillPagesPerRun": args.backfill_pages,
+        },
+    }
+    (workdir / "data" / "config.json").write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+
+
+def run_scenario(
+    name: str,
+    server: StandInServer,
+    iterations: int,
+    op: Callable[[int], None],
+    before: Callable[[int], None] | None = None,
+) -> dict:
+    server.reset_stats()
+    durations: list[float] = []
+    errors = 0
+    total = 0.0
+    for i in range(iterations):
+        if before is not None:
+            before(i)
+        started = time.perf_counter()
+        try:
+            op(i)
+        except Exception as e:
+            errors += 1
+            print(f"  [{name}] 第 {i + 1} 轮失败: {e!r}", file=sys.stderr)
+        elapsed = time.perf_counter() - started
+        total += elapsed
+        durations.append(elapsed * 1000)
+
+    requests = server.total_requests()
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "p50_ms": round(percentile(durations, 50), 1),
+        "p95_ms": round(percentile(durations, 95), 1),
+        "requests": requests,
+        "requests_per_s": round(requests / total, 2) if total > 0 else 0.0,
+        "routes": server.snapshot(),
+    }
+
+
+def print_report(results: dict[str, dict]) -> None:
+    print()
+    print(f"{'scenario':<10}{'iter':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'requests':>10}{'req/s':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<10}{r['iterations']:>6}{r['errors']:>5}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+            f"{r['requests']:>10}{r['requests_per_s']:>9}"
+        )
+    for name, r in results.items():
+        print(f"\n[{name}] 服务端各接口:")
+        for route, s in r["routes"].items():
+            print(f"  {route:<40}{s['count']:>6}  p50 {s['p50_ms']:>7} ms  p95 {s['p95_ms']:>7} ms  {s['statuses']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="bilibili 网络路径基准测试（离线替身服务器）")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--only", default=",".join(SCENARIOS), help="逗号分隔: search,crawl,download")
+    parser.add_argument("--search-pages", type=int, default=3)
+    parser.add_argument("--up-count", type=int, default=5)
+    parser.add_argument("--videos-per-up", type=int, default=300)
+    parser.add_argument("--backfill-pages", type=int, default=5)
+    parser.add_argument("--warm-crawl", action="store_true", help="crawl 保留检查点（测增量抓取）")
+    parser.add_argument("--download-format", default="mp3")
+    parser.add_argument("--workdir", type=Path, default=None, help="默认使用临时目录并在结束后删除")
+    parser.add_argument("--json", type=Path, default=None, help="把结果写入 JSON 便于前后对比")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    scenarios = [s.strip() for s in args.only.split(",") if s.strip()]
+
+    server = StandInServer(
+        fault_from_args(args),
+        fixtures_dir=args.fixtures,
+        seed=args.seed,
+        videos_per_up=args.videos_per_up,
+    )
+    base_url = server.start_in_thread()
+    print(f"替身服务器: {base_url}")
+
+    tmp = None
+    workdir = args.workdir
+    if workdir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="nss-bench-")
+        workdir = Path(tmp.name)
+    prepare_workdir(workdir, base_url, args)
+
+    # 必须在切换工作目录之后再导入 src，使数据目录落在工作目录下
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO_ROOT))
+
+    from src.bili_api.endpoint_override import apply_api_override
+    from src.bili_api.music import download_music
+    from src.bili_api.search import search_on_bilibili
+    from src.bili_api.videos import create_video_list_file
+    from src.config import MUSIC_DIR, VIDEO_DIR
+    from src.utils.async_runtime import run_sync, runtime
+
+    runtime.start()
+    apply_api_override()
+
+    results: dict[str, dict] = {}
+    try:
+        if "search" in scenarios:
+            results["search"] = run_scenario(
+                "search",
+                server,
+                args.iterations,
+                lambda i: run_sync(search_on_bilibili(f"bench {i}")),
+            )
+
+        if "crawl" in scenarios:
+
+            def reset_crawl(_i: int) -> None:
+                if args.warm_crawl:
+                    return
+                for fp in VIDEO_DIR.glob("*_data.json"):
+                    fp.unlink(missing_ok=True)
+                (VIDEO_DIR / "crawl_state.json").unlink(missing_ok=True)
+
+            results["crawl"] = run_scenario(
+                "crawl", server, args.iterations, lambda _i: create_video_list_file(), reset_crawl
+            )
+
+        if "download" in scenarios:
+            results["download"] = run_scenario(
+                "download",
+                server,
+                args.iterations,
+                lambda i: run_sync(
+                    download_music(make_bvid("bench", args.seed, i), MUSIC_DIR / f"bench_{i}.{args.download_format}")
+                ),
+            )
+    finally:
+        runtime.stop()
+        server.stop_thread()
+        os.chdir(REPO_ROOT)
+        if tmp is not None:
+            tmp.cleanup()
+
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
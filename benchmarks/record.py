@@ -0,0 +1,53 @@
+"""录制真实接口响应，供替身服务器回放
+
+    python -m benchmarks.record --keyword 歌回 --uid 351692111 --bvid BV1xxxxxxxxx --out benchmarks/fixtures
+
+每个接口保存一份 data 字段（search.json / arc_search.json / view.json / playurl.json），
+替身服务器用 --fixtures 指定该目录后会原样返回这些数据（playurl 中的 CDN 地址会改写到替身服务器）。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from bilibili_api import search, user, video
+
+
+async def record(args: argparse.Namespace) -> None:
+    out: Path = args.out
+    out.mkdir(parents=True, exist_ok=True)
+
+    def save(name: str, data: object) -> None:
+        (out / f"{name}.json").write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"已录制 {name}.json")
+
+    if args.keyword:
+        save(
+            "search",
+            await search.search_by_type(
+                keyword=args.keyword, search_type=search.SearchObjectType.VIDEO, page=1, page_size=10
+            ),
+        )
+    if args.uid:
+        save("arc_search", await user.User(args.uid).get_videos(pn=1, ps=50))
+    if args.bvid:
+        v = video.Video(args.bvid)
+        info = await v.get_info()
+        save("view", info)
+        save("playurl", await v.get_download_url(cid=info["pages"][0]["cid"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="录制 bilibili 接口响应")
+    parser.add_argument("--keyword", default="")
+    parser.add_argument("--uid", type=int, default=0)
+    parser.add_argument("--bvid", default="")
+    parser.add_argument("--out", type=Path, default=Path(__file__).parent / "fixtures")
+    asyncio.run(record(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+"""bilibili 离线替身服务器
+
+模拟应用用到的 bilibili 接口，便于在不访问真实站点的情况下测量/调试网络路径：
+- 搜索 /x/web-interface/wbi/search/type
+- UP 主投稿 /x/space/wbi/arc/search、UP 主信息 /x/space/wbi/acc/info
+- 视频信息 /x/web-interface/view、取流 /x/player/wbi/playurl
+- CDN 分块 /cdn/<bvid>/<cid>/<name>（支持 Range，可模拟地址过期）
+- 视频网页、封面，以及 wbi / buvid / bili_ticket 等鉴权辅助接口
+
+数据默认按种子确定性合成；传入 fixtures 目录时，目录中录制的响应（见 record.py）会原样替换对应接口的数据。
+可配置延迟、抖动、HTTP 500 / HTTP 412 / code -412 的注入概率，以及 CDN 带宽限制。
+
+应用侧通过环境变量 NEUROSANG_API_BASE 或配置项 Network.ApiBaseOverride 指向本服务器。
+
+    python -m benchmarks.stand_in --port 18080 --latency-ms 50 --risk-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from aiohttp import web
+
+# bvid 使用的 base58 字母表
+_BV_ALPHABET = "fZodR9XQDSUm21yCkr6zBqiveYah8bt4xsWpHnJE7jL5VG3guMTKNPAwcF"
+# 合成投稿的基准时间（2025-01-01）
+_BASE_TS = 1735660800
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+# 音频档位：id -> 码率（kbps）
+_AUDIO_QUALITIES = {30280: 192, 30232: 132, 30216: 64}
+
+
+@dataclass
+class FaultConfig:
+    """延迟与错误注入配置（概率均为 0~1）"""
+
+    latency_ms: float = 30.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0  # HTTP 500
+    risk_rate: float = 0.0  # HTTP 412
+    code_412_rate: float = 0.0  # HTTP 200 + code -412
+    cdn_bandwidth_kbps: float = 0.0  # CDN 限速，0 表示不限
+    cdn_url_ttl_s: float = 0.0  # CDN 地址有效期，过期返回 403；0 表示不过期
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """最近秩百分位数，空列表返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[idx]
+
+
+def _digest(*parts: object) -> int:
+    return int.from_bytes(hashlib.sha1("|".join(map(str, parts)).encode()).digest()[:8], "big")
+
+
+def make_bvid(*parts: object) -> str:
+    n = _digest(*parts)
+    chars = []
+    for _ in range(9):
+        n, r = divmod(n, len(_BV_ALPHABET))
+        chars.append(_BV_ALPHABET[r])
+    return "BV1" + "".join(chars)
+
+
+def _ok(data: object) -> web.Response:
+    return web.json_response({"code": 0, "message": "0", "ttl": 1, "data": data})
+
+
+class StandInServer:
+    def __init__(
+        self,
+        fault: FaultConfig | None = None,
+        *,
+        fixtures_dir: Path | None = None,
+        seed: int = 0,
+        videos_per_up: int = 300,
+        audio_seconds: int = 30,
+        ffmpeg: str | None = None,
+    ):
+        self.fault = fault or FaultConfig()
+        self.fixtures_dir = fixtures_dir
+        self.seed = seed
+        self.videos_per_up = videos_per_up
+        self.audio_seconds = audio_seconds
+        self.ffmpeg = ffmpeg or shutil.which("ffmpeg")
+        self.stats: dict[str, RouteStats] = defaultdict(RouteStats)
+        self.base_url = ""
+        self._rng = random.Random(seed)
+        self._audio: dict[int, bytes] = {}
+        self._runner: web.AppRunner | None = None
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    # -------- 数据 --------
+    def _fixture(self, name: str) -> object | None:
+        if self.fixtures_dir is None:
+            return None
+        fp = self.fixtures_dir / f"{name}.json"
+        if not fp.exists():
+            return None
+        return json.loads(fp.read_text(encoding="utf-8"))
+
+    def _audio_bytes(self, quality: int) -> bytes:
+        """各档位的音频数据：有 ffmpeg 时合成可转码的 fMP4（同 DASH m4s），否则为随机字节"""
+        if quality in self._audio:
+            return self._audio[quality]
+        kbps = _AUDIO_QUALITIES.get(quality, 132)
+        data = b""
+        if self.ffmpeg:
+            with tempfile.TemporaryDirectory() as tmp:
+                out = Path(tmp) / "audio.m4s"
+                cmd = [
+                    self.ffmpeg,
+                    "-y",
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    f"sine=frequency=440:duration={self.audio_seconds}",
+                    "-c:a",
+                    "aac",
+                    "-b:a",
+                    f"{kbps}k",
+                    "-f",
+                    "mp4",
+                    "-movflags",
+                    "frag_keyframe+empty_moov+default_base_moof",
+                    str(out),
+                ]
+                if subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0:
+                    data = out.read_bytes()
+        if not data:
+            data = random.Random(quality).randbytes(kbps * 1000 // 8 * self.audio_seconds)
+        self._audio[quality] = data
+        return data
+
+    def video_info(self, bvid: str) -> dict:
+        page_count = 1 + _digest(self.seed, bvid, "pages") % 3
+        pages = [
+            {
+                "cid": 10_000_000 + _digest(self.seed, bvid, page) % 90_000_000,
+                "page": page,
+                "part": f"{bvid} P{page}",
+                "duration": self.audio_seconds,
+            }
+            for page in range(1, page_count + 1)
+        ]
+        mid = 1 + _digest(self.seed, bvid, "owner") % 10_000
+        return {
+            "bvid": bvid,
+            "aid": _digest(bvid) % 10**9,
+            "title": f"【Neuro】歌回 {bvid}",
+            "pic": f"{self.base_url}/cover/{bvid}.jpg",
+            "pubdate": _BASE_TS - _digest(self.seed, bvid, "date") % (365 * 86400),
+            "duration": self.audio_seconds * page_count,
+            "owner": {"mid": mid, "name": f"up_{mid}"},
+            "cid": pages[0]["cid"],
+            "pages": pages,
+        }
+
+    def user_videos(self, mid: int, pn: int, ps: int) -> dict:
+        total = self.videos_per_up
+        start = (pn - 1) * ps
+        vlist = []
+        for i in range(start, min(total, start + ps)):
+            # i 越小越新
+            bvid = make_bvid(self.seed, mid, i)
+            vlist.append(
+                {
+                    "bvid": bvid,
+                    "aid": _digest(bvid) % 10**9,
+                    "title": f"【Neuro】歌回 合唱 #{total - i}",
+                    "author": f"up_{mid}",
+                    "mid": mid,
+                    "created": _BASE_TS - i * 3600,
+                    "length": "00:30",
+                }
+            )
+        return {"list": {"vlist": vlist}, "page": {"pn": pn, "ps": ps, "count": total}}
+
+    def search(self, keyword: str, page: int, page_size: int) -> dict:
+        result = []
+        for i in range(page_size):
+            bvid = make_bvid(self.seed, keyword, page, i)
+            result.append(
+                {
+                    "type": "video",
+                    "bvid": bvid,
+                    "title": f'<em class="keyword">{keyword}</em> 歌回 {page}-{i}',
+                    "author": f"up_{_digest(bvid) % 10_000}",
+                    "pubdate": _BASE_TS - _digest(bvid, "date") % (365 * 86400),
+                }
+            )
+        return {"page": page, "pagesize": page_size, "numResults": 1000, "numPages": 50, "result": result}
+
+    def _cdn_url(self, bvid: str, cid: int, name: str) -> str:
+        url = f"{self.base_url}/cdn/{bvid}/{cid}/{name}"
+        if self.fault.cdn_url_ttl_s > 0:
+            url += f"?deadline={time.time() + self.fault.cdn_url_ttl_s:.3f}"
+        return url
+
+    def playurl(self, bvid: str, cid: int) -> dict:
+        audio = [
+            {
+                "id": quality,
+                "baseUrl": self._cdn_url(bvid, cid, f"audio-{quality}.m4s"),
+                "backupUrl": [],
+                "bandwidth": kbps * 1000,
+                "mimeType": "audio/mp4",
+                "codecs": "mp4a.40.2",
+            }
+            for quality, kbps in _AUDIO_QUALITIES.items()
+        ]
+        video = [
+            {
+                "id": 80,
+                "baseUrl": self._cdn_url(bvid, cid, "video-80.m4s"),
+                "backupUrl": [],
+                "bandwidth": 1_500_000,
+                "mimeType": "video/mp4",
+                "codecs": "avc1.640032",
+                "codecid": 7,
+            }
+        ]
+        return {
+            "quality": 80,
+            "format": "dash",
+            "accept_quality": [80],
+            "dash": {"duration": self.audio_seconds, "video": video, "audio": audio, "dolby": None, "flac": None},
+        }
+
+    def _redirect_cdn_urls(self, data: object, bvid: str, cid: int) -> object:
+        """录制的 playurl 中的 CDN 地址改写到本服务器"""
+        if isinstance(data, dict):
+            out = {}
+            for key, value in data.items():
+                if key in ("baseUrl", "base_url") and isinstance(value, str):
+                    out[key] = self._cdn_url(bvid, cid, f"audio-{data.get('id', 30280)}.m4s")
+                elif key in ("backupUrl", "backup_url"):
+                    out[key] = []
+                else:
+                    out[key] = self._redirect_cdn_urls(value, bvid, cid)
+            return out
+        if isinstance(data, list):
+            return [self._redirect_cdn_urls(v, bvid, cid) for v in data]
+        return data
+
+    # -------- 路由 --------
+    async def handle_nav(self, _request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "code": -101,
+                "message": "账号未登录",
+                "data": {
+                    "isLogin": False,
+                    "wbi_img": {
+                        "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+                        "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png",
+                    },
+                },
+            }
+        )
+
+    async def handle_spi(self, _request: web.Request) -> web.Response:
+        return _ok({"b_3": "STANDIN-BUVID3-infoc", "b_4": "STANDIN-BUVID4-infoc"})
+
+    async def handle_ticket(self, _request: web.Request) -> web.Response:
+        return _ok({"ticket": "standin.ticket", "created_at": int(time.time()), "ttl": 259200})
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        q = request.query
+        fixture = self._fixture("search")
+        if fixture is not None:
+            return _ok(fixture)
+        return _ok(self.search(q.get("keyword", ""), int(q.get("page", 1)), int(q.get("page_size", 20))))
+
+    async def handle_user_videos(self, request: web.Request) -> web.Response:
+        q = request.query
+        fixture = self._fixture("arc_search")
+        if fixture is not None:
+            return _ok(fixture)
+        return _ok(self.user_videos(int(q.get("mid", 0)), int(q.get("pn", 1)), int(q.get("ps", 30))))
+
+    async def handle_user_info(self, request: web.Request) -> web.Response:
+        mid = int(request.query.get("mid", 0))
+        return _ok({"mid": mid, "name": f"up_{mid}", "face": ""})
+
+    async def handle_view(self, request: web.Request) -> web.Response:
+        bvid = request.query.get("bvid", "")
+        fixture = self._fixture("view")
+        if fixture is not None:
+            return _ok(fixture)
+        return _ok(self.video_info(bvid))
+
+    async def handle_playurl(self, request: web.Request) -> web.Response:
+        bvid = request.query.get("bvid", "")
+        cid = int(request.query.get("cid", 0))
+        fixture = self._fixture("playurl")
+        if fixture is not None:
+            return _ok(self._redirect_cdn_urls(fixture, bvid, cid))
+        return _ok(self.playurl(bvid, cid))
+
+    async def handle_cdn(self, request: web.Request) -> web.StreamResponse:
+        deadline = request.query.get("deadline")
+        if deadline and float(deadline) < time.time():
+            return web.Response(status=403, text="url expired")
+        name = request.match_info["name"]
+        m = re.search(r"-(\d+)\.", name)
+        quality = int(m.group(1)) if m and name.startswith("audio") else 30232
+        body = self._audio_bytes(quality)
+        total = len(body)
+
+        start, end = 0, total - 1
+        status = 200
+        if range_header := request.headers.get("Range"):
+            rm = _RANGE_RE.fullmatch(range_header.strip())
+            if rm is None:
+                return web.Response(status=416, headers={"Content-Range": f"bytes */{total}"})
+            if rm.group(1):
+                start = int(rm.group(1))
+                end = min(int(rm.group(2)), total - 1) if rm.group(2) else total - 1
+            elif rm.group(2):
+                start = max(0, total - int(rm.group(2)))
+            if start > end or start >= total:
+                return web.Response(status=416, headers={"Content-Range": f"bytes */{total}"})
+            status = 206
+
+        headers = {
+            "Content-Type": "video/mp4",
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(end - start + 1),
+            "ETag": f'"{hashlib.md5(body).hexdigest()}"',
+        }
+        if status == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+        resp = web.StreamResponse(status=status, headers=headers)
+        await resp.prepare(request)
+
+        chunk = 64 * 1024
+        bandwidth = self.fault.cdn_bandwidth_kbps * 1000 / 8  # 字节/秒
+        pos = start
+        while pos <= end:
+            piece = body[pos : min(end + 1, pos + chunk)]
+            await resp.write(piece)
+            pos += len(piece)
+            if bandwidth > 0:
+                await asyncio.sleep(len(piece) / bandwidth)
+        await resp.write_eof()
+        return resp
+
+    async def handle_video_page(self, request: web.Request) -> web.Response:
+        info = self.video_info(request.match_info["bvid"])
+        date = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(info["pubdate"]))
+        html = (
+            "<html><body>"
+            f'<h1 class="video-title special-text-indent" data-title="{info["title"]}">{info["title"]}</h1>'
+            f'<a class="up-name">{info["owner"]["name"]}</a>'
+            f'<div class="pubdate-ip-text">{date}</div>'
+            "</body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+    async def handle_cover(self, request: web.Request) -> web.Response:
+        seed = _digest(request.match_info["bvid"])
+        return web.Response(body=random.Random(seed).randbytes(8 * 1024), content_type="image/jpeg")
+
+    async def handle_fallback(self, request: web.Request) -> web.Response:
+        # 空间页（w_webid）、buvid 激活等：返回空成功响应即可
+        if request.path.endswith("/dynamic"):
+            return web.Response(text="<html></html>", content_type="text/html")
+        return _ok({})
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        started = time.perf_counter()
+        fault = self.fault
+        try:
+            delay = fault.latency_ms + self._rng.uniform(0, fault.jitter_ms)
+            if delay > 0:
+                await asyncio.sleep(delay / 1000)
+
+            # 错误注入只作用于接口，不作用于 CDN / 网页
+            if request.path.startswith("/x/"):
+                roll = self._rng.random()
+                if roll < fault.risk_rate:
+                    resp: web.StreamResponse = web.Response(status=412, text="Precondition Failed")
+                elif roll < fault.risk_rate + fault.code_412_rate:
+                    resp = web.json_response({"code": -412, "message": "请求被拦截", "data": None})
+                elif roll < fault.risk_rate + fault.code_412_rate + fault.error_rate:
+                    resp = web.Response(status=500, text="Internal Server Error")
+                else:
+                    resp = await handler(request)
+            else:
+                resp = await handler(request)
+        except web.HTTPException as e:
+            resp = e
+        stats = self.stats[route]
+        stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+        stats.statuses[resp.status] += 1
+        if isinstance(resp, web.HTTPException):
+            raise resp
+        return resp
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/x/web-interface/nav", self.handle_nav)
+        app.router.add_get("/x/frontend/finger/spi", self.handle_spi)
+        app.router.add_post("/bapis/bilibili.api.ticket.v1.Ticket/GenWebTicket", self.handle_ticket)
+        app.router.add_get("/x/web-interface/wbi/search/type", self.handle_search)
+        app.router.add_get("/x/space/wbi/arc/search", self.handle_user_videos)
+        app.router.add_get("/x/space/wbi/acc/info", self.handle_user_info)
+        app.router.add_get("/x/web-interface/view", self.handle_view)
+        app.router.add_get("/x/player/wbi/playurl", self.handle_playurl)
+        app.router.add_get("/cdn/{bvid}/{cid}/{name}", self.handle_cdn)
+        app.router.add_get("/video/{bvid}/", self.handle_video_page)
+        app.router.add_get("/cover/{bvid}.jpg", self.handle_cover)
+        app.router.add_route("*", "/{tail:.*}", self.handle_fallback)
+        return app
+
+    # -------- 生命周期 --------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets if site._server else []  # type: ignore[attr-defined]
+        bound_port = sockets[0].getsockname()[1] if sockets else port
+        self.base_url = f"http://{host}:{bound_port}"
+        # 预先合成音频，避免第一次下载把合成耗时算进去
+        await asyncio.to_thread(lambda: [self._audio_bytes(q) for q in _AUDIO_QUALITIES])
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """在独立线程的事件循环中运行，避免与被测代码争抢同一个循环"""
+        ready = threading.Event()
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+
+        def _run() -> None:
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start(host, port))
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, name="StandInServer", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+
+    # -------- 统计 --------
+    def reset_stats(self) -> None:
+        self.stats.clear()
+
+    def total_requests(self) -> int:
+        return sum(len(s.latencies_ms) for s in self.stats.values())
+
+    def snapshot(self) -> dict[str, dict]:
+        return {
+            route: {
+                "count": len(s.latencies_ms),
+                "p50_ms": round(percentile(s.latencies_ms, 50), 1),
+                "p95_ms": round(percentile(s.latencies_ms, 95), 1),
+                "statuses": dict(s.statuses),
+            }
+            for route, s in sorted(self.stats.items())
+        }
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="每个请求的基础延迟")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="额外的随机延迟上限")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 概率")
+    parser.add_argument("--risk-rate", type=float, default=0.0, help="HTTP 412 概率")
+    parser.add_argument("--code-412-rate", type=float, default=0.0, help="code -412 概率")
+    parser.add_argument("--cdn-kbps", type=float, default=0.0, help="CDN 带宽限制（kbps），0 为不限")
+    parser.add_argument("--cdn-url-ttl-s", type=float, default=0.0, help="CDN 地址有效期（秒），0 为不过期")
+    parser.add_argument("--fixtures", type=Path, default=None, help="录制的响应目录（见 record.py）")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def fault_from_args(args: argparse.Namespace) -> FaultConfig:
+    return FaultConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        risk_rate=args.risk_rate,
+        code_412_rate=args.code_412_rate,
+        cdn_bandwidth_kbps=args.cdn_kbps,
+        cdn_url_ttl_s=args.cdn_url_ttl_s,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="bilibili 离线替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer(fault_from_args(args), fixtures_dir=args.fixtures, seed=args.seed)
+
+    async def serve() -> None:
+        base = await server.start(args.host, args.port)
+        print(f"替身服务器已启动: {base}")
+        print(f"在应用中使用: {'set' if os.name == 'nt' else 'export'} NEUROSANG_API_BASE={base}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(json.dumps(server.snapshot(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
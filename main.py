@@ -13,6 +13,8 @@ from src.app_context import app_context
 from src.ui import MainWindow
 from src.utils.device_info import log_device_info_async
 from src.utils.audio_debug import log_audio_environment_once
+from src.utils.async_runtime import runtime
+from src.bili_api.endpoint_override import apply_api_override
 
 
 def choose_backend():
@@ -77,11 +79,17 @@ if __name__ == "__main__":
     # 记录设备信息（CPU/GPU/声卡/系统等），后台异步采集，避免阻塞启动
     log_device_info_async()
 
+    # 启动全局异步运行时：所有 bilibili_api 请求共用一个事件循环与连接池
+    runtime.start()
+
     # 应用代理设置
     if cfg.enable_proxy.value:
         request_settings.set_proxy(cfg.proxy_url.value)
         logger.info(f"已启用代理: {cfg.proxy_url.value}")
 
+    # 接口地址重定向（配置项或环境变量指定替身服务器时生效）
+    apply_api_override()
+
     # 语言资源目录迁移到 data/i18n，若为空则从 assets 引导复制
     language_file_dir = I18N_DIR
     try:
@@ -0,0 +1,207 @@
+"""UP 主投稿列表爬虫（带断点）
+
+每个 UP 主在 VIDEO_DIR/crawl_state.json 中保存一份检查点：
+- newest_bv / newest_created：已知最新投稿（高水位），增量抓取遇到它即停止
+- backfill_page：历史回填已连续完成到第几页，崩溃或退出后从下一页继续
+- backfill_done：是否已回填完全部历史页
+
+增量抓取通常只需请求第 1 页；回填在调度器限制下并发翻页，每次运行最多推进
+cfg.crawl_backfill_pages 页，避免首次启动时长时间占用请求配额。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from datetime import datetime
+
+from bilibili_api.user import User
+from loguru import logger
+
+from src.config import VIDEO_DIR, cfg
+from src.core.song_list import SongList
+from src.utils.text import contain_text
+
+from .common import get_credential
+from .scheduler import scheduler
+
+CRAWL_STATE_FILE = VIDEO_DIR / "crawl_state.json"
+# 每页视频数（接口上限 50）
+PAGE_SIZE = 50
+# 增量抓取最多翻页数（防止高水位视频被删除后一路翻到底）
+MAX_INCREMENTAL_PAGES = 5
+# 回填时同一 UP 主的并发翻页数
+BACKFILL_CONCURRENCY = 2
+
+
+def _load_state() -> dict[str, dict]:
+    try:
+        return json.loads(CRAWL_STATE_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        logger.opt(exception=True).warning("爬虫检查点读取失败，将重新开始")
+        return {}
+
+
+def _save_state(state: dict[str, dict]) -> None:
+    try:
+        tmp = CRAWL_STATE_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(CRAWL_STATE_FILE)
+    except Exception:
+        logger.opt(exception=True).warning("爬虫检查点保存失败")
+
+
+def _to_song_info(item: dict) -> dict:
+    return {
+        "title": item["title"],
+        "author": item["author"],
+        "date": datetime.fromtimestamp(item["created"]).strftime("%Y-%m-%d %H:%M:%S"),
+        "url": f"https://www.bilibili.com/video/{item['bvid']}/",
+        "bv": item["bvid"],
+    }
+
+
+class UpCrawler:
+    """单个 UP 主的投稿抓取（运行在全局异步运行时上）"""
+
+    def __init__(self, user_id: int, state: dict[str, dict], words_set: list[str] | None = None):
+        self.user_id = user_id
+        self.words_set = words_set
+        self.state = state
+        self.checkpoint = state.setdefault(str(user_id), {})
+        self.user = User(user_id, credential=get_credential())
+        self.file_path = VIDEO_DIR / f"{user_id}_data.json"
+        self.songs = SongList(self.file_path)
+        self.author = str(user_id)
+
+    async def _fetch_page(self, page: int) -> dict:
+        return await scheduler.run("user", lambda: self.user.get_videos(pn=page, ps=PAGE_SIZE))
+
+    def _collect(self, items: list[dict]) -> int:
+        """把命中关键词的视频并入列表，返回新增数量"""
+        before = len(self.songs)
+        for item in items:
+            if self.words_set is not None and not contain_text(self.words_set, item["title"]):
+                continue
+            self.songs.append_info(_to_song_info(item))
+        self.songs.unique_by_bv()
+        return len(self.songs) - before
+
+    def _persist(self) -> None:
+        # 先落数据再落检查点：检查点记录的页一定已经写入数据文件
+        self.songs.save_list(self.file_path)
+        self.checkpoint["updated_at"] = int(time.time())
+        _save_state(self.state)
+
+    async def run_incremental(self) -> int:
+        """从第 1 页开始抓取，遇到已知最新视频即停止，返回新增条数"""
+        newest_bv = self.checkpoint.get("newest_bv")
+        newest_created = int(self.checkpoint.get("newest_created") or 0)
+
+        before = len(self.songs)
+        first_item: dict | None = None
+        for page in range(1, MAX_INCREMENTAL_PAGES + 1):
+            data = await self._fetch_page(page)
+            vlist = (data.get("list") or {}).get("vlist") or []
+            if page == 1:
+                total = int((data.get("page") or {}).get("count") or 0)
+                self.checkpoint["total_pages"] = max(1, math.ceil(total / PAGE_SIZE))
+            if not vlist:
+                break
+            if first_item is None:
+                first_item = vlist[0]
+                self.author = str(vlist[0].get("author") or self.author)
+
+            fresh = []
+            reached_known = False
+            for item in vlist:
+                if item["bvid"] == newest_bv or (newest_created and item["created"] <= newest_created):
+                    reached_known = True
+                    break
+                fresh.append(item)
+            self._collect(fresh)
+
+            # 首次抓取没有高水位：只取第 1 页，其余交给回填
+            if reached_known or newest_bv is None:
+                break
+
+        if first_item is not None and first_item["bvid"] != newest_bv:
+            self.checkpoint["newest_bv"] = first_item["bvid"]
+            self.checkpoint["newest_created"] = int(first_item["created"])
+        if newest_bv is None:
+            self.checkpoint.setdefault("backfill_page", 1)
+
+        self._persist()
+        return len(self.songs) - before
+
+    async def run_backfill(self, max_pages: int) -> int:
+        """从上次连续完成的页之后继续回填历史投稿，返回新增条数"""
+        if self.checkpoint.get("backfill_done") or max_pages <= 0:
+            return 0
+
+        total_pages = int(self.checkpoint.get("total_pages") or 1)
+        start = int(self.checkpoint.get("backfill_page") or 1) + 1
+        end = min(total_pages, start + max_pages - 1)
+        if start > total_pages:
+            self.checkpoint["backfill_done"] = True
+            self._persist()
+            return 0
+
+        before = len(self.songs)
+        sem = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        completed: dict[int, list[dict]] = {}
+
+        async def fetch(page: int) -> None:
+            async with sem:
+                data = await self._fetch_page(page)
+            completed[page] = (data.get("list") or {}).get("vlist") or []
+            # 按页序推进连续完成的高水位，保证断点续传不会跳页
+            watermark = int(self.checkpoint.get("backfill_page") or 1)
+            advanced = False
+            while watermark + 1 in completed:
+                watermark += 1
+                self._collect(completed.pop(watermark))
+                advanced = True
+            if advanced:
+                self.checkpoint["backfill_page"] = watermark
+                self._persist()
+
+        results = await asyncio.gather(*[fetch(page) for page in range(start, end + 1)], return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.opt(exception=result).warning(f"回填 UP 主 {self.user_id} 的历史投稿时出错")
+
+        if int(self.checkpoint.get("backfill_page") or 1) >= total_pages:
+            self.checkpoint["backfill_done"] = True
+            self._persist()
+        return len(self.songs) - before
+
+
+async def crawl_up_videos(user_id: int, state: dict[str, dict], words_set: list[str] | None = None) -> None:
+    """增量抓取 + 断点回填单个 UP 主的投稿，并写入 <uid>_data.json"""
+    crawler = UpCrawler(user_id, state, words_set)
+    old_count = len(crawler.songs)
+    await crawler.run_incremental()
+    await crawler.run_backfill(int(cfg.crawl_backfill_pages.value))
+
+    cp = crawler.checkpoint
+    logger.info(
+        f"{crawler.author}({user_id}) 作者歌回记录数量从 {old_count} 更新到 {len(crawler.songs)}，"
+        f"回填进度 {cp.get('backfill_page', 1)}/{cp.get('total_pages', 1)}"
+    )
+
+
+async def crawl_all_up_videos(user_ids: list[int], words_set: list[str] | None = None) -> None:
+    """抓取全部 UP 主，检查点在同一个事件循环内共享并按页落盘"""
+    state = _load_state()
+    results = await asyncio.gather(
+        *[crawl_up_videos(uid, state, words_set) for uid in user_ids],
+        return_exceptions=True,
+    )
+    for uid, result in zip(user_ids, results):
+        if isinstance(result, BaseException):
+            logger.opt(exception=result).error(f"获取 UP 主 {uid} 的视频列表失败")
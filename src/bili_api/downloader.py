@@ -0,0 +1,270 @@
+"""分段并发下载
+
+把音视频流按字节范围切成若干段，通过多个连接并发下载，再按顺序逐段产出：
+- 段数/连接数随文件大小自适应，小文件或不支持 Range 的地址直接单连接下载
+- 只有滑动窗口内的段会被提前下载并缓存在内存中，内存占用有上限，不落临时文件
+- 每段独立重试，重试时从已收到的字节处续传
+- 传入 PartialFile 时每段完成后写入缓存文件并记录进度，失败或重启后只下载缺失的部分；
+  CDN 地址过期（403/404/410）时通过 refresh_url 重新获取地址
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import re
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass
+
+import aiohttp
+from loguru import logger
+
+from src.config import cfg
+
+from .endpoint_override import rewrite_url
+from .http_client import get_async_proxy, get_async_session
+from .partial import PartialFile
+
+# 每个连接平均负责的数据量，用于推算连接数
+BYTES_PER_CONNECTION = 4 * 1024 * 1024
+# 段大小上下限：段越小重试代价越低，段越大请求次数越少
+MIN_SEGMENT_SIZE = 1024 * 1024
+MAX_SEGMENT_SIZE = 8 * 1024 * 1024
+# 每个连接平均分到的段数（让快的连接可以多领几段）
+SEGMENTS_PER_CONNECTION = 4
+# 已下载但尚未被消费的段数上限 = 连接数 * WINDOW_FACTOR
+WINDOW_FACTOR = 2
+SEGMENT_RETRIES = 3
+READ_CHUNK = 64 * 1024
+# CDN 地址过期时返回的状态码
+EXPIRED_STATUSES = (403, 404, 410)
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class SegmentError(Exception):
+    """分段下载失败（HTTP 状态异常或数据长度不符）"""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Segment:
+    index: int
+    start: int
+    end: int  # 闭区间
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+
+@dataclass
+class ProbeResult:
+    total: int | None
+    ranged: bool
+    etag: str | None = None
+
+
+def plan_segments(total: int, max_connections: int) -> tuple[int, list[Segment]]:
+    """根据文件大小计算连接数与分段，返回 (连接数, 段列表)"""
+    connections = max(1, min(max_connections, math.ceil(total / BYTES_PER_CONNECTION)))
+    seg_size = math.ceil(total / (connections * SEGMENTS_PER_CONNECTION))
+    seg_size = max(MIN_SEGMENT_SIZE, min(MAX_SEGMENT_SIZE, seg_size))
+    segments = [
+        Segment(i, start, min(total, start + seg_size) - 1) for i, start in enumerate(range(0, total, seg_size))
+    ]
+    return connections, segments
+
+
+class SegmentedDownloader:
+    def __init__(
+        self,
+        url: str,
+        *,
+        headers: dict | None = None,
+        max_connections: int | None = None,
+        on_progress: Callable[[int, int | None], None] | None = None,
+        partial: PartialFile | None = None,
+        refresh_url: Callable[[], Awaitable[str]] | None = None,
+    ):
+        self.url = rewrite_url(url)
+        self.headers = dict(headers or {})
+        self.max_connections = max_connections or int(cfg.download_max_connections.value)
+        self.on_progress = on_progress
+        self.partial = partial
+        self.refresh_url = refresh_url
+        self.received = 0
+        self.total: int | None = None
+        self._url_version = 0
+        self._refresh_lock = asyncio.Lock()
+
+    def _report(self, n: int) -> None:
+        self.received += n
+        if self.on_progress is not None:
+            self.on_progress(self.received, self.total)
+
+    async def _refresh(self, seen_version: int) -> bool:
+        """地址过期时重新获取（并发的段只刷新一次），返回是否可以重试"""
+        if self.refresh_url is None:
+            return False
+        async with self._refresh_lock:
+            if self._url_version == seen_version:
+                self.url = rewrite_url(await self.refresh_url())
+                self._url_version += 1
+                logger.info("下载地址已过期，已重新获取")
+        return True
+
+    async def probe(self) -> ProbeResult:
+        """探测文件大小与是否支持分段，地址过期时刷新一次"""
+        version = self._url_version
+        try:
+            return await self._probe_once()
+        except SegmentError as e:
+            if e.status in EXPIRED_STATUSES and await self._refresh(version):
+                return await self._probe_once()
+            raise
+
+    async def _probe_once(self) -> ProbeResult:
+        """用 Range: bytes=0-0 探测文件大小与是否支持分段"""
+        session = await get_async_session()
+        headers = {**self.headers, "Range": "bytes=0-0"}
+        async with session.get(self.url, headers=headers, proxy=get_async_proxy()) as resp:
+            etag = resp.headers.get("ETag")
+            if resp.status == 206:
+                m = _CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+                if m and m.group(3) != "*":
+                    return ProbeResult(int(m.group(3)), True, etag)
+            if resp.status in (200, 206):
+                length = resp.headers.get("Content-Length")
+                total = int(length) if length and resp.status == 200 else None
+                return ProbeResult(total, False, etag)
+            raise SegmentError(f"探测失败，状态码: {resp.status}", resp.status)
+
+    async def _stream_whole(self) -> AsyncGenerator[bytes]:
+        session = await get_async_session()
+        async with session.get(self.url, headers=self.headers, proxy=get_async_proxy()) as resp:
+            if resp.status != 200:
+                raise SegmentError(f"下载失败，状态码: {resp.status}", resp.status)
+            async for chunk in resp.content.iter_chunked(READ_CHUNK):
+                if self.partial is not None:
+                    await asyncio.to_thread(self.partial.write, self.received, chunk)
+                self._report(len(chunk))
+                yield chunk
+        if self.partial is not None and self.received:
+            self.partial.length = self.received
+            await asyncio.to_thread(self.partial.mark_done, 0, self.received - 1)
+
+    async def fetch_range(self, start: int, end: int, buf: bytearray) -> None:
+        """把 [start + len(buf), end] 追加进 buf（一次请求）"""
+        session = await get_async_session()
+        headers = {**self.headers, "Range": f"bytes={start + len(buf)}-{end}"}
+        async with session.get(self.url, headers=headers, proxy=get_async_proxy()) as resp:
+            if resp.status != 206:
+                raise SegmentError(f"分段请求失败，状态码: {resp.status}", resp.status)
+            async for chunk in resp.content.iter_chunked(READ_CHUNK):
+                buf.extend(chunk)
+                self._report(len(chunk))
+        if len(buf) != end - start + 1:
+            raise SegmentError(f"分段数据不完整: {len(buf)}/{end - start + 1}")
+
+    async def _fetch_segment(self, seg: Segment, sem: asyncio.Semaphore, *, read_back: bool = True) -> bytearray:
+        """取得一段的完整数据：已完成的部分从缓存文件读取，其余从网络下载并写回缓存文件
+
+        read_back=False 时不把已完成的数据读回内存（只需要补全缓存文件时使用）。
+        """
+        partial = self.partial
+        prefix = partial.covered_prefix(seg.start, seg.end) if partial is not None else 0
+        if prefix == seg.size and not read_back:
+            return bytearray()
+        buf = bytearray()
+        if prefix and partial is not None:
+            buf += await asyncio.to_thread(partial.read, seg.start, prefix)
+            if len(buf) != prefix:
+                # 缓存文件被截断：放弃这段的缓存数据
+                buf.clear()
+                prefix = 0
+        if len(buf) == seg.size:
+            return buf
+
+        async with sem:
+            for attempt in range(SEGMENT_RETRIES + 1):
+                version = self._url_version
+                try:
+                    await self.fetch_range(seg.start, seg.end, buf)
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError, SegmentError) as e:
+                    if attempt >= SEGMENT_RETRIES:
+                        raise
+                    if isinstance(e, SegmentError) and e.status in EXPIRED_STATUSES:
+                        if not await self._refresh(version):
+                            raise
+                        continue
+                    delay = 0.5 * 2**attempt * random.uniform(0.5, 1.0)
+                    logger.warning(
+                        f"第 {seg.index} 段下载失败（{e!r}），{delay:.1f}s 后从 {len(buf)}/{seg.size} 处续传"
+                    )
+                    await asyncio.sleep(delay)
+
+        if partial is not None:
+            await asyncio.to_thread(partial.write, seg.start + prefix, memoryview(buf)[prefix:])
+            await asyncio.to_thread(partial.mark_done, seg.start, seg.end)
+        return buf
+
+    async def _prepare(self) -> tuple[ProbeResult, int, list[Segment]]:
+        probe = await self.probe()
+        self.total = probe.total
+        if self.partial is not None:
+            done = await asyncio.to_thread(
+                self.partial.prepare, self.url, probe.total if probe.ranged else None, probe.etag
+            )
+            if done:
+                logger.info(f"断点续传: 已完成 {done}/{probe.total} 字节")
+                self.received = done
+        if not probe.ranged or probe.total is None:
+            return probe, 1, []
+        connections, segments = plan_segments(probe.total, self.max_connections)
+        logger.debug(f"分段下载: {probe.total} 字节，{len(segments)} 段，{connections} 个连接")
+        return probe, connections, segments
+
+    async def iter_chunks(self) -> AsyncGenerator[bytes | bytearray]:
+        """按顺序产出整个文件的数据"""
+        probe, connections, segments = await self._prepare()
+        if not segments:
+            async for chunk in self._stream_whole():
+                yield chunk
+            return
+
+        sem = asyncio.Semaphore(connections)
+        window = connections * WINDOW_FACTOR
+        tasks: dict[int, asyncio.Task[bytearray]] = {}
+        scheduled = 0
+        try:
+            for seg in segments:
+                # 只提前调度窗口内的段，限制内存中缓存的数据量
+                while scheduled < len(segments) and scheduled < seg.index + window:
+                    tasks[scheduled] = asyncio.ensure_future(self._fetch_segment(segments[scheduled], sem))
+                    scheduled += 1
+                yield await tasks.pop(seg.index)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def fill(self) -> None:
+        """把整个文件下载进缓存文件（不按顺序产出数据），需要传入 partial"""
+        assert self.partial is not None
+        probe, connections, segments = await self._prepare()
+        if not segments:
+            async for _chunk in self._stream_whole():
+                pass
+            return
+        sem = asyncio.Semaphore(connections)
+        tasks = [asyncio.ensure_future(self._fetch_segment(seg, sem, read_back=False)) for seg in segments]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
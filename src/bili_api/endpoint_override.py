@@ -0,0 +1,69 @@
+"""接口地址重定向
+
+设置环境变量 NEUROSANG_API_BASE 或配置项 Network.ApiBaseOverride（如 http://127.0.0.1:18080）后，
+发往 bilibili 相关域名（接口、视频页、封面、CDN）的请求都会改写到该地址，只保留路径与查询参数。
+用于把应用指向 benchmarks/stand_in.py 提供的离线替身服务器，在不访问真实站点的情况下测量网络路径。
+"""
+
+from __future__ import annotations
+
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+from bilibili_api import register_client
+from bilibili_api.clients.AioHTTPClient import AioHTTPClient
+from loguru import logger
+
+from src.config import cfg
+
+ENV_API_BASE = "NEUROSANG_API_BASE"
+CLIENT_NAME = "neurosang_override"
+
+# 需要重定向的域名后缀
+BILIBILI_HOST_SUFFIXES = (
+    "bilibili.com",
+    "bilivideo.com",
+    "bilivideo.cn",
+    "hdslb.com",
+    "akamaized.net",
+)
+
+
+def get_api_base_override() -> str:
+    """当前生效的重定向地址（环境变量优先），未设置时返回空字符串"""
+    base = os.getenv(ENV_API_BASE) or cfg.api_base_override.value or ""
+    return str(base).rstrip("/")
+
+
+def rewrite_url(url: str) -> str:
+    """把 bilibili 域名的地址改写到重定向地址；未启用或非 bilibili 域名时原样返回"""
+    base = get_api_base_override()
+    if not base or not url:
+        return url
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if not any(host == suffix or host.endswith("." + suffix) for suffix in BILIBILI_HOST_SUFFIXES):
+        return url
+    target = urlsplit(base)
+    return urlunsplit((target.scheme, target.netloc, target.path + parts.path, parts.query, ""))
+
+
+class OverrideAioHTTPClient(AioHTTPClient):
+    """在 aiohttp 客户端基础上改写请求地址"""
+
+    async def request(self, method: str = "", url: str = "", *args, **kwargs):
+        return await super().request(method, rewrite_url(url), *args, **kwargs)
+
+    async def download_create(self, url: str = "", *args, **kwargs) -> int:
+        return await super().download_create(rewrite_url(url), *args, **kwargs)
+
+
+def apply_api_override() -> bool:
+    """启用重定向时注册并切换到改写地址的请求客户端，返回是否已启用"""
+    base = get_api_base_override()
+    if not base:
+        return False
+    # register_client 会同时切换为当前使用的客户端
+    register_client(CLIENT_NAME, OverrideAioHTTPClient)
+    logger.warning(f"bilibili 接口已重定向到: {base}")
+    return True
@@ -0,0 +1,129 @@
+"""共享 HTTP 客户端
+
+为不经过 bilibili_api 的请求（视频页、封面图、CDN 流等）提供统一的连接层：
+- 同步：进程级 requests.Session，按主机维护 keep-alive 连接池并带失败重试
+- 异步：全局异步运行时上的 aiohttp.ClientSession，带 DNS 缓存与按主机并发上限
+- 统一默认超时、User-Agent；启用应用内代理时按请求传入 get_proxies()，否则沿用系统 / 环境变量代理
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import aiohttp
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.config import USER_AGENT
+
+from .common import get_proxies
+from .endpoint_override import rewrite_url
+
+# 默认超时（秒）：(连接, 读取)
+DEFAULT_TIMEOUT: tuple[float, float] = (5.0, 15.0)
+# 连接池：缓存的主机数 / 每个主机保持的连接数
+POOL_HOSTS = 16
+POOL_PER_HOST = 8
+# aiohttp DNS 缓存时长（秒）
+DNS_CACHE_TTL = 300
+
+_DEFAULT_HEADERS = {"User-Agent": USER_AGENT}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+_async_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=1,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(_DEFAULT_HEADERS)
+    # 保留 trust_env：未启用应用内代理时使用系统代理（HTTP(S)_PROXY、Clash 等写入的系统设置），
+    # 启用时每次请求显式传入的 proxies 优先
+    return session
+
+
+def get_session() -> requests.Session:
+    """获取进程共享的 requests.Session（线程安全的懒加载）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def http_get(url: str, *, timeout: float | tuple[float, float] | None = None, **kwargs) -> requests.Response:
+    """同步 GET：复用连接池，自动套用默认超时与代理配置"""
+    kwargs.setdefault("proxies", get_proxies())
+    return get_session().get(rewrite_url(url), timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+
+def get_async_proxy() -> str | None:
+    """aiohttp 使用的代理地址（按请求传入）"""
+    return get_proxies().get("https") or None
+
+
+async def get_async_session() -> aiohttp.ClientSession:
+    """获取当前事件循环上的共享 aiohttp 会话"""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_HOSTS * POOL_PER_HOST,
+            limit_per_host=POOL_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=30,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=_DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(connect=DEFAULT_TIMEOUT[0], sock_read=DEFAULT_TIMEOUT[1]),
+            # 与同步会话一致：没有按请求传入代理时使用系统代理
+            trust_env=True,
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def fetch_bytes(url: str, *, headers: dict | None = None) -> bytes | None:
+    """异步 GET 并返回响应体；非 200 时返回 None"""
+    session = await get_async_session()
+    async with session.get(rewrite_url(url), headers=headers, proxy=get_async_proxy()) as resp:
+        if resp.status != 200:
+            logger.debug(f"请求失败 {resp.status}: {url}")
+            return None
+        return await resp.read()
+
+
+async def close_async_sessions() -> None:
+    """关闭当前事件循环上的 aiohttp 会话"""
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def close_sessions() -> None:
+    """关闭同步会话（应用退出时调用）"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,286 @@
+"""视频元数据存储
+
+所有需要 Video.get_info 的地方（分P列表、标题、封面、BV 精确搜索、扩展包解析、
+下载时的 cid 查询）都从这里取数据：
+- 以 bvid 为 key 持久化到 CACHE_DIR/video_meta.json，超过 TTL 才重新请求
+- 并发请求同一个 bvid 时共享同一次网络请求（请求合并）
+- 写盘做了延迟合并，短时间内多次更新只写一次
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from bilibili_api.video import Video
+from loguru import logger
+
+from src.config import CACHE_DIR
+
+from .common import get_credential
+from .scheduler import scheduler
+
+# 元数据有效期：标题/分P 等信息极少变化
+DEFAULT_TTL_S = 7 * 24 * 3600
+# 延迟写盘时间（秒）
+SAVE_DELAY_S = 2.0
+
+
+@dataclass
+class VideoPage:
+    """分P信息"""
+
+    cid: int
+    page: int  # 页码，从 1 开始
+    part: str
+    duration: int = 0  # 秒
+
+
+@dataclass
+class VideoMeta:
+    """视频元数据"""
+
+    bvid: str
+    title: str
+    owner_name: str = ""
+    owner_mid: int = 0
+    pubdate: int = 0
+    pic: str = ""
+    duration: int = 0
+    pages: list[VideoPage] = field(default_factory=list)
+    fetched_at: float = 0.0
+
+    @classmethod
+    def from_api(cls, bvid: str, info: dict) -> "VideoMeta":
+        # 兼容部分接口把数据包在 View 下
+        if "View" in info and isinstance(info["View"], dict):
+            info = info["View"]
+        owner = info.get("owner") or {}
+        pages = [
+            VideoPage(
+                cid=int(p.get("cid", 0)),
+                page=int(p.get("page", idx + 1)),
+                part=str(p.get("part") or f"分P {idx + 1}"),
+                duration=int(p.get("duration", 0)),
+            )
+            for idx, p in enumerate(info.get("pages") or [])
+        ]
+        return cls(
+            bvid=bvid,
+            title=str(info.get("title", "")),
+            owner_name=str(owner.get("name", "")),
+            owner_mid=int(owner.get("mid", 0)),
+            pubdate=int(info.get("pubdate") or 0),
+            pic=str(info.get("pic", "")),
+            duration=int(info.get("duration") or 0),
+            pages=pages,
+            fetched_at=time.time(),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VideoMeta":
+        data = dict(data)
+        data["pages"] = [VideoPage(**p) for p in data.get("pages", [])]
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @property
+    def date_str(self) -> str:
+        if self.pubdate > 0:
+            return datetime.fromtimestamp(self.pubdate).strftime("%Y-%m-%d %H:%M:%S")
+        return ""
+
+    def get_page(self, page: int) -> VideoPage | None:
+        """按页码（从 1 开始）获取分P"""
+        for p in self.pages:
+            if p.page == page:
+                return p
+        if 0 < page <= len(self.pages):
+            return self.pages[page - 1]
+        return None
+
+
+class VideoMetadataStore:
+    def __init__(self, path: Path, *, ttl_s: float = DEFAULT_TTL_S):
+        self.path = path
+        self.ttl_s = ttl_s
+        self._entries: dict[str, VideoMeta] = {}
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # _entries 在异步运行时线程中写入，flush 在主线程中读取，二者都持该锁
+        self._entries_lock = threading.Lock()
+        # 进行中的请求：bvid -> (future, 发起请求所用的 endpoint, retries)
+        self._inflight: dict[str, tuple[asyncio.Future[VideoMeta], str, int | None]] = {}
+        self._save_handle: asyncio.TimerHandle | None = None
+
+    # -------- 持久化 --------
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))
+                for bvid, data in raw.items():
+                    try:
+                        self._entries[bvid] = VideoMeta.from_dict(data)
+                    except Exception:
+                        continue
+                logger.debug(f"已加载 {len(self._entries)} 条视频元数据")
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logger.opt(exception=True).warning("视频元数据读取失败，将重新获取")
+            self._loaded = True
+
+    def _snapshot(self) -> dict[str, dict]:
+        with self._entries_lock:
+            entries = list(self._entries.items())
+        return {k: v.to_dict() for k, v in entries}
+
+    def _write(self, snapshot: dict[str, dict]) -> None:
+        try:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(snapshot, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+        except Exception:
+            logger.opt(exception=True).warning("视频元数据保存失败")
+
+    def _schedule_save(self) -> None:
+        """在事件循环上延迟合并写盘"""
+        if self._save_handle is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def _save() -> None:
+            self._save_handle = None
+            loop.run_in_executor(None, self._write, self._snapshot())
+
+        self._save_handle = loop.call_later(SAVE_DELAY_S, _save)
+
+    def flush(self) -> None:
+        """立即同步写盘（应用退出时调用）"""
+        if not self._loaded:
+            return
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        self._write(self._snapshot())
+
+    # -------- 查询 --------
+    def peek(self, bvid: str, *, allow_stale: bool = False) -> VideoMeta | None:
+        """不发请求，仅从已缓存数据中读取（可在任意线程调用）"""
+        self._ensure_loaded()
+        meta = self._entries.get(bvid)
+        if meta is None:
+            return None
+        if not allow_stale and time.time() - meta.fetched_at >= self.ttl_s:
+            return None
+        return meta
+
+    async def _fetch(self, bvid: str, endpoint: str, retries: int | None) -> VideoMeta:
+        v = Video(bvid, credential=get_credential())
+        info = await scheduler.run(endpoint, v.get_info, retries=retries)
+        meta = VideoMeta.from_api(bvid, info)
+        with self._entries_lock:
+            self._entries[bvid] = meta
+        self._schedule_save()
+        return meta
+
+    async def get(
+        self,
+        bvid: str,
+        *,
+        max_age_s: float | None = None,
+        endpoint: str = "video",
+        retries: int | None = None,
+    ) -> VideoMeta:
+        """获取视频元数据；缓存未过期时直接返回，否则（合并地）请求一次
+
+        刷新失败但有旧数据时回退到旧数据。endpoint/retries 透传给调度器。
+        """
+        self._ensure_loaded()
+        ttl = self.ttl_s if max_age_s is None else max_age_s
+        meta = self._entries.get(bvid)
+        if meta is not None and time.time() - meta.fetched_at < ttl:
+            return meta
+
+        inflight = self._inflight.get(bvid)
+        if inflight is None:
+            fut = self._start_fetch(bvid, endpoint, retries)
+            joined = False
+        else:
+            fut, joined = inflight[0], inflight[1:] != (endpoint, retries)
+
+        try:
+            # shield：某个调用方被取消时不影响其他等待同一请求的调用方
+            return await asyncio.shield(fut)
+        except Exception:
+            if joined:
+                # 合并到的是条件不同的请求（例如不重试的预取）：按自己的 endpoint / retries 再请求一次
+                logger.opt(exception=True).debug(f"合并的请求失败，按原条件重新请求: {bvid}")
+                try:
+                    return await asyncio.shield(self._start_fetch(bvid, endpoint, retries))
+                except Exception:
+                    if meta is None:
+                        raise
+            if meta is not None:
+                logger.opt(exception=True).warning(f"刷新视频元数据失败，使用旧数据: {bvid}")
+                return meta
+            raise
+
+    def _start_fetch(self, bvid: str, endpoint: str, retries: int | None) -> asyncio.Future[VideoMeta]:
+        """发起请求并登记为进行中，之后同一 bvid 的调用方合并到该请求"""
+        inflight = self._inflight.get(bvid)
+        if inflight is not None and inflight[1:] == (endpoint, retries):
+            return inflight[0]
+        fut = asyncio.ensure_future(self._fetch(bvid, endpoint, retries))
+        self._inflight[bvid] = (fut, endpoint, retries)
+
+        def _done(_f: asyncio.Future[VideoMeta]) -> None:
+            if self._inflight.get(bvid, (None,))[0] is fut:
+                del self._inflight[bvid]
+
+        fut.add_done_callback(_done)
+        return fut
+
+    async def get_many(self, bvids: list[str]) -> dict[str, VideoMeta]:
+        """批量获取，失败的 bvid 不出现在结果中"""
+        unique = list(dict.fromkeys(bvids))
+        results = await asyncio.gather(*[self.get(b) for b in unique], return_exceptions=True)
+        out: dict[str, VideoMeta] = {}
+        for bvid, res in zip(unique, results):
+            if isinstance(res, BaseException):
+                logger.opt(exception=res).warning(f"获取视频元数据失败: {bvid}")
+            else:
+                out[bvid] = res
+        return out
+
+    async def prefetch(self, bvids: list[str]) -> int:
+        """低优先级预取：逐个请求尚未缓存的视频，遇到风控冷却立即停止
+
+        走 prefetch 通道且不重试，不与用户主动发起的请求争抢配额。返回实际请求的数量。
+        """
+        fetched = 0
+        for bvid in dict.fromkeys(bvids):
+            if self.peek(bvid) is not None or bvid in self._inflight:
+                continue
+            if scheduler.cooldown_remaining() > 0:
+                break
+            try:
+                await self.get(bvid, endpoint="prefetch", retries=0)
+                fetched += 1
+            except Exception:
+                logger.opt(exception=True).debug(f"预取视频元数据失败: {bvid}")
+        return fetched
+
+
+metadata_store = VideoMetadataStore(CACHE_DIR / "video_meta.json")
@@ -1,70 +1,484 @@
+import asyncio
 import contextlib
 import subprocess
 import uuid
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from dataclasses import dataclass
 from pathlib import Path
 
-from bilibili_api import HEADERS, get_client, sync, video
+from bilibili_api import HEADERS, video
 from loguru import logger
 
-from src.config import CACHE_DIR, FFMPEG_PATH, MUSIC_DIR, VIDEO_DIR, DATA_DIR, cfg, subprocess_options
+from src.config import FFMPEG_PATH, MUSIC_DIR, VIDEO_DIR, cfg, subprocess_options
 from src.core.song_list import SongList
 from src.core.data_io import load_from_all_data
+from src.core.library_index import library_index
+from src.utils.async_runtime import run_sync
 from src.utils.text import fix_filename
 
 from .common import get_credential, apply_proxy_if_enabled
+from .downloader import SegmentedDownloader
+from .http_client import fetch_bytes
+from .metadata import VideoMeta, metadata_store
+from .partial import PartialFile, open_partial
+from .quality import QualityPreset, quality_preset
+from .tags import COVER_DIR, COVER_SUFFIXES, SourceTags
+from .scheduler import scheduler
+from .source_cache import source_cache
+
+
+RefreshUrl = Callable[[], Awaitable[str]]
+# (已接收字节数, 总字节数)
+ProgressCallback = Callable[[int, int | None], None]
+
+
+def _make_downloader(
+    url: str,
+    ext: str,
+    intro: str,
+    partial: PartialFile | None,
+    refresh_url: RefreshUrl | None,
+    on_progress: ProgressCallback | None = None,
+) -> SegmentedDownloader:
+    """创建下载器；没有传入 on_progress 时不报告进度（下载队列之外的下载只在开始时记一条日志）"""
+    logger.debug(f"{intro} ({ext})")
+    return SegmentedDownloader(
+        url,
+        headers=HEADERS,
+        on_progress=on_progress,
+        partial=partial,
+        refresh_url=refresh_url,
+    )
+
+
+async def iter_stream(
+    url: str,
+    ext: str,
+    intro: str,
+    partial: PartialFile | None = None,
+    refresh_url: RefreshUrl | None = None,
+) -> AsyncGenerator[bytes | bytearray]:
+    """按顺序逐块产出流数据（大文件自动分段并发下载，传入 partial 时同时写入断点续传缓存）"""
+    downloader = _make_downloader(url, ext, intro, partial, refresh_url)
+    async with contextlib.aclosing(downloader.iter_chunks()) as chunks:
+        async for chunk in chunks:
+            yield chunk
+
+
+# select_audio_stream 选出的流（都带有下载地址 url）
+DownloadStream = (
+    video.VideoStreamDownloadURL
+    | video.AudioStreamDownloadURL
+    | video.FLVStreamDownloadURL
+    | video.MP4StreamDownloadURL
+)
+
+# 输出为这些格式时直接复制 AAC 音频流（只重新封装，不重新编码）
+REMUX_SUFFIXES = {".m4a"}
+# 输出为这些有损格式时按音质预设设置编码码率
+BITRATE_SUFFIXES = {".mp3", ".ogg"}
+
+
+def _output_args(
+    output_file: Path, preset: QualityPreset | None = None, tags: SourceTags | None = None, cover: bool = False
+) -> list[str]:
+    suffix = output_file.suffix.lower()
+    if cover and suffix in COVER_SUFFIXES:
+        # 第二个输入是封面图片，原样写入为附加图片
+        args = ["-map", "0:a", "-map", "1:v", "-c:v", "copy", "-disposition:v", "attached_pic"]
+    elif cover:
+        args = ["-map", "0:a"]
+    else:
+        # -vn：只保留音频，合流输入时不处理视频
+        args = ["-vn"]
+    if suffix in REMUX_SUFFIXES:
+        args += ["-c:a", "copy"]
+    elif suffix in BITRATE_SUFFIXES:
+        preset = preset or quality_preset()
+        if preset.output_kbps is not None:
+            args += ["-b:a", f"{preset.output_kbps}k"]
+    if tags is not None:
+        args += tags.ffmpeg_args(output_file)
+    return args + [str(output_file)]
+
+
+def _ffmpeg_args(input_arg: str, outputs: list[Path], tags: SourceTags | None = None) -> list[str]:
+    """ffmpeg 命令：一个输入，一个或多个输出；传入 tags 时在同一次调用中写入标签与封面"""
+    args = [str(FFMPEG_PATH), "-y", "-i", input_arg]
+    cover_file = tags.cover if tags is not None else None
+    cover = cover_file is not None and cover_file.exists()
+    if cover:
+        args += ["-i", str(cover_file)]
+    for output_file in outputs:
+        args += _output_args(output_file, tags=tags, cover=cover)
+    return args
+
+
+def select_audio_stream(
+    detecter: video.VideoDownloadURLDataDetecter, preset: QualityPreset | None = None
+) -> tuple[DownloadStream, str, str]:
+    """选择要下载的流，返回 (流, 扩展名, 进度提示)
+
+    优先选择 DASH 纯音频流，音质由音质预设决定；只有接口仅提供 FLV/MP4 合流时才下载带视频的数据。
+    """
+    if not detecter.check_flv_mp4_stream():
+        audio_streams = [
+            s
+            for s in detecter.detect(no_dolby_audio=True, no_hires=True)
+            if isinstance(s, video.AudioStreamDownloadURL)
+        ]
+        if not audio_streams:
+            raise ValueError("未找到可用的音频流")
+        stream = (preset or quality_preset()).pick_audio(audio_streams)
+        return stream, ".m4s", "下载音频流"
+
+    stream = detecter.detect_best_streams()[0]
+    if isinstance(stream, video.MP4StreamDownloadURL):
+        return stream, ".mp4", "下载 MP4 音视频流"
+    return stream, ".flv", "下载 FLV 音视频流"
 
 
-@contextlib.asynccontextmanager
-async def download(url: str, ext: str, intro: str):
+async def _wait_ffmpeg(proc: asyncio.subprocess.Process) -> None:
+    try:
+        code = await proc.wait()
+    except asyncio.CancelledError:
+        # 任务被取消时不留下孤儿 ffmpeg 进程
+        if proc.returncode is None:
+            proc.kill()
+        raise
+    if code != 0:
+        raise subprocess.CalledProcessError(code, str(FFMPEG_PATH))
+
+
+async def transcode_file(input_file: Path, output_file: Path, tags: SourceTags | None = None) -> None:
+    """转码已下载完成的文件"""
+    proc = await asyncio.create_subprocess_exec(
+        *_ffmpeg_args(str(input_file), [output_file], tags),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **subprocess_options(),
+    )
+    await _wait_ffmpeg(proc)
+
+
+async def export_formats(source: Path, outputs: list[Path], tags: SourceTags | None = None) -> None:
+    """把一个源文件同时转码为多个输出：只启动一次 ffmpeg，源数据只解码一次，再分别编码为各个格式"""
+    proc = await asyncio.create_subprocess_exec(
+        *_ffmpeg_args(str(source), outputs, tags),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **subprocess_options(),
+    )
+    await _wait_ffmpeg(proc)
+
+
+async def transcode_stream(
+    chunks: AsyncGenerator[bytes | bytearray], output_file: Path, tags: SourceTags | None = None
+) -> None:
+    """边下载边转码：把数据块直接写入 ffmpeg 的 stdin，不落临时文件"""
+    proc = await asyncio.create_subprocess_exec(
+        *_ffmpeg_args("pipe:0", [output_file], tags),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **subprocess_options(),
+    )
+    assert proc.stdin is not None
+    try:
+        async with contextlib.aclosing(chunks) as it:
+            async for chunk in it:
+                proc.stdin.write(chunk)
+                # 背压：ffmpeg 处理不过来时暂停读取网络数据
+                await proc.stdin.drain()
+        proc.stdin.close()
+        await proc.stdin.wait_closed()
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    await _wait_ffmpeg(proc)
+
+
+async def download_and_transcode(
+    stream,
+    ext: str,
+    intro: str,
+    output_file: Path,
+    partial: PartialFile | None = None,
+    refresh_url: RefreshUrl | None = None,
+    tags: SourceTags | None = None,
+) -> None:
+    """下载流并转码为 output_file（传入 tags 时同时写入来源标签与封面）
+
+    FLV 与 DASH m4s 可顺序解析，直接通过管道送入 ffmpeg；
+    普通 MP4 的 moov 可能位于文件末尾，需要可随机访问的输入，先下载完整文件再转码。
+    管道转码失败时回退到完整文件：已写入断点续传缓存的部分不会重新下载。
+
+    传入 partial 时数据同时写入断点续传缓存，转码成功后移入原始流缓存（未开启时删除）；
+    失败时保留，下次下载同一个流时续传。
+    """
     logger.info(f"Using ffmpeg: {FFMPEG_PATH}")
-    client = get_client()
-    dwn_id = await client.download_create(url, HEADERS)
-    current = 0
-    total = client.download_content_length(dwn_id)
-
-    cache_file = CACHE_DIR / f"{uuid.uuid4()}{ext}"
-    with open(cache_file, "wb") as temp_file:
-        logger.info(f"临时文件: {temp_file.name}")
-        while True:
-            current += temp_file.write(await client.download_chunk(dwn_id))
-            print(f"{intro} - {ext} [{current} / {total}]", end="\r")
-            if current == total:
-                break
+    # 未指定缓存时使用一次性的缓存文件，结束后无论成败都删除
+    temporary = partial is None
+    if partial is None:
+        partial = open_partial(f"tmp_{uuid.uuid4().hex}{ext}")
 
     try:
-        yield cache_file
+        if cfg.stream_transcode.value and not isinstance(stream, video.MP4StreamDownloadURL):
+            try:
+                await transcode_stream(iter_stream(stream.url, ext, intro, partial, refresh_url), output_file, tags)
+                _release_partial(partial, cacheable=not temporary)
+                return
+            except (subprocess.CalledProcessError, BrokenPipeError, ConnectionResetError):
+                logger.opt(exception=True).warning("管道转码失败，回退到完整文件")
+                output_file.unlink(missing_ok=True)
+
+        await _make_downloader(stream.url, ext, intro, partial, refresh_url).fill()
+        logger.info(f"缓存文件: {partial.part_path}")
+        partial.close()
+        await transcode_file(partial.part_path, output_file, tags)
+        _release_partial(partial, cacheable=not temporary)
     finally:
-        cache_file.unlink(missing_ok=True)
+        if temporary:
+            partial.discard()
+        else:
+            partial.close()
 
 
-async def download_music(bvid: str, output_file: Path, page_index: int = 0) -> None:
+def _release_partial(partial: PartialFile, cacheable: bool = True) -> None:
+    """转码成功后处理断点续传缓存：开启原始流缓存时移入缓存，否则删除"""
+    if not (cacheable and source_cache.adopt(partial)):
+        partial.discard()
+
+
+def _stream_key(bvid: str, cid: int, stream, ext: str) -> str:
+    """断点续传缓存的文件名：与会过期的 CDN 地址无关，同一视频分P的同一音质总是对应同一份缓存"""
+    quality = getattr(stream, "audio_quality", None) or getattr(stream, "video_quality", None)
+    return f"{bvid}_{cid}_{getattr(quality, 'name', quality)}{ext}"
+
+
+@dataclass
+class ResolvedStream:
+    """已选定、待下载的流"""
+
+    stream: DownloadStream
+    ext: str
+    intro: str
+    partial: PartialFile
+    refresh_url: RefreshUrl
+
+
+async def resolve_stream(bvid: str, page_index: int = 0) -> ResolvedStream:
+    """取流并选择要下载的音频流，同时打开对应的断点续传缓存"""
     # 实例化 Video 类
     v = video.Video(bvid, credential=get_credential())
-    # 获取视频下载链接
-    download_url_data = await v.get_download_url(page_index)
-    # 解析视频下载信息
-    detecter = video.VideoDownloadURLDataDetecter(data=download_url_data)
-    streams = detecter.detect_best_streams()
-    # 有 MP4 流 / FLV 流两种可能
-    async with (
-        download(streams[0].url, ".flv", "下载 FLV 音视频流")
-        if detecter.check_flv_mp4_stream()
-        else download(streams[1].url, ".m4s", "下载音频流")
-    ) as temp_file:
-        # 转换文件格式
-        subprocess.run(
-            [
-                str(FFMPEG_PATH),
-                "-y",
-                "-i",
-                str(temp_file),
-                str(output_file),
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            **subprocess_options(),
-        ).check_returncode()
+    # 通过元数据存储拿到 cid，避免 get_download_url 内部再请求一次视频信息
+    meta = await metadata_store.get(bvid)
+    page = meta.get_page(page_index + 1)
+    if page is None:
+        raise ValueError(f"分P不存在: {bvid} P{page_index + 1}")
+    # 刷新地址时沿用同一个预设，中途修改设置不影响进行中的下载
+    preset = quality_preset()
+
+    async def select() -> tuple[DownloadStream, str, str]:
+        # 获取视频下载链接并解析
+        download_url_data = await scheduler.run("playurl", lambda: v.get_download_url(cid=page.cid))
+        detecter = video.VideoDownloadURLDataDetecter(data=download_url_data)
+        return select_audio_stream(detecter, preset)
+
+    stream, ext, intro = await select()
+    key = _stream_key(bvid, page.cid, stream, ext)
+
+    async def refresh_url() -> str:
+        """CDN 地址过期时重新取流，只接受同一条流（音质与格式一致）"""
+        new_stream, new_ext, _ = await select()
+        if _stream_key(bvid, page.cid, new_stream, new_ext) != key:
+            raise ValueError(f"重新获取的流与缓存不一致: {key}")
+        return new_stream.url
+
+    return ResolvedStream(stream, ext, intro, open_partial(key), refresh_url)
+
+
+async def source_tags(bvid: str, page_index: int, output_file: Path) -> SourceTags | None:
+    """要写入文件的来源标签；封面下载到封面缓存目录，与输出文件同名
+
+    标签只是附加信息，获取失败时记录日志并继续下载（不写标签或不带封面）。
+    """
+    try:
+        meta = await metadata_store.get(bvid)
+    except Exception:
+        logger.opt(exception=True).warning(f"获取标签信息失败，不写入标签: {bvid}")
+        return None
+    cover = COVER_DIR / f"{output_file.stem}.jpg"
+    if meta.pic and not cover.exists():
+        try:
+            data = await fetch_bytes(meta.pic)
+            if data:
+                await asyncio.to_thread(_write_cover, cover, data)
+        except Exception:
+            logger.opt(exception=True).warning(f"下载封面失败: {bvid}")
+    return SourceTags.from_meta(meta, page_index + 1, cover if cover.exists() else None)
+
+
+def _write_cover(cover: Path, data: bytes) -> None:
+    cover.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cover.with_suffix(".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(cover)
+
+
+async def cached_source(bvid: str, page_index: int = 0, any_quality: bool = False) -> Path | None:
+    """已缓存且满足当前音质预设的原始流（any_quality 时不限音质），未开启原始流缓存或未命中时返回 None"""
+    if not source_cache.enabled():
+        return None
+    meta = await metadata_store.get(bvid)
+    page = meta.get_page(page_index + 1)
+    if page is None:
+        return None
+    return await asyncio.to_thread(source_cache.find, bvid, page.cid, None if any_quality else quality_preset())
+
+
+async def download_resolved(r: ResolvedStream | Path, bvid: str, output_file: Path, page_index: int = 0) -> None:
+    """下载并转码 resolve_stream 选定的流（传入已缓存的原始流时直接转码），完成后记入曲库索引"""
+    tags = await source_tags(bvid, page_index, output_file)
+    if isinstance(r, Path):
+        logger.info(f"使用已缓存的原始流: {r.name}")
+        await transcode_file(r, output_file, tags)
+    else:
+        await download_and_transcode(r.stream, r.ext, r.intro, output_file, r.partial, r.refresh_url, tags)
+    await asyncio.to_thread(library_index.add, bvid, page_index + 1, output_file)
+
+    logger.info(f"已下载为：{output_file}")
+
+
+async def download_music(bvid: str, output_file: Path, page_index: int = 0) -> None:
+    source = await cached_source(bvid, page_index)
+    r = source if source is not None else await resolve_stream(bvid, page_index)
+    await download_resolved(r, bvid, output_file, page_index)
+
+
+async def export_cached(bvid: str, formats: list[str], page_index: int = 0, overwrite: bool = False) -> list[Path]:
+    """把已缓存的原始流一次性导出为多种格式，不重新下载
+
+    输出文件与曲库中该分P的文件同名（只换扩展名），曲库中没有时使用视频标题；
+    overwrite 为 False 时跳过已存在的文件。
+
+    Returns:
+        本次导出的文件
+
+    Raises:
+        FileNotFoundError: 该分P的原始流没有缓存
+    """
+    # 导出只是换格式，使用已有的任意音质
+    source = await cached_source(bvid, page_index, any_quality=True)
+    if source is None:
+        raise FileNotFoundError(f"没有缓存的原始流: {bvid} P{page_index + 1}")
+
+    existing = await asyncio.to_thread(library_index.lookup, bvid, page_index + 1)
+    if existing is not None:
+        base = existing.with_suffix("")
+    else:
+        meta = await metadata_store.get(bvid)
+        base = MUSIC_DIR / fix_filename(meta.title or bvid).replace(" ", "").replace("_", "", 1)
+    outputs = [base.with_name(f"{base.name}.{fmt}") for fmt in dict.fromkeys(formats)]
+    if not overwrite:
+        outputs = [fp for fp in outputs if not fp.exists()]
+    if not outputs:
+        return []
+
+    logger.info(f"从缓存导出 {bvid} P{page_index + 1}: {', '.join(fp.suffix for fp in outputs)}")
+    tags = await source_tags(bvid, page_index, outputs[0])
+    try:
+        await export_formats(source, outputs, tags)
+    except BaseException:
+        for fp in outputs:
+            fp.unlink(missing_ok=True)
+        raise
+    return outputs
+
+
+def part_output_file(title: str, part_num: int, parts_info: list[dict], file_type: str) -> Path:
+    """分P的输出文件：有分P标题时用“视频标题_分P标题”，否则用“视频标题_P页码”"""
+    # 查找对应分P的标题
+    part_title = None
+    for part_info in parts_info:
+        if part_info["page"] == part_num:
+            part_title = part_info["part"]
+            break
+
+    if part_title:
+        safe_part_title = fix_filename(part_title).replace(" ", "").replace("_", "", 1)
+        return MUSIC_DIR / f"{title}_{safe_part_title}.{file_type}"
+    return MUSIC_DIR / f"{title}_P{part_num}.{file_type}"
+
 
+async def download_music_parts(
+    bvid: str, title: str, parts: list[int], file_type: str, parts_info: list[dict] | None = None
+) -> dict[int, BaseException | None]:
+    """并行下载同一视频的多个分P
+
+    分P信息优先使用调用方已有的 parts_info；所有分P的下载地址一次性并发获取（经由调度器的 playurl 通道限流），
+    之后各分P同时下载并转码，同时进行的数量不超过 MaxSlots。
+
+    Returns:
+        页码 -> 异常（成功为 None）
+    """
+    if parts_info is None:
+        parts_info = parts_from_meta(await metadata_store.get(bvid))
+    parts = list(dict.fromkeys(parts))
+    # 已缓存原始流的分P直接转码，其余分P并发获取下载地址
+    cached = await asyncio.gather(*(cached_source(bvid, p - 1) for p in parts), return_exceptions=True)
+    sources = {p: source for p, source in zip(parts, cached) if isinstance(source, Path)}
+    pending = [p for p in parts if p not in sources]
+    fetched = await asyncio.gather(*(resolve_stream(bvid, p - 1) for p in pending), return_exceptions=True)
+    by_part = {**sources, **dict(zip(pending, fetched))}
+    resolved = [by_part[p] for p in parts]
+    logger.info(f"已获取 {bvid} 的 {len(pending)} 个分P的下载地址，{len(sources)} 个分P使用已缓存的原始流")
+
+    sem = asyncio.Semaphore(max(1, int(cfg.download_max_slots.value)))
+
+    async def download_part(part_num: int, r: ResolvedStream | Path) -> None:
+        output_file = part_output_file(title, part_num, parts_info, file_type)
+        if output_file.exists():
+            logger.info(f"文件 {output_file} 已存在，执行覆盖操作。")
+        async with sem:
+            await download_resolved(r, bvid, output_file, part_num - 1)
+
+    results: dict[int, BaseException | None] = {}
+    jobs: dict[int, Awaitable[None]] = {}
+    for part_num, r in zip(parts, resolved):
+        if isinstance(r, BaseException):
+            results[part_num] = r
+        else:
+            jobs[part_num] = download_part(part_num, r)
+    for part_num, error in zip(jobs, await asyncio.gather(*jobs.values(), return_exceptions=True)):
+        results[part_num] = error
+    for part_num, error in results.items():
+        if error is not None:
+            logger.opt(exception=error).error(f"分P下载失败: {bvid} P{part_num}")
+    return results
+
+
+async def fetch_resolved(r: ResolvedStream, on_progress: ProgressCallback | None = None) -> PartialFile:
+    """只下载不转码：把 resolve_stream 选定的流完整下载进断点续传缓存，供下载队列交给转码阶段
+
+    调用方可先记下 r.partial.key，以便取消时删除缓存。
+    """
+    try:
+        await _make_downloader(r.stream.url, r.ext, r.intro, r.partial, r.refresh_url, on_progress).fill()
+    finally:
+        r.partial.close()
+    return r.partial
+
+
+async def transcode_fetched(source: PartialFile | Path, output_file: Path, tags: SourceTags | None = None) -> None:
+    """转码 fetch_resolved 下载好的缓存文件（成功后移入原始流缓存或删除），或已缓存的原始流"""
+    if isinstance(source, Path):
+        await transcode_file(source, output_file, tags)
+    else:
+        await transcode_file(source.part_path, output_file, tags)
+        _release_partial(source)
     logger.info(f"已下载为：{output_file}")
 
 
@@ -75,34 +489,25 @@ async def get_video_parts(bvid: str) -> list[dict]:
         bvid: 视频BV号
 
     Returns:
-        分P信息列表，每个元素包含 'page' (页码) 和 'part' (标题) 字段
+        分P信息列表，每个元素包含 'page' (页码)、'part' (标题) 和 'duration' (时长) 字段
         如果只有一个分P，返回空列表
     """
     apply_proxy_if_enabled()
     try:
-        v = video.Video(bvid, credential=get_credential())
-        info = await v.get_info()
-
-        # 获取分P信息
-        pages = info.get("pages", [])
-
-        # 如果只有一个分P，返回空列表
-        if len(pages) <= 1:
-            return []
-
-        # 返回分P信息
-        return [
-            {
-                "page": page.get("page", idx + 1),
-                "part": page.get("part", f"分P {idx + 1}"),
-            }
-            for idx, page in enumerate(pages)
-        ]
+        meta = await metadata_store.get(bvid)
+        return parts_from_meta(meta)
     except Exception:
         logger.exception(f"获取视频分P信息失败: {bvid}")
         return []
 
 
+def parts_from_meta(meta: VideoMeta) -> list[dict]:
+    """把元数据中的分P转换为分P信息列表，只有一个分P时返回空列表"""
+    if len(meta.pages) <= 1:
+        return []
+    return [{"page": p.page, "part": p.part, "duration": p.duration} for p in meta.pages]
+
+
 def get_video_parts_sync(bvid: str) -> list[dict]:
     """同步方式获取视频的分P信息
 
@@ -113,7 +518,21 @@ def get_video_parts_sync(bvid: str) -> list[dict]:
         分P信息列表
     """
     apply_proxy_if_enabled()
-    return sync(get_video_parts(bvid))
+    return run_sync(get_video_parts(bvid))
+
+
+def filter_song_list(song_list: SongList, search_content: str, mode: str = "title") -> None:
+    """按搜索模式对列表原地进行匹配、去重与黑名单/关键词过滤"""
+    if mode == "bvid":
+        # BV 精确查找：不应用黑名单/关键词过滤，避免把目标视频过滤掉
+        song_list.filter_by_bv(search_content)
+        song_list.unique_by_bv()
+    else:
+        song_list.search_by_title(search_content)
+        song_list.unique_by_bv()
+        song_list.remove_blacklist(cfg.black_author_list.value, 1)
+        if cfg.enable_filter.value:
+            song_list.filter_data(cfg.filter_list.value, 0)
 
 
 def search_song_list(search_content: str, mode: str = "title") -> SongList | None:
@@ -133,21 +552,9 @@ def search_song_list(search_content: str, mode: str = "title") -> SongList | Non
     total_data = load_from_all_data(VIDEO_DIR)
     if total_data is None:
         return None
-    filter_list = cfg.filter_list.value if cfg.enable_filter.value else []
-    black_author_list = cfg.black_author_list.value
 
     search_result_list = total_data
-
-    if mode == "bvid":
-        # BV 精确查找：不应用黑名单/关键词过滤，避免把目标视频过滤掉
-        search_result_list.filter_by_bv(search_content)
-        search_result_list.unique_by_bv()
-    else:
-        search_result_list.search_by_title(search_content)
-        search_result_list.unique_by_bv()
-        search_result_list.remove_blacklist(black_author_list, 1)
-        if cfg.enable_filter.value:
-            search_result_list.filter_data(filter_list, 0)
+    filter_song_list(search_result_list, search_content, mode)
 
     if len(search_result_list.get_data()) == 0:
         return None
@@ -156,7 +563,11 @@ def search_song_list(search_content: str, mode: str = "title") -> SongList | Non
 
 
 def run_music_download(
-    index: int, search_list: SongList, file_type: str = "mp3", parts: list[int] | None = None
+    index: int,
+    search_list: SongList,
+    file_type: str = "mp3",
+    parts: list[int] | None = None,
+    parts_info: list[dict] | None = None,
 ) -> bool:
     """运行下载器
 
@@ -165,6 +576,7 @@ def run_music_download(
         search_list: 搜索结果列表
         file_type: 文件类型
         parts: 要下载的分P页码列表，None表示下载第一个分P或全部分P
+        parts_info: 调用方已获取的分P信息（用于分P标题），None 时重新获取
 
     Returns:
         是否下载成功
@@ -193,146 +605,16 @@ def run_music_download(
             if output_file.exists():
                 logger.info(f"文件 {output_file} 已存在，执行覆盖操作。")
 
-            sync(download_music(bv, output_file, 0))
+            run_sync(download_music(bv, output_file, 0))
         else:
-            # 下载指定的多个分P，获取分P信息以使用分P标题
-            parts_info = get_video_parts_sync(bv)
-
-            for part_num in parts:
-                part_index = part_num - 1  # 页码从1开始，索引从0开始
-
-                # 查找对应分P的标题
-                part_title = None
-                for part_info in parts_info:
-                    if part_info["page"] == part_num:
-                        part_title = part_info["part"]
-                        break
-
-                # 如果找到了分P标题，使用分P标题；否则使用P{num}格式
-                if part_title:
-                    safe_part_title = fix_filename(part_title).replace(" ", "").replace("_", "", 1)
-                    output_file = MUSIC_DIR / f"{title}_{safe_part_title}.{file_type}"
-                else:
-                    output_file = MUSIC_DIR / f"{title}_P{part_num}.{file_type}"
-
-                logger.info(f"  输出文件: {output_file}")
-
-                # 如果文件存在，执行覆盖操作
-                if output_file.exists():
-                    logger.info(f"文件 {output_file} 已存在，执行覆盖操作。")
-
-                sync(download_music(bv, output_file, part_index))
+            # 多个分P作为一个并行任务下载（分P标题使用调用方已获取的 parts_info）
+            results = run_sync(download_music_parts(bv, title, parts, file_type, parts_info))
+            failed = [part_num for part_num, error in results.items() if error is not None]
+            if failed:
+                logger.error(f"{len(failed)}/{len(results)} 个分P下载失败: {bv} {failed}")
+                return False
 
         return True
     except Exception:
         logger.exception(f"下载失败: {bv}")
         return False
-
-
-def _get_video_title_by_bvid(bvid: str) -> str:
-    """通过 bvid 获取视频标题，失败时回退为 bvid"""
-    try:
-        v = video.Video(bvid, credential=get_credential())
-        info = sync(v.get_info())
-        # 兼容不同结构
-        title = info.get("title") if isinstance(info, dict) else None
-        if not title and isinstance(info, dict) and "View" in info:
-            title = info["View"].get("title")
-        return title or bvid
-    except Exception:
-        logger.exception(f"获取标题失败: {bvid}")
-        return bvid
-
-
-def run_music_download_by_bvid(bvid: str, file_type: str = "mp3", check_exists: bool = True) -> bool:
-    """直接根据 BV 号下载音频"""
-    try:
-        title = _get_video_title_by_bvid(bvid)
-        safe_title = fix_filename(title).replace(" ", "").replace("_", "", 1)
-        output_file = MUSIC_DIR / f"{safe_title}.{file_type}"
-
-        if check_exists and output_file.exists():
-            # 在后台线程中无法弹出对话框，默认跳过或覆盖？
-            # 这里为了安全起见，如果是后台批量下载，建议跳过或覆盖，而不是阻塞等待用户输入
-            # 但由于此函数也被 import_custom_songs_and_download 调用，
-            # 而 import_custom_songs_and_download 现在被设计为在后台运行，
-            # 所以这里不能有 UI 交互。
-            # 暂时策略：如果文件存在，记录日志并跳过下载（返回 True 表示已处理）
-            logger.info(f"文件已存在，跳过下载: {output_file}")
-            return True
-
-        sync(download_music(bvid, output_file))
-        return True
-    except Exception:
-        logger.exception(f"下载失败: {bvid}")
-        return False
-
-
-def import_custom_songs_and_download(directory: Path | None = None, file_type: str = "mp3") -> dict:
-    """读取 custom_songs 文件夹中的文本文件，逐行 BV 号下载音频
-
-    Returns:
-        dict: 包含状态和结果信息的字典
-        {
-            "status": "success" | "error" | "created_dir" | "no_bv",
-            "message": 描述信息,
-            "data": {"success": int, "failed": int} (仅在 status="success" 时存在)
-        }
-    """
-    from pathlib import Path as _Path
-    import re
-
-    try:
-        base_dir = directory or (DATA_DIR / "custom_songs")
-        base_dir = _Path(base_dir)
-        if not base_dir.exists():
-            base_dir.mkdir(parents=True, exist_ok=True)
-            logger.info(f"已创建 custom_songs 目录: {base_dir}")
-            return {
-                "status": "created_dir",
-                "message": f"已创建 {base_dir}，请放入包含 BV 的 txt 文件后重试",
-                "path": str(base_dir),
-            }
-
-        bv_pattern = re.compile(r"^BV[0-9A-Za-z]+$", re.IGNORECASE)
-        bv_set: set[str] = set()
-
-        for fp in base_dir.iterdir():
-            if not fp.is_file() or fp.suffix.lower() != ".txt":
-                continue
-            try:
-                for line in fp.read_text(encoding="utf-8").splitlines():
-                    s = line.strip()
-                    if not s or s.startswith("#"):
-                        continue
-                    # 仅接受 BV，其他跳过
-                    if bv_pattern.match(s):
-                        # 统一大小写
-                        if not s.startswith("BV"):
-                            s = "BV" + s[2:]
-                        bv_set.add(s)
-                    else:
-                        logger.debug(f"跳过无效行: {s}")
-            except UnicodeDecodeError:
-                logger.info(f"跳过非 UTF-8 文本文件: {fp}")
-            except Exception:
-                logger.exception(f"读取文件失败: {fp}")
-
-        if not bv_set:
-            return {"status": "no_bv", "message": "未在任何 txt 中找到有效 BV 号"}
-
-        success, failed = 0, 0
-        for bv in sorted(bv_set):
-            # 批量下载时不检查文件是否存在（或者默认跳过），避免阻塞
-            # 这里调用 run_music_download_by_bvid 时 check_exists=True 会跳过已存在文件
-            ok = run_music_download_by_bvid(bv, file_type=file_type, check_exists=True)
-            if ok:
-                success += 1
-            else:
-                failed += 1
-
-        return {"status": "success", "message": "下载完成", "data": {"success": success, "failed": failed}}
-
-    except Exception as e:
-        logger.exception("处理 custom_songs 失败")
-        return {"status": "error", "message": f"读取或下载过程中发生错误: {str(e)}"}
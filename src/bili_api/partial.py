@@ -0,0 +1,169 @@
+"""断点续传的未完成下载
+
+每个下载在 CACHE_DIR/downloads 下保存两份文件：
+- <key>.part：按字节偏移写入的数据
+- <key>.json：清单 {"url", "length", "etag", "completed": [[start, end], ...], "updated_at"}
+
+key 由 bvid / cid / 音质 / 扩展名组成，与会过期的 CDN 地址无关，因此重试或重启应用后
+仍能找到之前的进度；服务器返回的长度或 ETag 与清单不符时丢弃旧数据重新下载。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+
+from loguru import logger
+
+from src.config import CACHE_DIR
+
+PARTIAL_DIR = CACHE_DIR / "downloads"
+# 超过该时间未更新的未完成下载会被清理
+STALE_AFTER_S = 7 * 24 * 3600
+
+_purged = False
+
+
+def _merge(ranges: list[list[int]]) -> list[list[int]]:
+    """合并重叠或相邻的闭区间"""
+    merged: list[list[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class PartialFile:
+    def __init__(self, key: str):
+        self.key = re.sub(r"[^0-9A-Za-z_.-]", "_", key)
+        self.part_path = PARTIAL_DIR / f"{self.key}.part"
+        self.manifest_path = PARTIAL_DIR / f"{self.key}.json"
+        self.url: str | None = None
+        self.length: int | None = None
+        self.etag: str | None = None
+        self.completed: list[list[int]] = []
+        self._fh = None
+        self._lock = threading.Lock()
+        self._load()
+
+    # -------- 清单 --------
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            self.url = data.get("url")
+            self.length = data.get("length")
+            self.etag = data.get("etag")
+            self.completed = _merge([list(r) for r in data.get("completed", [])])
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.opt(exception=True).warning(f"下载清单损坏，将重新下载: {self.manifest_path}")
+            self.completed = []
+
+    def save(self) -> None:
+        data = {
+            "url": self.url,
+            "length": self.length,
+            "etag": self.etag,
+            "completed": self.completed,
+            "updated_at": int(time.time()),
+        }
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(self.manifest_path)
+
+    @property
+    def done_bytes(self) -> int:
+        return sum(end - start + 1 for start, end in self.completed)
+
+    def is_complete(self) -> bool:
+        return self.length is not None and self.done_bytes >= self.length
+
+    def prepare(self, url: str, length: int | None, etag: str | None) -> int:
+        """核对服务器上的文件与已有进度，不一致时丢弃旧数据；返回已完成的字节数"""
+        with self._lock:
+            PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+            mismatch = (
+                length is None
+                or (self.length is not None and self.length != length)
+                or (self.etag is not None and etag is not None and self.etag != etag)
+                or not self.part_path.exists()
+            )
+            if mismatch and self.completed:
+                logger.info(f"服务器文件已变化或进度不可用，重新下载: {self.key}")
+            if mismatch:
+                self.completed = []
+                self.part_path.write_bytes(b"")
+            self.url, self.length, self.etag = url, length, etag
+            if self._fh is None:
+                self._fh = open(self.part_path, "r+b")
+            self.save()
+            return self.done_bytes
+
+    # -------- 数据 --------
+    def covered_prefix(self, start: int, end: int) -> int:
+        """从 start 开始连续已完成的字节数（不超过 end）"""
+        for r_start, r_end in self.completed:
+            if r_start <= start <= r_end:
+                return min(r_end, end) - start + 1
+        return 0
+
+    def read(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            assert self._fh is not None
+            self._fh.seek(offset)
+            return self._fh.read(size)
+
+    def write(self, offset: int, data: bytes | bytearray | memoryview) -> None:
+        with self._lock:
+            assert self._fh is not None
+            self._fh.seek(offset)
+            self._fh.write(data)
+
+    def mark_done(self, start: int, end: int) -> None:
+        """记录已写入的区间并落盘清单（数据先于清单刷新到磁盘）"""
+        with self._lock:
+            assert self._fh is not None
+            self._fh.flush()
+            self.completed = _merge([*self.completed, [start, end]])
+            self.save()
+
+    # -------- 生命周期 --------
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def discard(self) -> None:
+        """下载并转码完成后删除数据与清单"""
+        self.close()
+        self.part_path.unlink(missing_ok=True)
+        self.manifest_path.unlink(missing_ok=True)
+
+
+def purge_stale_partials(max_age_s: float = STALE_AFTER_S) -> None:
+    """清理长期未更新的未完成下载（每个进程只执行一次）"""
+    global _purged
+    if _purged:
+        return
+    _purged = True
+    if not PARTIAL_DIR.exists():
+        return
+    deadline = time.time() - max_age_s
+    for fp in PARTIAL_DIR.iterdir():
+        try:
+            if fp.stat().st_mtime < deadline:
+                fp.unlink(missing_ok=True)
+                logger.debug(f"已清理过期的未完成下载: {fp.name}")
+        except OSError:
+            continue
+
+
+def open_partial(key: str) -> PartialFile:
+    purge_stale_partials()
+    return PartialFile(key)
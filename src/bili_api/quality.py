@@ -0,0 +1,74 @@
+"""下载音质预设
+
+同一个预设同时决定两件事，保证下载的源与输出的编码相匹配：
+- 从 playurl 返回的 DASH 音频流中选择哪一条（不为了转成低码率文件而下载高码率的源）
+- 转码为有损格式（mp3 / ogg）时的编码码率
+
+预设（cfg.download_quality）：
+- best：最高音质的源，320 kbps 输出
+- balanced：192 kbps 输出
+- data_saver：96 kbps 输出，省流量、省空间
+- target：按 cfg.download_target_kbps 输出
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+from bilibili_api import video
+
+from src.config import cfg
+
+# DASH 音频流的标称码率（kbps）；杜比全景声 / Hi-Res 体积大且无法直接封装进 m4a，不参与选择
+AUDIO_KBPS = {
+    video.AudioQuality._64K: 64,
+    video.AudioQuality._132K: 132,
+    video.AudioQuality._192K: 192,
+}
+# 断点续传 / 原始流缓存的文件名中记录的音质名 -> 码率
+AUDIO_KBPS_BY_NAME = {quality.name: kbps for quality, kbps in AUDIO_KBPS.items()}
+# AAC 源与 MP3 / Vorbis 输出听感相当时，源的码率约为输出的 2/3
+AAC_RATIO = 2 / 3
+
+
+@dataclass(frozen=True)
+class QualityPreset:
+    name: str
+    # 源码率下限：选择不低于该值的最低码率流，没有时选最高的；None 为总是选最高码率
+    source_kbps: int | None
+    # 有损格式的编码码率；None 为 ffmpeg 默认
+    output_kbps: int | None
+
+    @classmethod
+    def for_output(cls, name: str, output_kbps: int) -> QualityPreset:
+        return cls(name, math.ceil(output_kbps * AAC_RATIO), output_kbps)
+
+    def pick_audio(self, streams: list):
+        """从 DASH 音频流中选择一条"""
+        ranked = sorted(streams, key=lambda s: AUDIO_KBPS.get(s.audio_quality, 0))
+        if self.source_kbps is not None:
+            for stream in ranked:
+                if AUDIO_KBPS.get(stream.audio_quality, 0) >= self.source_kbps:
+                    return stream
+        return ranked[-1]
+
+    def accepts(self, kbps: int) -> bool:
+        """已有的源（如缓存的原始流）是否满足预设：不低于源码率下限，下限高于最高档时要求最高档"""
+        top = max(AUDIO_KBPS.values())
+        return kbps >= min(self.source_kbps or top, top)
+
+
+PRESETS = {
+    "best": QualityPreset("best", None, 320),
+    "balanced": QualityPreset.for_output("balanced", 192),
+    "data_saver": QualityPreset.for_output("data_saver", 96),
+}
+
+
+def quality_preset() -> QualityPreset:
+    """当前配置的音质预设"""
+    name = cfg.download_quality.value
+    if name == "target":
+        return QualityPreset.for_output("target", max(32, int(cfg.download_target_kbps.value)))
+    return PRESETS.get(name, PRESETS["balanced"])
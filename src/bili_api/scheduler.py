@@ -0,0 +1,163 @@
+"""全局请求调度器
+
+所有 bilibili 接口请求都经由 scheduler.run(endpoint, factory) 发出：
+- 按 endpoint 限制并发（search / user / video / playurl ...）
+- 令牌桶限制整体请求速率，保证持续吞吐而不是瞬时爆发
+- 遇到 412 / -412 风控时按带抖动的指数退避重试，并进入全局冷却期，
+  冷却期间新请求会先等待，避免继续触发风控把应用锁死数分钟
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from bilibili_api.exceptions import NetworkException, ResponseCodeException
+from loguru import logger
+
+T = TypeVar("T")
+
+# 各类接口的并发上限；未列出的 endpoint 使用 default
+ENDPOINT_LIMITS: dict[str, int] = {
+    "search": 2,
+    "user": 2,
+    "video": 4,
+    "playurl": 3,
+    # 后台预取：单并发，让出配额给用户主动发起的请求
+    "prefetch": 1,
+    "default": 4,
+}
+
+_RISK_CONTROL_RE = re.compile(r"(?:错误代码[:：]\s*-?412\b|状态码[:：]\s*412\b|['\"]code['\"]\s*[:=]\s*-?412\b)")
+
+
+def is_risk_control_error(exc: BaseException) -> bool:
+    """是否为 bilibili 风控（HTTP 412 或接口 code -412）"""
+    if isinstance(exc, ResponseCodeException):
+        return exc.code in (-412, 412)
+    if isinstance(exc, NetworkException):
+        return exc.status == 412
+    return bool(_RISK_CONTROL_RE.search(str(exc)))
+
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒补充，最多积攒 capacity 个"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        *,
+        rate: float = 4.0,
+        burst: int = 6,
+        max_retries: int = 3,
+        base_backoff_s: float = 2.0,
+        max_backoff_s: float = 90.0,
+    ):
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._rate = rate
+        self._burst = burst
+        self._bucket: TokenBucket | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._cooldown_until = 0.0
+        self._strikes = 0
+
+    def _get_bucket(self) -> TokenBucket:
+        if self._bucket is None:
+            self._bucket = TokenBucket(self._rate, self._burst)
+        return self._bucket
+
+    def _get_semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(endpoint)
+        if sem is None:
+            limit = ENDPOINT_LIMITS.get(endpoint, ENDPOINT_LIMITS["default"])
+            sem = self._semaphores[endpoint] = asyncio.Semaphore(limit)
+        return sem
+
+    def cooldown_remaining(self) -> float:
+        """风控冷却剩余秒数"""
+        return max(0.0, self._cooldown_until - time.monotonic())
+
+    async def _wait_cooldown(self) -> None:
+        while (remaining := self.cooldown_remaining()) > 0:
+            await asyncio.sleep(remaining)
+
+    def _on_risk_control(self, endpoint: str) -> float:
+        """记录一次风控并延长全局冷却期，返回本次退避时长"""
+        self._strikes += 1
+        backoff = min(self.max_backoff_s, self.base_backoff_s * 2 ** (self._strikes - 1))
+        # 抖动：避免多个请求在同一时刻集体重试
+        backoff *= random.uniform(0.5, 1.0)
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + backoff)
+        logger.warning(f"[{endpoint}] 触发风控（第 {self._strikes} 次），暂停新请求 {backoff:.1f}s")
+        return backoff
+
+    def _on_success(self) -> None:
+        if self._strikes:
+            self._strikes = max(0, self._strikes - 1)
+
+    async def run(
+        self,
+        endpoint: str,
+        factory: Callable[[], Awaitable[T]],
+        *,
+        retries: int | None = None,
+    ) -> T:
+        """在调度器限制下执行请求
+
+        Args:
+            endpoint: 接口类别，用于并发限制
+            factory: 每次调用都返回一个新的 awaitable（重试时会再次调用）
+            retries: 风控时的最大重试次数，默认使用 max_retries
+        """
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        while True:
+            await self._wait_cooldown()
+            async with self._get_semaphore(endpoint):
+                # 排队期间可能有其他请求触发了风控
+                await self._wait_cooldown()
+                await self._get_bucket().acquire()
+                try:
+                    result = await factory()
+                except Exception as e:
+                    if not is_risk_control_error(e):
+                        raise
+                    self._on_risk_control(endpoint)
+                    if attempt >= retries:
+                        raise
+                    attempt += 1
+                    continue
+            self._on_success()
+            return result
+
+
+# 全局唯一实例（运行在全局异步运行时的事件循环上）
+scheduler = RequestScheduler()
@@ -1,15 +1,18 @@
 import asyncio
 import re
+from collections.abc import AsyncIterator
 from datetime import datetime
 
 from bilibili_api.search import SearchObjectType, search_by_type
-from bilibili_api.video import Video
 from bs4 import BeautifulSoup
 from loguru import logger
 
 from src.config import VIDEO_DIR, cfg
 from src.core.song_list import SongList
-from .common import get_credential, apply_proxy_if_enabled
+from .common import apply_proxy_if_enabled
+from .metadata import metadata_store
+from .scheduler import is_risk_control_error, scheduler
+from .search_cache import search_cache
 
 
 _BVID_RE = re.compile(r"(BV[0-9A-Za-z]{10})", re.IGNORECASE)
@@ -32,16 +35,33 @@ def _extract_bvid(text: str) -> str | None:
     return "BV" + m.group(1)[2:]
 
 
+SEARCH_PAGE_SIZE = 10
+
+
 async def search_page(search_content: str, page: int) -> list[dict]:
+    keyword = f"neuro {search_content}"
+
+    # 先查本地响应缓存，命中则不发请求
+    cached = search_cache.get(keyword, page, SEARCH_PAGE_SIZE)
+    if cached is not None:
+        logger.info(f"搜索 {search_content} 第 {page} 页命中缓存，共 {len(cached)} 条结果")
+        return cached
+
     apply_proxy_if_enabled()
     try:
-        page_data = await search_by_type(
-            keyword=f"neuro {search_content}",
-            search_type=SearchObjectType.VIDEO,
-            page=page,
-            page_size=10,
+        page_data = await scheduler.run(
+            "search",
+            lambda: search_by_type(
+                keyword=keyword,
+                search_type=SearchObjectType.VIDEO,
+                page=page,
+                page_size=SEARCH_PAGE_SIZE,
+            ),
         )
-    except Exception:
+    except Exception as e:
+        # 风控需要上抛给 UI 提示，其他错误仅跳过该页
+        if is_risk_control_error(e):
+            raise
         logger.opt(exception=True).warning(f"搜索 {search_content} 第 {page} 页时发生错误")
         return []
 
@@ -53,37 +73,43 @@ async def search_page(search_content: str, page: int) -> list[dict]:
             "url": f"https://www.bilibili.com/video/{item['bvid']}/",
             "bv": item["bvid"],
         }
-        for item in page_data["result"]
+        for item in page_data.get("result") or []
     ]
     logger.info(f"搜索 {search_content} 第 {page} 页成功，找到 {len(result)} 条结果")
+    await asyncio.to_thread(search_cache.set, keyword, page, SEARCH_PAGE_SIZE, result)
     return result
 
 
+async def iter_search_pages(search_content: str) -> AsyncIterator[list[dict]]:
+    """并发请求所有搜索页，哪一页先返回就先产出该页的结果"""
+    tasks = [asyncio.ensure_future(search_page(search_content, page)) for page in range(1, cfg.search_page.value + 1)]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # 消费方提前退出时，取消尚未完成的页面请求
+        for task in tasks:
+            task.cancel()
+
+
+def save_search_results(songs: SongList) -> None:
+    """将搜索结果合并写入本地 search_data.json"""
+    if len(songs) == 0:
+        return
+    songs.append_list(SongList(VIDEO_DIR / "search_data.json"))
+    songs.unique_by_bv()
+    songs.save_list(VIDEO_DIR / "search_data.json")
+
+
 async def search_on_bilibili(search_content: str) -> None:
     songs = SongList()
 
     try:
-        results = await asyncio.gather(
-            *[search_page(search_content, page) for page in range(1, cfg.search_page.value + 1)],
-            return_exceptions=True,
-        )
-
-        first_exc: Exception | None = None
-        for data in results:
-            if isinstance(data, Exception):
-                if first_exc is None:
-                    first_exc = data
-                continue
+        async for data in iter_search_pages(search_content):
             for item in data:
                 songs.append_info(item)
 
-        # 如果全部页面都失败，则向上抛出，给 UI 展示网络错误
-        if len(songs.get_data()) == 0 and first_exc is not None:
-            raise first_exc
-
-        songs.append_list(SongList(VIDEO_DIR / "search_data.json"))
-        songs.unique_by_bv()
-        songs.save_list(VIDEO_DIR / "search_data.json")
+        await asyncio.to_thread(save_search_results, songs)
     except Exception as e:
         logger.opt(exception=True).error(f"搜索 {search_content} 失败: {e}")
         raise
@@ -99,19 +125,11 @@ async def search_bvid_on_bilibili(search_content: str) -> None:
             logger.warning(f"BV号格式不正确: {search_content}")
             return
 
-        v = Video(bvid=bvid, credential=get_credential())
-        info = await v.get_info()
-
-        pubdate = info.get("pubdate")
-        date_str = ""
-        if isinstance(pubdate, (int, float)) and pubdate > 0:
-            date_str = datetime.fromtimestamp(int(pubdate)).strftime("%Y-%m-%d %H:%M:%S")
-
-        owner = info.get("owner") or {}
+        meta = await metadata_store.get(bvid)
         item = {
-            "title": str(info.get("title", "")),
-            "author": str(owner.get("name", "")),
-            "date": date_str,
+            "title": meta.title,
+            "author": meta.owner_name,
+            "date": meta.date_str,
             "url": f"https://www.bilibili.com/video/{bvid}/",
             "bv": bvid,
         }
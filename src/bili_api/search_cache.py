@@ -0,0 +1,146 @@
+"""搜索响应缓存
+
+以 (规范化关键词, 页码, 每页数量) 为 key，把 bilibili 搜索接口的单页结果缓存到
+CACHE_DIR/search 下，每个 key 一个 JSON 文件：
+- TTL：超过 cfg.search_cache_ttl 秒的条目视为过期
+- LRU：命中时刷新文件 mtime，超过 cfg.search_cache_max_mb 时按 mtime 从旧到新淘汰
+- 进程内再叠一层 MemoryCache，重复查询无需读盘
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import CACHE_DIR, cfg
+from src.utils.memory_cache import MemoryCache
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_keyword(keyword: str) -> str:
+    """关键词规范化：去首尾空白、合并连续空白、转小写"""
+    return _WHITESPACE_RE.sub(" ", (keyword or "").strip()).lower()
+
+
+class SearchCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self._mem: MemoryCache[tuple[float, list[dict]]] = MemoryCache(maxsize=256)
+        self._evict_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(keyword: str, page: int, page_size: int) -> str:
+        raw = f"{normalize_keyword(keyword)}|{page}|{page_size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def _ttl() -> float:
+        return float(cfg.search_cache_ttl.value)
+
+    def get(self, keyword: str, page: int, page_size: int) -> list[dict] | None:
+        """读取未过期的缓存结果，未命中返回 None"""
+        ttl = self._ttl()
+        if ttl <= 0:
+            return None
+
+        key = self.make_key(keyword, page, page_size)
+        now = time.time()
+
+        cached = self._mem.get(key)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+
+        fp = self._path(key)
+        try:
+            payload = json.loads(fp.read_text(encoding="utf-8"))
+            fetched_at = float(payload["fetched_at"])
+            rows = payload["rows"]
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.opt(exception=True).debug(f"搜索缓存损坏，已忽略: {fp.name}")
+            fp.unlink(missing_ok=True)
+            return None
+
+        if now - fetched_at >= ttl:
+            fp.unlink(missing_ok=True)
+            return None
+
+        # LRU：刷新访问时间
+        try:
+            os.utime(fp, None)
+        except OSError:
+            pass
+        self._mem.set(key, (fetched_at, rows), ttl_s=ttl - (now - fetched_at))
+        return rows
+
+    def set(self, keyword: str, page: int, page_size: int, rows: list[dict]) -> None:
+        """写入一页搜索结果（原子替换），随后按容量上限淘汰"""
+        ttl = self._ttl()
+        if ttl <= 0:
+            return
+
+        key = self.make_key(keyword, page, page_size)
+        fetched_at = time.time()
+        payload = {
+            "keyword": normalize_keyword(keyword),
+            "page": page,
+            "page_size": page_size,
+            "fetched_at": fetched_at,
+            "rows": rows,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fp = self._path(key)
+            tmp = fp.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(fp)
+        except Exception:
+            logger.opt(exception=True).warning("写入搜索缓存失败")
+            return
+
+        self._mem.set(key, (fetched_at, rows), ttl_s=ttl)
+        self._evict()
+
+    def _evict(self) -> None:
+        max_bytes = int(cfg.search_cache_max_mb.value) * 1024 * 1024
+        with self._evict_lock:
+            try:
+                entries = []
+                total = 0
+                for fp in self.cache_dir.glob("*.json"):
+                    st = fp.stat()
+                    entries.append((st.st_mtime, st.st_size, fp))
+                    total += st.st_size
+                if total <= max_bytes:
+                    return
+
+                entries.sort()
+                for _, size, fp in entries:
+                    if total <= max_bytes:
+                        break
+                    fp.unlink(missing_ok=True)
+                    self._mem.invalidate(fp.stem)
+                    total -= size
+                logger.debug(f"搜索缓存已淘汰至 {total / 1024:.0f} KB")
+            except Exception:
+                logger.opt(exception=True).warning("搜索缓存淘汰失败")
+
+    def clear(self) -> None:
+        self._mem.clear()
+        for fp in self.cache_dir.glob("*.json"):
+            fp.unlink(missing_ok=True)
+
+
+search_cache = SearchCache(CACHE_DIR / "search")
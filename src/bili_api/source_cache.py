@@ -0,0 +1,127 @@
+"""原始音频流缓存
+
+下载完成的原始流（转码前的 m4s / flv / mp4）默认在转码后删除；开启 cfg.source_cache_enabled 后
+改为移入 CACHE_DIR/sources，文件名沿用断点续传缓存的 key（BV号_cid_音质.扩展名），
+即以 (BV 号, 分P, 音质) 区分。之后换格式重新下载、导出为其他格式都直接从缓存转码，只消耗 CPU 不消耗流量。
+
+- LRU：命中时刷新文件 mtime，超过 cfg.source_cache_max_mb 时按 mtime 从旧到新淘汰
+- 只使用满足当前音质预设的缓存（音质不低于预设选择的源，多份时取码率最接近的一份），
+  缓存的音质不够时由调用方重新取流下载，不会因为缓存而悄悄降低音质
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import CACHE_DIR, cfg
+
+from .partial import PartialFile
+from .quality import AUDIO_KBPS_BY_NAME, QualityPreset
+
+
+class SourceCache:
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self._evict_lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(cfg.source_cache_enabled.value)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def adopt(self, partial: PartialFile) -> Path | None:
+        """把下载完成的断点续传缓存移入流缓存；未开启缓存或数据不完整时返回 None（由调用方删除缓存）"""
+        if not self.enabled() or not partial.is_complete():
+            return None
+        partial.close()
+        fp = self._path(partial.key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(partial.part_path, fp)
+            # 移动保留的是最后写入的时间，这里按“刚使用过”处理
+            os.utime(fp, None)
+        except OSError:
+            logger.opt(exception=True).warning(f"写入原始流缓存失败: {partial.key}")
+            return None
+        partial.manifest_path.unlink(missing_ok=True)
+        logger.debug(f"已缓存原始流: {fp.name}")
+        self._evict(keep=fp)
+        return fp
+
+    def find(self, bvid: str, cid: int, preset: QualityPreset | None) -> Path | None:
+        """查找某个分P满足音质预设的原始流，未开启缓存或未命中时返回 None
+
+        DASH 音频流按文件名中的音质判断，取满足预设的最低一档（与 QualityPreset.pick_audio 一致），
+        preset 为 None 时不限音质、取最高一档；FLV / MP4 合流只在没有 DASH 流时下载，音质不受预设影响，直接使用。
+        """
+        if not self.enabled() or not self.cache_dir.exists():
+            return None
+        prefix = f"{bvid}_{cid}_"
+        audio: list[tuple[int, Path]] = []
+        muxed: list[tuple[int, Path]] = []
+        for fp in self.cache_dir.glob(f"{prefix}*"):
+            quality = fp.name[len(prefix) :].removesuffix(fp.suffix)
+            kbps = AUDIO_KBPS_BY_NAME.get(quality)
+            if kbps is not None:
+                if preset is None:
+                    audio.append((-kbps, fp))
+                elif preset.accepts(kbps):
+                    audio.append((kbps, fp))
+            elif fp.suffix in (".flv", ".mp4"):
+                try:
+                    muxed.append((fp.stat().st_size, fp))
+                except OSError:
+                    continue
+        if audio:
+            _, fp = min(audio)
+        elif muxed:
+            _, fp = max(muxed)
+        else:
+            return None
+        # LRU：刷新访问时间
+        try:
+            os.utime(fp, None)
+        except OSError:
+            pass
+        return fp
+
+    def _evict(self, keep: Path | None = None) -> None:
+        max_bytes = int(cfg.source_cache_max_mb.value) * 1024 * 1024
+        with self._evict_lock:
+            try:
+                entries = []
+                total = 0
+                for fp in self.cache_dir.iterdir():
+                    st = fp.stat()
+                    entries.append((st.st_mtime, st.st_size, fp))
+                    total += st.st_size
+                if total <= max_bytes:
+                    return
+
+                entries.sort()
+                for _, size, fp in entries:
+                    if total <= max_bytes:
+                        break
+                    if fp == keep:
+                        continue
+                    fp.unlink(missing_ok=True)
+                    total -= size
+                    logger.debug(f"已淘汰原始流缓存: {fp.name}")
+                logger.debug(f"原始流缓存已淘汰至 {total / 1024 / 1024:.0f} MB")
+            except Exception:
+                logger.opt(exception=True).warning("原始流缓存淘汰失败")
+
+    def clear(self) -> None:
+        if not self.cache_dir.exists():
+            return
+        for fp in self.cache_dir.iterdir():
+            fp.unlink(missing_ok=True)
+
+
+source_cache = SourceCache(CACHE_DIR / "sources")
@@ -0,0 +1,124 @@
+"""下载文件的来源标签
+
+转码时由 ffmpeg 在同一次调用中写入标签（mp3 为 ID3，ogg 为 Vorbis Comment，m4a 为 iTunes 标签）：
+- 标题、作者（UP 主）、投稿日期
+- 注释：视频地址 https://www.bilibili.com/video/<BV号>?p=<分P>
+- 自定义标签 BVID / BILIBILI_PAGE（mp3 / ogg）
+- 封面（mp3 / m4a 内嵌；封面文件同时保存在 CACHE_DIR/covers/<文件名>.jpg，其他格式也能直接使用）
+
+之后根据文件查找来源视频时直接读取标签，不必按标题在全部视频数据中模糊匹配。
+wav 只写入 INFO 块中的标准字段，mutagen 读不到，来源以曲库索引（src/core/library_index.py）为准。
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+from mutagen._file import File
+from mutagen.id3 import ID3
+from mutagen.mp4 import MP4Tags
+
+from src.config import CACHE_DIR
+
+from .metadata import VideoMeta
+
+# 与 src/utils/cover.py 使用的封面缓存目录一致
+COVER_DIR = CACHE_DIR / "covers"
+TAG_BVID = "BVID"
+TAG_PAGE = "BILIBILI_PAGE"
+# 可内嵌封面的输出格式
+COVER_SUFFIXES = {".mp3", ".m4a"}
+# 写入自定义来源字段的输出格式（mp4 封装只写标准字段，wav 的 INFO 块不支持自定义字段）
+SOURCE_FIELD_SUFFIXES = {".mp3", ".ogg"}
+
+_SOURCE_URL_RE = re.compile(r"bilibili\.com/video/(BV[0-9A-Za-z]{10})(?:\?p=(\d+))?")
+
+
+def source_url(bvid: str, page: int) -> str:
+    return f"https://www.bilibili.com/video/{bvid}?p={page}"
+
+
+@dataclass
+class SourceTags:
+    """写入下载文件的来源信息"""
+
+    bvid: str
+    page: int
+    title: str
+    artist: str = ""
+    date: str = ""
+    cover: Path | None = None
+
+    @classmethod
+    def from_meta(cls, meta: VideoMeta, page: int, cover: Path | None = None) -> SourceTags:
+        title = meta.title or meta.bvid
+        video_page = meta.get_page(page)
+        if len(meta.pages) > 1 and video_page is not None and video_page.part:
+            title = f"{title} - {video_page.part}"
+        date = time.strftime("%Y-%m-%d", time.localtime(meta.pubdate)) if meta.pubdate else ""
+        return cls(meta.bvid, page, title, meta.owner_name, date, cover)
+
+    def ffmpeg_args(self, output_file: Path) -> list[str]:
+        """写入标签的 ffmpeg 输出参数"""
+        suffix = output_file.suffix.lower()
+        fields = {
+            "title": self.title,
+            "artist": self.artist,
+            "date": self.date,
+            "comment": source_url(self.bvid, self.page),
+        }
+        if suffix in SOURCE_FIELD_SUFFIXES:
+            fields[TAG_BVID] = self.bvid
+            fields[TAG_PAGE] = str(self.page)
+        args: list[str] = []
+        for key, value in fields.items():
+            if value:
+                args += ["-metadata", f"{key}={value}"]
+        if suffix == ".mp3":
+            # ID3v2.3 的兼容性最好（Windows 资源管理器等不识别 v2.4）
+            args += ["-id3v2_version", "3"]
+        return args
+
+
+def _texts(values) -> list[str]:
+    texts: list[str] = []
+    for value in values or []:
+        texts += [str(v) for v in getattr(value, "text", [value])]
+    return texts
+
+
+def read_source(audio_path: Path) -> tuple[str, int] | None:
+    """读取文件标签中的来源 (BV 号, 分P)；没有来源标签时返回 None"""
+    try:
+        audio = File(str(audio_path))
+    except Exception:
+        logger.opt(exception=True).debug(f"读取标签失败: {audio_path}")
+        return None
+    tags = getattr(audio, "tags", None)
+    if not tags:
+        return None
+
+    if isinstance(tags, ID3):
+        # 自定义字段在 TXXX:<名称> 中
+        bvids = _texts(tags.getall(f"TXXX:{TAG_BVID}"))
+        pages = _texts(tags.getall(f"TXXX:{TAG_PAGE}"))
+        comments = _texts(tags.getall("COMM"))
+    elif isinstance(tags, MP4Tags):
+        bvids, pages, comments = [], [], _texts(tags.get("©cmt"))
+    else:
+        # Vorbis Comment 的字段名不区分大小写
+        bvids, pages, comments = _texts(tags.get(TAG_BVID)), _texts(tags.get(TAG_PAGE)), _texts(tags.get("comment"))
+
+    if bvids:
+        try:
+            return bvids[0], int(pages[0]) if pages else 1
+        except ValueError:
+            return bvids[0], 1
+    for comment in comments:
+        if match := _SOURCE_URL_RE.search(comment):
+            return match.group(1), int(match.group(2) or 1)
+    return None
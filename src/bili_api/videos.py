@@ -1,36 +1,29 @@
 import asyncio
-import threading
-from datetime import datetime
 from typing import cast
 
-import requests
-from bilibili_api import sync
 from bilibili_api.user import User
 from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
-from src.config import VIDEO_DIR, cfg, USER_AGENT
+from src.config import VIDEO_DIR, cfg
 from src.core.song_list import SongList
 from src.core.data_io import load_extend
+from src.utils.async_runtime import run_sync
 from src.utils.text import contain_text
 
 from .common import get_credential, apply_proxy_if_enabled
+from .crawler import crawl_all_up_videos
+from .http_client import http_get
+from .metadata import metadata_store
+from .scheduler import scheduler
 
 remove_urls_index = []
 
 
 def resolve_url_to_info(url, words_set=None):
     """解析视频url并转换为详细信息(title,author,date)"""
-    apply_proxy_if_enabled()
     try:
-        proxies = {}
-        if cfg.enable_proxy.value:
-            proxies = {
-                "http": cfg.proxy_url.value,
-                "https": cfg.proxy_url.value,
-            }
-        headers = {"User-Agent": USER_AGENT}
-        response = requests.get(url, headers=headers, proxies=proxies)
+        response = http_get(url)
         soup = BeautifulSoup(response.text, "lxml")
         if not (h1 := soup.find("h1", class_="video-title special-text-indent")):
             return
@@ -64,75 +57,89 @@ def resolve_url_to_info(url, words_set=None):
         return None
 
 
-async def get_user_videos(user_id: int, words_set: list[str] | None = None, page: int = 1):
-    """获取指定用户的视频信息"""
-    apply_proxy_if_enabled()
-    user = User(user_id, credential=get_credential())
-    info = await user.get_user_info()
-
-    data = await user.get_videos(pn=page)
+def _is_stale_info(song_info: dict) -> bool:
+    """扩展包条目是否缺失关键信息（需要重新解析）"""
+    return any(str(song_info.get(k) or "Unknown") == "Unknown" for k in ("title", "author", "date"))
 
-    videos = SongList()
-    for item in data["list"]["vlist"]:
-        if words_set is not None and not contain_text(words_set, item["title"]):
-            continue
 
+async def fetch_video_info(bvid: str) -> dict | None:
+    """通过 API 获取单个视频的 title/author/date，失败时回退为解析视频网页"""
+    song_url = f"https://www.bilibili.com/video/{bvid}/"
+    try:
+        meta = await metadata_store.get(bvid)
         song_info = {
-            "title": item["title"],
-            "author": item["author"],
-            "date": datetime.fromtimestamp(item["created"]).strftime("%Y-%m-%d %H:%M:%S"),
-            "url": f"https://www.bilibili.com/video/{item['bvid']}/",
-            "bv": item["bvid"],
+            "title": meta.title,
+            "author": meta.owner_name or "Unknown",
+            "date": meta.date_str or "Unknown",
         }
-        videos.append_info(song_info)
+    except Exception:
+        logger.opt(exception=True).debug(f"API 获取视频信息失败，回退到网页解析: {bvid}")
+        song_info = await asyncio.to_thread(resolve_url_to_info, song_url)
+        if song_info is None:
+            return None
+
+    song_info["url"] = song_url
+    song_info["bv"] = bvid
+    return song_info
+
 
-    file_path = VIDEO_DIR / f"{user_id}_data.json"
+async def update_extend_video_data(bv_list: list[str]) -> None:
+    """增量解析扩展包内的视频：只请求新增或信息不完整的 BV，最后一次性写回"""
+    file_path = VIDEO_DIR / "extend_video_data.json"
     old_data = SongList(file_path)
-    videos.append_list(old_data)
-    logger.info(f"{info['name']}({user_id}) 作者歌回记录数量从 {len(old_data)} 更新到 {len(videos)} ")
-    videos.save_list(file_path)
+    known = {item["bv"]: item for item in old_data.get_data() if item.get("bv")}
+
+    wanted = list(dict.fromkeys(bv_list))
+    todo = [bv for bv in wanted if bv not in known or _is_stale_info(known[bv])]
+    logger.info(f"扩展包共 {len(wanted)} 个视频，需要解析 {len(todo)} 个")
+
+    # 并发度由调度器的 video 通道限制
+    results = await asyncio.gather(*[fetch_video_info(bv) for bv in todo], return_exceptions=True)
+    for bv, song_info in zip(todo, results):
+        if isinstance(song_info, BaseException):
+            logger.opt(exception=song_info).warning(f"解析扩展包视频失败: {bv}")
+        elif song_info is not None:
+            known[bv] = song_info
+
+    song_list = SongList()
+    for bv in wanted:
+        if bv in known:
+            song_list.append_info(known[bv])
+
+    # 没有新增且条目未变化时不重写文件
+    if todo or len(song_list) != len(old_data):
+        song_list.save_list(file_path)
 
 
 def create_video_list_file() -> None:
-    """获得视频列表文件(多线程)"""
+    """获得视频列表文件（UP 主视频与扩展包在共享事件循环上并发获取）"""
     # UP主列表 和 爬取视频需包含词
     up_list = cfg.up_list.value
     words_set = ["合唱", "歌回", "金曲"]
     bv_list = []
 
-    async def fetch_all():
-        await asyncio.gather(*[get_user_videos(up, words_set) for up in up_list])
-
-    # 爬取程序内建的up主近期视频
-    thread = threading.Thread(target=sync, args=(fetch_all(),))
-    thread.start()
-
     # 获取扩展包数据
     extend_data = load_extend(VIDEO_DIR)
     if extend_data is not None:
         bv_list.extend(extend_data["bv"])
-    song_list = SongList()
 
-    for bv in bv_list:
-        song_url = f"https://www.bilibili.com/video/{bv}/"
-        song_info = resolve_url_to_info(song_url)
-        if song_info is not None:
-            song_info["url"] = song_url
-            song_info["bv"] = bv
-            song_list.append_info(song_info)
-
-    song_list.unique_by_bv()
-    # 将所有扩展包内视频爬取的信息写入文件
-    if song_list is not None:
-        song_list.save_list(VIDEO_DIR / "extend_video_data.json")
+    async def fetch_all():
+        results = await asyncio.gather(
+            crawl_all_up_videos(up_list, words_set),
+            update_extend_video_data(bv_list),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.opt(exception=result).error("获取视频列表失败")
 
-    thread.join()
+    run_sync(fetch_all())
 
 
 def get_up_name(user_id: int) -> str:
     apply_proxy_if_enabled()
     try:
-        res = sync(User(user_id, credential=get_credential()).get_user_info())
+        res = run_sync(scheduler.run("user", User(user_id, credential=get_credential()).get_user_info))
         return res["name"]
     except Exception:
         logger.exception(f"获取UP主 {user_id} 名称失败")
@@ -146,7 +153,7 @@ def get_up_names(user_ids: list[int]) -> dict[int, str]:
 
     async def task(user_id: int):
         try:
-            res = await User(user_id, credential=get_credential()).get_user_info()
+            res = await scheduler.run("user", User(user_id, credential=get_credential()).get_user_info)
             up_names[user_id] = res["name"]
         except Exception:
             logger.exception(f"获取UP主 {user_id} 名称失败")
@@ -155,5 +162,5 @@ def get_up_names(user_ids: list[int]) -> dict[int, str]:
     async def fetch_all():
         await asyncio.gather(*[task(user_id) for user_id in user_ids])
 
-    sync(fetch_all())
+    run_sync(fetch_all())
     return up_names
@@ -68,8 +68,27 @@ class Config(QConfig):
         "Download",
         "Type",
         "mp3",
-        OptionsValidator(["mp3", "ogg", "wav"]),
+        OptionsValidator(["mp3", "ogg", "wav", "m4a"]),
     )
+    # 音质预设：同时决定下载哪条音频流与有损格式的编码码率（见 src/bili_api/quality.py）；target 时按 TargetKbps 输出
+    download_quality = OptionsConfigItem(
+        "Download",
+        "Quality",
+        "balanced",
+        OptionsValidator(["best", "balanced", "data_saver", "target"]),
+    )
+    download_target_kbps = ConfigItem("Download", "TargetKbps", 128)
+    # 边下载边转码（数据经管道直接送入 ffmpeg，不落临时文件）
+    stream_transcode = ConfigItem("Download", "StreamTranscode", True, BoolValidator())
+    # 单个文件分段下载的最大连接数
+    download_max_connections = ConfigItem("Download", "MaxConnections", 4)
+    # 下载队列同时下载的任务数：自动调节时在 [MinSlots, MaxSlots] 内增减，关闭自动调节时固定为 MaxSlots
+    download_auto_slots = ConfigItem("Download", "AutoSlots", True, BoolValidator())
+    download_min_slots = ConfigItem("Download", "MinSlots", 1)
+    download_max_slots = ConfigItem("Download", "MaxSlots", 6)
+    # 原始音频流缓存：转码后保留原始流，换格式 / 导出时无需重新下载；容量上限（MB），超出后按 LRU 淘汰
+    source_cache_enabled = ConfigItem("Download", "SourceCache", False, BoolValidator())
+    source_cache_max_mb = ConfigItem("Download", "SourceCacheMaxMB", 1024)
     language = ConfigItem("Language", "Language", "zh_CN")
     volume = ConfigItem("Player", "Volume", 50)
     enable_player_bar = ConfigItem("Player", "EnablePlayerBar", True)
@@ -80,6 +99,11 @@ class Config(QConfig):
     filter_list = ConfigItem("Search", "FilterWords", _DEFAULT_FILTER_WORDS.copy())
     # 是否启用搜索结果过滤（默认启用）
     enable_filter = ConfigItem("Search", "EnableFilter", True)
+    # 搜索响应缓存：有效期（秒，0 为禁用）与磁盘容量上限（MB）
+    search_cache_ttl = ConfigItem("Search", "CacheTTL", 6 * 3600)
+    search_cache_max_mb = ConfigItem("Search", "CacheMaxMB", 16)
+    # UP 主历史投稿回填：每次获取列表时每个 UP 主最多推进的页数（0 为不回填）
+    crawl_backfill_pages = ConfigItem("Search", "BackfillPagesPerRun", 5)
 
     # 是否最小化到托盘
     minimize_to_tray = ConfigItem("Appearance", "MinimizeToTray", False)
@@ -120,6 +144,8 @@ class Config(QConfig):
     # 代理设置
     enable_proxy = ConfigItem("Network", "EnableProxy", False, BoolValidator())
     proxy_url = ConfigItem("Network", "ProxyUrl", "http://127.0.0.1:7890")
+    # 接口地址重定向（离线替身服务器 / 基准测试用），留空表示直连 bilibili
+    api_base_override = ConfigItem("Network", "ApiBaseOverride", "")
 
     def __init__(self, path: Path):
         # 指定配置文件路径
@@ -0,0 +1,175 @@
+"""自定义 BV 列表导入
+
+读取 custom_songs 下的 txt（每行一个 BV 号），通过下载队列批量下载：
+- 曲库索引中已有的视频直接跳过；索引之前下载的文件先按来源标签补录，没有标签时按标题对应的文件判断
+- 元数据按批并发获取（经由请求调度器限流），不再逐个请求
+- 下载由下载队列完成，并发数由队列自动调节
+- 以异步生成器的形式逐步产出进度，最后产出结果
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from loguru import logger
+
+from src.bili_api.metadata import metadata_store
+from src.bili_api.tags import read_source
+from src.config import CUSTOM_SANG_DIR, MUSIC_DIR, cfg
+from src.core.download_queue import DownloadQueueManager, DownloadStatus, DownloadTask
+from src.core.library_index import library_index
+from src.utils.text import fix_filename
+
+# 每批获取元数据的视频数
+METADATA_BATCH = 50
+# 等待下载完成时检查进度的间隔（秒）
+POLL_INTERVAL_S = 1.0
+
+_BV_RE = re.compile(r"^BV[0-9A-Za-z]+$", re.IGNORECASE)
+
+
+def read_custom_bvids(base_dir: Path) -> list[str]:
+    """读取目录下所有 txt 中的 BV 号（去重，按出现顺序）"""
+    bvids: dict[str, None] = {}
+    for fp in sorted(base_dir.iterdir()):
+        if not fp.is_file() or fp.suffix.lower() != ".txt":
+            continue
+        try:
+            for line in fp.read_text(encoding="utf-8").splitlines():
+                s = line.strip()
+                if not s or s.startswith("#"):
+                    continue
+                # 仅接受 BV，其他跳过
+                if _BV_RE.match(s):
+                    # 统一大小写
+                    bvids["BV" + s[2:]] = None
+                else:
+                    logger.debug(f"跳过无效行: {s}")
+        except UnicodeDecodeError:
+            logger.info(f"跳过非 UTF-8 文本文件: {fp}")
+        except Exception:
+            logger.exception(f"读取文件失败: {fp}")
+    return list(bvids)
+
+
+def _output_file(title: str, bvid: str, file_type: str, taken: set[Path]) -> tuple[Path, bool]:
+    """按标题生成文件名，返回 (文件, 是否已下载过)
+
+    标题对应的文件已存在且来源是同一个视频（或没有来源信息）时视为已下载过；
+    来源是其他视频，或与本批其他任务重名时附加 BV 号。
+    """
+    safe_title = fix_filename(title).replace(" ", "").replace("_", "", 1)
+    output_file = MUSIC_DIR / f"{safe_title}.{file_type}"
+    if output_file not in taken and output_file.exists():
+        source = read_source(output_file) or library_index.find_file(output_file)
+        if source is None or source == (bvid, 1):
+            library_index.add(bvid, 1, output_file)
+            return output_file, True
+    if output_file in taken or output_file.exists():
+        output_file = MUSIC_DIR / f"{safe_title}_{bvid}.{file_type}"
+    taken.add(output_file)
+    return output_file, False
+
+
+async def import_custom_songs(
+    queue: DownloadQueueManager,
+    directory: Path | None = None,
+    file_type: str | None = None,
+) -> AsyncIterator[dict]:
+    """把自定义 BV 列表加入下载队列并跟踪进度
+
+    产出的字典：
+        {"status": "progress", "stage": "metadata" | "download", "data": {...}}：进度（可能有多次）
+        {"status": "success" | "paused" | "error" | "created_dir" | "no_bv", "message": ..., "data": {...}}：最终结果
+        （有任务被暂停时结果为 paused，恢复后由下载队列继续完成）
+    """
+    base_dir = Path(directory or CUSTOM_SANG_DIR)
+    if not base_dir.exists():
+        base_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"已创建 custom_songs 目录: {base_dir}")
+        yield {
+            "status": "created_dir",
+            "message": f"已创建 {base_dir}，请放入包含 BV 的 txt 文件后重试",
+            "path": str(base_dir),
+        }
+        return
+
+    bvids = await asyncio.to_thread(read_custom_bvids, base_dir)
+    if not bvids:
+        yield {"status": "no_bv", "message": "未在任何 txt 中找到有效 BV 号"}
+        return
+
+    fmt: str = file_type or cfg.download_type.value
+    await asyncio.to_thread(library_index.seed, read_source)
+    missing = {bvid for bvid, _ in await asyncio.to_thread(library_index.missing, [(b, 1) for b in bvids])}
+    skipped = len(bvids) - len(missing)
+    todo = [b for b in bvids if b in missing]
+    logger.info(f"自定义列表: 共 {len(bvids)} 个 BV，曲库中已有 {skipped} 个")
+
+    # 分批获取元数据，每批结束后报告一次进度
+    tasks: list[DownloadTask] = []
+    failed: list[str] = []
+    taken: set[Path] = set()
+    for i in range(0, len(todo), METADATA_BATCH):
+        batch = todo[i : i + METADATA_BATCH]
+        metas = await metadata_store.get_many(batch)
+        for bvid in batch:
+            meta = metas.get(bvid)
+            if meta is None:
+                failed.append(bvid)
+                continue
+            output_file, exists = await asyncio.to_thread(_output_file, meta.title or bvid, bvid, fmt, taken)
+            if exists:
+                skipped += 1
+                continue
+            tasks.append(DownloadTask(meta.title or bvid, bvid, fmt, output_file))
+        yield {
+            "status": "progress",
+            "stage": "metadata",
+            "data": {"current": min(i + METADATA_BATCH, len(todo)), "total": len(todo)},
+        }
+
+    added, duplicates = queue.add_tasks(tasks)
+    if not queue.is_running:
+        queue.start()
+
+    # 跟踪加入的任务直到全部结束（已在队列中的重复任务也一并跟踪）
+    keys = [task.key for task in tasks]
+    last = None
+    while True:
+        states = queue.get_task_states(keys)
+        counts = {"success": 0, "failed": len(failed), "paused": 0, "cancelled": 0, "remaining": 0}
+        gone = [key for key, status in states.items() if status is None]
+        if gone:
+            # 不在队列中的任务：已完成但被移出历史记录的算成功，其余是被取消的
+            cancelled = len(await asyncio.to_thread(library_index.missing, gone))
+            counts["success"] += len(gone) - cancelled
+            counts["cancelled"] += cancelled
+        for status in states.values():
+            if status is None:
+                continue
+            if status is DownloadStatus.SUCCESS:
+                counts["success"] += 1
+            elif status is DownloadStatus.FAILED:
+                counts["failed"] += 1
+            elif status is DownloadStatus.PAUSED:
+                counts["paused"] += 1
+            else:
+                counts["remaining"] += 1
+        if counts != last:
+            last = counts
+            if counts["remaining"]:
+                yield {"status": "progress", "stage": "download", "data": {**counts, "skipped": skipped}}
+        if not counts["remaining"]:
+            break
+        await asyncio.sleep(POLL_INTERVAL_S)
+
+    logger.info(f"自定义列表导入结束: {counts}，跳过 {skipped}（加入 {added}，队列中已有 {duplicates}）")
+    data = {"success": counts["success"], "failed": counts["failed"], "paused": counts["paused"], "skipped": skipped}
+    if counts["paused"]:
+        yield {"status": "paused", "message": "部分任务已暂停，可在下载队列中继续", "data": data}
+    else:
+        yield {"status": "success", "message": "下载完成", "data": data}
@@ -0,0 +1,130 @@
+"""下载队列日志
+
+以追加写入的 JSONL 记录下载任务的每次变化，应用关闭或崩溃后重新启动时回放，恢复等待中、已暂停与失败的任务：
+- {"op": "add", "task": {...}}：加入任务（任务以 bvid + 分P 标识，不依赖搜索结果的行号）
+- {"op": "state", "key": [bvid, part], "status": ..., "error": ..., "fields": {...}}：状态或其他字段（优先级等）变化
+- {"op": "remove", "keys": [[bvid, part], ...]}：移除任务
+
+日志行数远多于存活任务时压缩：只写入仍需恢复的任务后原子替换文件。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+# 追加的行数超过 max(COMPACT_MIN_LINES, 存活任务数 * COMPACT_FACTOR) 时压缩
+COMPACT_MIN_LINES = 2000
+COMPACT_FACTOR = 4
+
+
+class QueueJournal:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = None
+        self._lines = 0
+
+    # -------- 回放 --------
+    def replay(self) -> list[dict[str, Any]]:
+        """读取日志，返回每个任务的最终记录（按加入顺序），记录中 status / error_msg 为最后一次的状态"""
+        tasks: dict[tuple[str, int], dict[str, Any]] = {}
+        lines = 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        self._apply(tasks, entry)
+                    except (ValueError, KeyError, TypeError):
+                        # 崩溃时最后一行可能只写了一半
+                        logger.warning(f"跳过无法解析的下载队列日志: {line[:80]!r}")
+        except FileNotFoundError:
+            pass
+        self._lines = lines
+        return list(tasks.values())
+
+    @staticmethod
+    def _apply(tasks: dict[tuple[str, int], dict[str, Any]], entry: dict[str, Any]) -> None:
+        op = entry["op"]
+        if op == "add":
+            record = dict(entry["task"])
+            tasks[(record["bvid"], record.get("part", 1))] = record
+        elif op == "state":
+            record = tasks.get(tuple(entry["key"]))
+            if record is not None:
+                record["status"] = entry["status"]
+                record["error_msg"] = entry.get("error", "")
+                record.update(entry.get("fields", {}))
+        elif op == "remove":
+            for key in entry["keys"]:
+                tasks.pop(tuple(key), None)
+
+    # -------- 追加 --------
+    def _append(self, entries: Iterable[dict[str, Any]]) -> None:
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        if not data:
+            return
+        with self._lock:
+            try:
+                if self._fh is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fh = open(self.path, "a", encoding="utf-8")
+                self._fh.write(data)
+                self._fh.flush()
+                self._lines += data.count("\n")
+            except OSError:
+                logger.exception(f"写入下载队列日志失败: {self.path}")
+
+    def record_add(self, records: Iterable[dict[str, Any]]) -> None:
+        self._append({"op": "add", "task": r} for r in records)
+
+    def record_state(self, bvid: str, part: int, status: str, error: str = "", **fields: Any) -> None:
+        entry: dict[str, Any] = {"op": "state", "key": [bvid, part], "status": status}
+        if error:
+            entry["error"] = error
+        if fields:
+            entry["fields"] = fields
+        self._append([entry])
+
+    def record_remove(self, keys: Iterable[tuple[str, int]]) -> None:
+        rows = [list(k) for k in keys]
+        if rows:
+            self._append([{"op": "remove", "keys": rows}])
+
+    # -------- 压缩 --------
+    def needs_compaction(self, live: int) -> bool:
+        return self._lines > max(COMPACT_MIN_LINES, live * COMPACT_FACTOR)
+
+    def compact(self, records: Iterable[dict[str, Any]]) -> None:
+        """用存活任务的快照替换整个日志"""
+        data = "".join(json.dumps({"op": "add", "task": r}, ensure_ascii=False) + "\n" for r in records)
+        with self._lock:
+            try:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                tmp.replace(self.path)
+                self._lines = data.count("\n")
+                logger.debug(f"下载队列日志已压缩: {self._lines} 行")
+            except OSError:
+                logger.exception(f"压缩下载队列日志失败: {self.path}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
@@ -1,19 +1,50 @@
 """下载队列管理器
 
 支持多个音频同时下载,管理下载任务队列。
+
+下载与转码分为两个阶段，在全局异步运行时上执行：网络下载不会因为慢速转码而占着并发名额，
+转码也不必等待网络，二者同时保持忙碌。
+
+每个进行中的任务是一个独立的 asyncio 任务，暂停 / 取消时直接取消它：下载在下一次读取数据时停止，
+ffmpeg 进程被结束，名额立即空出。等待中的任务按优先级排序。
+
+同时下载的任务数由 ConcurrencyTuner 根据吞吐量与失败 / 风控情况自动增减。
+
+任务变化写入 QueueJournal，重新启动后恢复等待中、已暂停与失败的任务。
 """
 
-from dataclasses import dataclass
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path
-from queue import Queue
-from threading import Lock, Thread, current_thread
+from threading import Lock
 
 from loguru import logger
 from PyQt6.QtCore import QObject, pyqtSignal
 
-from src.bili_api import run_music_download
-from src.core.song_list import SongList
+from src.bili_api.common import apply_proxy_if_enabled
+from src.bili_api.music import cached_source, fetch_resolved, resolve_stream, source_tags, transcode_fetched
+from src.bili_api.partial import PartialFile
+from src.bili_api.scheduler import is_risk_control_error, scheduler
+from src.config import DATA_DIR, cfg
+from src.core.download_journal import QueueJournal
+from src.core.download_tuner import TUNE_INTERVAL_S, ConcurrencyTuner
+from src.core.library_index import library_index
+from src.utils.async_runtime import runtime
+
+QUEUE_JOURNAL_PATH = DATA_DIR / "download_queue.jsonl"
+# 进度信号的合并间隔（约 10 Hz）
+PROGRESS_INTERVAL_S = 0.1
+# 速率的指数平滑系数，越大越灵敏
+RATE_SMOOTHING = 0.3
+
+TaskKey = tuple[str, int]
 
 
 class DownloadStatus(Enum):
@@ -21,6 +52,8 @@ class DownloadStatus(Enum):
 
     PENDING = "pending"  # 等待中
     DOWNLOADING = "downloading"  # 下载中
+    TRANSCODING = "transcoding"  # 转码中
+    PAUSED = "paused"  # 已暂停
     SUCCESS = "success"  # 成功
     FAILED = "failed"  # 失败
 
@@ -29,14 +62,230 @@ class DownloadStatus(Enum):
 class DownloadTask:
     """下载任务"""
 
-    index: int  # 歌曲索引
     title: str  # 歌曲标题
     bvid: str  # BV号
-    search_list: SongList  # 搜索结果列表
     file_type: str  # 文件格式
     output_file: Path  # 输出文件路径
     status: DownloadStatus = DownloadStatus.PENDING  # 状态
     error_msg: str = ""  # 错误信息
+    part: int = 1  # 分P页码（从1开始）
+    priority: int = 0  # 优先级，越大越先下载
+    partial_key: str = ""  # 断点续传缓存的 key（开始下载后才知道），取消任务时据此删除缓存
+
+    @property
+    def key(self) -> TaskKey:
+        """任务唯一标识：同一视频的同一分P只会有一个任务"""
+        return self.bvid, self.part
+
+    def to_record(self) -> dict:
+        return {
+            "title": self.title,
+            "bvid": self.bvid,
+            "part": self.part,
+            "file_type": self.file_type,
+            "output_file": str(self.output_file),
+            "status": self.status.value,
+            "error_msg": self.error_msg,
+            "priority": self.priority,
+            "partial_key": self.partial_key,
+        }
+
+    @classmethod
+    def from_record(cls, data: dict) -> "DownloadTask":
+        """从日志记录恢复任务：失败 / 暂停的保持原状态，其余（含中断时进行中的）回到等待状态"""
+        status = DownloadStatus(data.get("status", DownloadStatus.PENDING.value))
+        if status not in (DownloadStatus.FAILED, DownloadStatus.PAUSED):
+            status = DownloadStatus.PENDING
+        return cls(
+            title=data.get("title") or data["bvid"],
+            bvid=data["bvid"],
+            file_type=data["file_type"],
+            output_file=Path(data["output_file"]),
+            status=status,
+            error_msg=data.get("error_msg", "") if status is DownloadStatus.FAILED else "",
+            part=int(data.get("part", 1)),
+            priority=int(data.get("priority", 0)),
+            partial_key=data.get("partial_key", ""),
+        )
+
+
+@dataclass
+class TaskProgress:
+    """单个任务的下载进度（progress_updated 信号发送的快照）"""
+
+    key: TaskKey
+    received: int = 0  # 已下载字节数（含断点续传已有的部分）
+    total: int | None = None  # 总字节数，未知时为 None
+    rate: float = 0.0  # 下载速率（字节/秒，平滑后）
+    eta_s: float | None = None  # 预计剩余秒数
+
+
+# 任务状态 -> 分组（下载中与转码中都算作进行中）
+_BUCKETS = {
+    DownloadStatus.PENDING: "pending",
+    DownloadStatus.DOWNLOADING: "active",
+    DownloadStatus.TRANSCODING: "active",
+    DownloadStatus.PAUSED: "paused",
+    DownloadStatus.SUCCESS: "completed",
+    DownloadStatus.FAILED: "failed",
+}
+# 已完成 / 失败记录的保留上限，超出时丢弃最早的记录
+HISTORY_LIMIT = 500
+
+
+class TaskRegistry:
+    """按 (bvid, 分P) 索引的任务表
+
+    每个分组是一个保持插入顺序的 dict，查重、状态切换都是 O(1)；
+    等待中的任务另有一个按 (优先级, 加入顺序) 排序的堆，取下一个任务与调整优先级都是 O(log n)
+    （堆中过期的条目延迟删除）。
+    已完成与失败的记录只保留最近 HISTORY_LIMIT 条，被丢弃的任务可以重新加入。
+    本身不加锁，由 DownloadQueueManager 持锁调用。
+    """
+
+    def __init__(self, history_limit: int = HISTORY_LIMIT):
+        self.history_limit = history_limit
+        self._tasks: dict[TaskKey, DownloadTask] = {}
+        self._buckets: dict[str, dict[TaskKey, DownloadTask]] = {name: {} for name in _BUCKETS.values()}
+        # 等待中任务的排序键 (-优先级, 序号)，与堆中条目不一致的即为过期条目
+        self._order: dict[TaskKey, tuple[int, int]] = {}
+        self._heap: list[tuple[int, int, TaskKey]] = []
+        self._seq = itertools.count()
+        self._front_seq = 0  # 放回队首的任务使用递减的负序号
+
+    def __contains__(self, key: TaskKey) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def get(self, key: TaskKey) -> DownloadTask | None:
+        return self._tasks.get(key)
+
+    # -------- 等待队列（优先级堆） --------
+    def _push_pending(self, task: DownloadTask, seq: int | None = None) -> None:
+        if seq is None:
+            seq = next(self._seq)
+        order = (-task.priority, seq)
+        self._order[task.key] = order
+        heapq.heappush(self._heap, (*order, task.key))
+        # 过期条目过多时重建堆
+        if len(self._heap) > 2 * len(self._order) + 64:
+            self._heap = [(*o, k) for k, o in self._order.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_pending(self) -> DownloadTask | None:
+        while self._heap:
+            prio, seq, key = self._heap[0]
+            if self._order.get(key) == (prio, seq):
+                return self._tasks[key]
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_pending(self) -> DownloadTask | None:
+        """取出优先级最高（同优先级中最早加入）的等待中任务并标记为下载中"""
+        task = self._peek_pending()
+        if task is not None:
+            self.transition(task, DownloadStatus.DOWNLOADING)
+        return task
+
+    def set_priority(self, task: DownloadTask, priority: int) -> None:
+        """调整优先级，等待中的任务在同优先级内保持原有顺序"""
+        task.priority = priority
+        if task.key in self._order:
+            self._push_pending(task, self._order[task.key][1])
+
+    def move_to_front(self, task: DownloadTask) -> None:
+        """把任务调到等待队列最前面（优先级提升到当前最高之上）"""
+        top = self._peek_pending()
+        if top is not None and top is not task:
+            self.set_priority(task, max(task.priority, top.priority + 1))
+
+    def requeue_front(self, tasks: Iterable[DownloadTask]) -> None:
+        """把任务放回等待队列（同优先级中排在最前，保持给定顺序）"""
+        tasks = list(tasks)
+        self._front_seq -= len(tasks)
+        for i, task in enumerate(tasks):
+            self._buckets[_BUCKETS[task.status]].pop(task.key, None)
+            task.status = DownloadStatus.PENDING
+            self._buckets["pending"][task.key] = task
+            self._push_pending(task, self._front_seq + i)
+
+    # -------- 通用 --------
+    def add(self, task: DownloadTask) -> bool:
+        """加入任务（按其当前状态分组），已存在时返回 False"""
+        if task.key in self._tasks:
+            return False
+        self._tasks[task.key] = task
+        bucket = _BUCKETS[task.status]
+        self._buckets[bucket][task.key] = task
+        if bucket == "pending":
+            self._push_pending(task)
+        self._trim(bucket)
+        return True
+
+    def transition(self, task: DownloadTask, status: DownloadStatus) -> None:
+        """切换任务状态，移动到新分组的末尾"""
+        old, new = _BUCKETS[task.status], _BUCKETS[status]
+        task.status = status
+        if old != new:
+            self._buckets[old].pop(task.key, None)
+            self._buckets[new][task.key] = task
+            if old == "pending":
+                self._order.pop(task.key, None)
+            if new == "pending":
+                self._push_pending(task)
+            self._trim(new)
+
+    def remove(self, task: DownloadTask) -> None:
+        self._tasks.pop(task.key, None)
+        self._buckets[_BUCKETS[task.status]].pop(task.key, None)
+        self._order.pop(task.key, None)
+
+    def clear(self, *buckets: str) -> int:
+        """清空指定分组，返回清除的任务数"""
+        count = 0
+        for name in buckets:
+            bucket = self._buckets[name]
+            for key in bucket:
+                del self._tasks[key]
+            count += len(bucket)
+            bucket.clear()
+            if name == "pending":
+                self._order.clear()
+                self._heap.clear()
+        return count
+
+    def _trim(self, bucket_name: str) -> None:
+        if bucket_name not in ("completed", "failed"):
+            return
+        bucket = self._buckets[bucket_name]
+        while len(bucket) > self.history_limit:
+            key = next(iter(bucket))
+            del bucket[key]
+            del self._tasks[key]
+
+    def count(self, bucket_name: str) -> int:
+        return len(self._buckets[bucket_name])
+
+    def counts(self) -> dict[str, int]:
+        return {name: len(bucket) for name, bucket in self._buckets.items()}
+
+    def snapshot(self, bucket_name: str, last: int | None = None) -> list[DownloadTask]:
+        """分组内任务的列表副本（等待中的按下载顺序；last 指定时只取最近的若干个）"""
+        bucket = self._buckets[bucket_name]
+        if bucket_name == "pending":
+            return sorted(bucket.values(), key=lambda t: self._order[t.key])
+        if last is None or last >= len(bucket):
+            return list(bucket.values())
+        # 从末尾反向取，不复制整个分组
+        tail = []
+        for task in reversed(bucket.values()):
+            if len(tail) >= last:
+                break
+            tail.append(task)
+        tail.reverse()
+        return tail
 
 
 class DownloadQueueManager(QObject):
@@ -47,24 +296,82 @@ class DownloadQueueManager(QObject):
     task_started = pyqtSignal(DownloadTask)  # 任务开始
     task_completed = pyqtSignal(DownloadTask)  # 任务完成
     task_failed = pyqtSignal(DownloadTask)  # 任务失败
+    task_updated = pyqtSignal(DownloadTask)  # 任务暂停 / 继续 / 优先级变化
+    task_cancelled = pyqtSignal(DownloadTask)  # 任务被取消（已从队列移除）
+    tasks_reset = pyqtSignal()  # 批量操作后任务列表整体变化
     queue_completed = pyqtSignal()  # 队列完成
-
-    def __init__(self, max_workers: int = 3):
+    progress_updated = pyqtSignal(list)  # 有变化的任务进度 list[TaskProgress]，最多每 PROGRESS_INTERVAL_S 一次
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        transcode_workers: int | None = None,
+        journal: QueueJournal | None = None,
+    ):
         """初始化下载队列管理器
 
         Args:
-            max_workers: 最大并发下载数
+            max_workers: 固定的并发下载数；为 None 时按配置自动调节（关闭自动调节时为 MaxSlots）
+            transcode_workers: 最大并发转码数，默认为 CPU 核数
+            journal: 任务日志，传入时回放日志恢复上次未完成的任务
         """
         super().__init__()
-        self.max_workers = max_workers
-        self.task_queue: Queue[DownloadTask] = Queue()
-        self.active_tasks: list[DownloadTask] = []
-        self.completed_tasks: list[DownloadTask] = []
-        self.failed_tasks: list[DownloadTask] = []
+        self.max_workers = max_workers or int(cfg.download_max_slots.value)
+        self.tuner = ConcurrencyTuner.from_config() if max_workers is None and cfg.download_auto_slots.value else None
+        self.transcode_workers = transcode_workers or os.cpu_count() or 2
+        self.registry = TaskRegistry()
         self.lock = Lock()
         self.is_running = False
-        self.worker_threads: list[Thread] = []
-        self.pending_tasks: list[DownloadTask] = []  # 存储等待中的任务，用于去重和展示
+        self._pipeline: Future[None] | None = None
+        # 以下状态只在异步运行时线程中读写
+        self._handoff: asyncio.Queue[tuple[DownloadTask, PartialFile | Path]] | None = None
+        self._fetchers: set[asyncio.Task] = set()
+        self._fetchers_idle: asyncio.Event | None = None
+        self._downloading = 0  # 正在下载（不含等待交接）的任务数
+        self._jobs: dict[TaskKey, asyncio.Task] = {}  # 进行中任务的下载 / 转码协程
+        self._intents: dict[TaskKey, str] = {}  # 被中断任务的处理方式："pause" / "cancel"
+        self._handed_off: set[TaskKey] = set()  # 已下载完、在交接队列中等待转码的任务
+        self._progress: dict[TaskKey, TaskProgress] = {}
+        self._samples: dict[TaskKey, tuple[float, int]] = {}  # 上次采样的 (时间, 字节数)
+        self._progress_dirty: set[TaskKey] = set()
+        self.journal = journal
+        if journal is not None:
+            self._restore()
+
+    def _restore(self) -> None:
+        """回放日志恢复任务（不自动开始下载）"""
+        assert self.journal is not None
+        restored = 0
+        for record in self.journal.replay():
+            try:
+                restored += self.registry.add(DownloadTask.from_record(record))
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"跳过无效的下载任务记录: {record}")
+        if restored:
+            counts = self.registry.counts()
+            logger.info(f"已恢复下载队列: 等待 {counts['pending']}，暂停 {counts['paused']}，失败 {counts['failed']}")
+        self._maybe_compact()
+
+    def _live_records(self) -> list[dict]:
+        """需要在日志中保留的任务（等待、进行中、暂停、失败），调用方需持锁"""
+        return [
+            t.to_record()
+            for bucket in ("active", "pending", "paused", "failed")
+            for t in self.registry.snapshot(bucket)
+        ]
+
+    def _maybe_compact(self) -> None:
+        """日志过长时压缩，调用方需持锁（或处于初始化阶段）"""
+        if self.journal is None:
+            return
+        live = len(self.registry) - self.registry.count("completed")
+        if self.journal.needs_compaction(live):
+            self.journal.compact(self._live_records())
+
+    def _journal_state(self, task: DownloadTask, **fields) -> None:
+        """记录任务状态变化，调用方需持锁"""
+        if self.journal is not None:
+            self.journal.record_state(task.bvid, task.part, task.status.value, task.error_msg, **fields)
 
     def add_task(self, task: DownloadTask) -> bool:
         """添加下载任务到队列
@@ -75,139 +382,471 @@ class DownloadQueueManager(QObject):
         Returns:
             bool: True表示添加成功，False表示任务已存在
         """
-        with self.lock:
-            # 检查是否已存在相同BV号的任务
-            if self._is_task_exists(task.bvid):
-                logger.warning(f"任务已存在，跳过: {task.title} ({task.bvid})")
-                return False
-
-            self.task_queue.put(task)
-            self.pending_tasks.append(task)
-            logger.info(f"添加下载任务到队列: {task.title} ({task.bvid})")
-            self.task_added.emit(task)
-            return True
+        return self.add_tasks([task])[0] == 1
 
-    def _is_task_exists(self, bvid: str) -> bool:
-        """检查任务是否已存在（包括等待、下载中、已完成、失败）
-
-        Args:
-            bvid: BV号
+    def add_tasks(self, tasks: Iterable[DownloadTask]) -> tuple[int, int]:
+        """批量添加下载任务（只加一次锁）
 
         Returns:
-            bool: 任务是否已存在
+            (添加数, 跳过的重复任务数)
         """
-        # 检查等待队列
-        for task in self.pending_tasks:
-            if task.bvid == bvid:
-                return True
-        # 检查活动任务
-        for task in self.active_tasks:
-            if task.bvid == bvid:
-                return True
-        # 检查已完成任务
-        for task in self.completed_tasks:
-            if task.bvid == bvid:
-                return True
-        # 检查失败任务
-        for task in self.failed_tasks:
-            if task.bvid == bvid:
-                return True
-        return False
+        added: list[DownloadTask] = []
+        skipped = 0
+        with self.lock:
+            for task in tasks:
+                # 检查是否已存在相同 BV 号与分P 的任务（包括等待、下载中、已完成、失败）
+                if self.registry.add(task):
+                    added.append(task)
+                else:
+                    skipped += 1
+                    logger.warning(f"任务已存在，跳过: {task.title} ({task.bvid})")
+            if self.journal is not None:
+                # 在锁内写日志，保证加入记录先于之后的状态记录
+                self.journal.record_add(t.to_record() for t in added)
+
+        for task in added:
+            logger.info(f"添加下载任务到队列: {task.title} ({task.bvid})")
+            self.task_added.emit(task)
+        if added:
+            self._kick()
+        return len(added), skipped
 
+    # -------- 队列控制 --------
     def start(self) -> None:
         """启动下载队列"""
-        if self.is_running:
-            logger.warning("下载队列已在运行中")
-            return
-
-        self.is_running = True
-        logger.info(f"启动下载队列，最大并发数: {self.max_workers}")
+        with self.lock:
+            if self.is_running:
+                logger.warning("下载队列已在运行中")
+                return
+            self.is_running = True
 
-        # 启动工作线程
-        for i in range(self.max_workers):
-            thread = Thread(target=self._worker, name=f"DownloadWorker-{i}", daemon=True)
-            thread.start()
-            self.worker_threads.append(thread)
+        apply_proxy_if_enabled()
+        mode = "自动" if self.tuner is not None else "固定"
+        logger.info(f"启动下载队列，下载并发数: {self.slots}（{mode}），转码并发数: {self.transcode_workers}")
+        self._pipeline = runtime.submit(self._run_pipeline())
 
     def stop(self) -> None:
-        """停止下载队列"""
+        """停止下载队列（未完成的任务回到等待状态，已下载的数据保留在断点续传缓存中）"""
         logger.info("停止下载队列")
         self.is_running = False
 
-        # 等待所有工作线程结束
-        for thread in self.worker_threads:
-            if thread.is_alive():
-                thread.join(timeout=1)
+        pipeline, self._pipeline = self._pipeline, None
+        if pipeline is not None and not pipeline.done():
+            pipeline.cancel()
 
-        self.worker_threads.clear()
+    @property
+    def slots(self) -> int:
+        """当前允许同时下载的任务数"""
+        return self.tuner.slots if self.tuner is not None else self.max_workers
 
-    def _worker(self) -> None:
-        """工作线程函数"""
-        while self.is_running:
-            try:
-                # 从队列获取任务，超时1秒
-                task = self.task_queue.get(timeout=1)
-
-                with self.lock:
-                    # 从等待列表移除
-                    if task in self.pending_tasks:
-                        self.pending_tasks.remove(task)
-                    task.status = DownloadStatus.DOWNLOADING
-                    self.active_tasks.append(task)
+    def _kick(self) -> None:
+        """有新的可下载任务时补足下载协程（队列未运行时什么也不做）"""
+        if self.is_running:
+            runtime.call_soon(self._spawn_fetchers)
 
-                logger.info(f"开始下载: {task.title} ({task.bvid})")
-                self.task_started.emit(task)
+    def pause_all(self) -> None:
+        """暂停所有等待中与进行中的任务"""
+        with self.lock:
+            pending = self.registry.snapshot("pending")
+            for task in pending:
+                self.registry.transition(task, DownloadStatus.PAUSED)
+                self._journal_state(task)
+            active = [task.key for task in self.registry.snapshot("active")]
+        for key in active:
+            self._interrupt(key, "pause")
+        logger.info(f"已暂停全部任务: 等待 {len(pending)}，进行中 {len(active)}")
+        self.tasks_reset.emit()
+
+    def resume_all(self) -> None:
+        """继续所有已暂停的任务并启动队列"""
+        with self.lock:
+            paused = self.registry.snapshot("paused")
+            for task in paused:
+                self.registry.transition(task, DownloadStatus.PENDING)
+                self._journal_state(task)
+        logger.info(f"已继续 {len(paused)} 个任务")
+        self.tasks_reset.emit()
+        if self.is_running:
+            self._kick()
+        else:
+            self.start()
 
-                # 执行下载
-                try:
-                    success = run_music_download(task.index, task.search_list, task.file_type)
-
-                    with self.lock:
-                        if task in self.active_tasks:
-                            self.active_tasks.remove(task)
-
-                        if success:
-                            task.status = DownloadStatus.SUCCESS
-                            self.completed_tasks.append(task)
-                            logger.success(f"下载完成: {task.title}")
-                            self.task_completed.emit(task)
-                        else:
-                            task.status = DownloadStatus.FAILED
-                            task.error_msg = "下载失败"
-                            self.failed_tasks.append(task)
-                            logger.error(f"下载失败: {task.title}")
-                            self.task_failed.emit(task)
-
-                except Exception as e:
-                    logger.exception(f"下载任务异常: {task.title}")
-                    with self.lock:
-                        if task in self.active_tasks:
-                            self.active_tasks.remove(task)
-                        task.status = DownloadStatus.FAILED
-                        task.error_msg = str(e)
-                        self.failed_tasks.append(task)
-                        self.task_failed.emit(task)
+    def pause_task(self, key: TaskKey) -> bool:
+        """暂停单个任务：等待中的直接暂停，进行中的中断下载 / 转码（已下载的数据保留）"""
+        with self.lock:
+            task = self.registry.get(key)
+            if task is None:
+                return False
+            if task.status is DownloadStatus.PENDING:
+                self.registry.transition(task, DownloadStatus.PAUSED)
+                self._journal_state(task)
+            elif _BUCKETS[task.status] == "active":
+                task = None
+            else:
+                return False
+        if task is None:
+            self._interrupt(key, "pause")
+        else:
+            self.task_updated.emit(task)
+        return True
+
+    def resume_task(self, key: TaskKey) -> bool:
+        """继续已暂停的任务，或重试失败的任务"""
+        with self.lock:
+            task = self.registry.get(key)
+            if task is None or task.status not in (DownloadStatus.PAUSED, DownloadStatus.FAILED):
+                return False
+            task.error_msg = ""
+            self.registry.transition(task, DownloadStatus.PENDING)
+            self._journal_state(task)
+        self.task_updated.emit(task)
+        self._kick()
+        return True
+
+    def cancel_task(self, key: TaskKey) -> bool:
+        """取消任务：进行中的立即中断，删除未完成的缓存，从队列中移除"""
+        with self.lock:
+            task = self.registry.get(key)
+            if task is None or task.status is DownloadStatus.SUCCESS:
+                return False
+            if _BUCKETS[task.status] == "active":
+                task = None
+            else:
+                self._remove(task)
+        if task is None:
+            self._interrupt(key, "cancel")
+        else:
+            self._discard_partial(task)
+            self.task_cancelled.emit(task)
+        return True
+
+    def set_priority(self, key: TaskKey, priority: int) -> bool:
+        with self.lock:
+            task = self.registry.get(key)
+            if task is None:
+                return False
+            self.registry.set_priority(task, priority)
+            self._journal_state(task, priority=task.priority)
+        self.task_updated.emit(task)
+        return True
 
-                finally:
-                    self.task_queue.task_done()
+    def move_to_front(self, key: TaskKey) -> bool:
+        """把等待中的任务调到最前面下载"""
+        with self.lock:
+            task = self.registry.get(key)
+            if task is None or task.status is not DownloadStatus.PENDING:
+                return False
+            self.registry.move_to_front(task)
+            self._journal_state(task, priority=task.priority)
+        self.task_updated.emit(task)
+        return True
+
+    def _remove(self, task: DownloadTask) -> None:
+        """从队列与日志中移除任务，调用方需持锁"""
+        self.registry.remove(task)
+        if self.journal is not None:
+            self.journal.record_remove([task.key])
+
+    @staticmethod
+    def _discard_partial(task: DownloadTask) -> None:
+        if task.partial_key:
+            PartialFile(task.partial_key).discard()
+
+    def _interrupt(self, key: TaskKey, intent: str) -> None:
+        """中断进行中的任务（在异步运行时线程中执行）"""
+
+        def interrupt() -> None:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._intents[key] = intent
+                job.cancel()
+            elif key in self._handed_off:
+                # 已下载完、在交接队列中等待转码，由转码阶段取出时处理
+                self._intents[key] = intent
+            # 两者都不是说明任务在回调执行前已经结束，不再记录，以免影响之后重新加入的同名任务
+
+        runtime.call_soon(interrupt)
+
+    def _after_interrupt(self, task: DownloadTask, intent: str, transcoding: bool = False) -> None:
+        """被中断的任务：暂停的保留缓存等待继续，取消的删除缓存并移除"""
+        self._progress.pop(task.key, None)
+        self._samples.pop(task.key, None)
+        if transcoding:
+            # ffmpeg 已被结束，删除写了一半的输出文件（暂停的任务继续时重新转码）
+            task.output_file.unlink(missing_ok=True)
+        if intent == "pause":
+            with self.lock:
+                self.registry.transition(task, DownloadStatus.PAUSED)
+                self._journal_state(task, partial_key=task.partial_key)
+            logger.info(f"已暂停: {task.title}")
+            self.task_updated.emit(task)
+            return
 
-            except Exception:
-                # 队列超时，检查是否需要退出
+        with self.lock:
+            self._remove(task)
+        self._discard_partial(task)
+        logger.info(f"已取消: {task.title}")
+        self.task_cancelled.emit(task)
+
+    # -------- 流水线 --------
+    def _take_pending(self) -> DownloadTask | None:
+        """取出下一个等待中的任务并标记为下载中"""
+        with self.lock:
+            if not self.is_running:
+                return None
+            task = self.registry.pop_pending()
+        if task is None:
+            return None
+        logger.info(f"开始下载: {task.title} ({task.bvid})")
+        self.task_started.emit(task)
+        return task
+
+    def _on_bytes(self, key: TaskKey, received: int, total: int | None) -> None:
+        """下载器的进度回调：只记录数值，由 _emit_progress 定时合并发送"""
+        progress = self._progress.get(key)
+        if progress is None:
+            # 第一次回调包含断点续传已有的字节，不计入吞吐量
+            progress = self._progress[key] = TaskProgress(key)
+        elif self.tuner is not None and received > progress.received:
+            self.tuner.record_bytes(received - progress.received)
+        progress.received, progress.total = received, total
+
+    def _emit_progress(self) -> None:
+        """计算速率与剩余时间，把有变化的任务进度合并为一次信号发送"""
+        now = time.monotonic()
+        changed: list[TaskProgress] = []
+        for key, p in self._progress.items():
+            sample = self._samples.get(key)
+            self._samples[key] = (now, p.received)
+            if sample is None:
+                changed.append(replace(p))
+                continue
+            last_t, last_received = sample
+            if now <= last_t:
+                continue
+            moved = p.received != last_received
+            if not moved and p.rate == 0 and key not in self._progress_dirty:
+                continue
+            inst = (p.received - last_received) / (now - last_t)
+            p.rate = inst if p.rate == 0 else RATE_SMOOTHING * inst + (1 - RATE_SMOOTHING) * p.rate
+            if p.rate < 1:
+                p.rate = 0.0
+            p.eta_s = (p.total - p.received) / p.rate if p.total and p.rate > 0 else None
+            changed.append(replace(p))
+        self._progress_dirty.clear()
+        if changed:
+            self.progress_updated.emit(changed)
+
+    async def _report_progress(self) -> None:
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL_S)
+            self._emit_progress()
+
+    def _finish(self, task: DownloadTask, error: BaseException | None) -> None:
+        """记录任务结果"""
+        self._progress.pop(task.key, None)
+        self._samples.pop(task.key, None)
+        self._intents.pop(task.key, None)
+        with self.lock:
+            if error is None:
+                self.registry.transition(task, DownloadStatus.SUCCESS)
+            else:
+                task.error_msg = str(error) or "下载失败"
+                if self.tuner is not None:
+                    self.tuner.record_failure(is_risk_control_error(error))
+                self.registry.transition(task, DownloadStatus.FAILED)
+            if self.journal is not None:
+                # 已完成的任务无需恢复，直接从日志中移除
+                if error is None:
+                    self.journal.record_remove([task.key])
+                else:
+                    self._journal_state(task, partial_key=task.partial_key)
+                self._maybe_compact()
+
+        if error is None:
+            library_index.add(task.bvid, task.part, task.output_file)
+            logger.success(f"下载完成: {task.title}")
+            self.task_completed.emit(task)
+        else:
+            logger.opt(exception=error).error(f"下载失败: {task.title}")
+            self.task_failed.emit(task)
+
+    async def _tune_slots(self) -> None:
+        """定期根据吞吐量与失败情况调整并发数，调高时立即补足下载协程"""
+        assert self.tuner is not None
+        while True:
+            await asyncio.sleep(TUNE_INTERVAL_S)
+            with self.lock:
+                backlog = self.registry.count("pending") > 0
+            old = self.tuner.slots
+            if self.tuner.update(self._downloading, backlog, scheduler.cooldown_remaining() > 0) > old:
+                self._spawn_fetchers()
+
+    def _spawn_fetchers(self) -> None:
+        """补足下载协程到并发上限（在异步运行时线程中执行）"""
+        if self._fetchers_idle is None or not self.is_running:
+            return
+        while len(self._fetchers) < self.slots:
+            fetcher = asyncio.create_task(self._fetch_worker())
+            self._fetchers.add(fetcher)
+            fetcher.add_done_callback(self._on_fetcher_done)
+        self._fetchers_idle.clear()
+
+    def _retire_fetcher(self) -> bool:
+        """并发数被调低时，多余的下载协程在取下一个任务前退出（正在下载的任务不受影响）"""
+        if len(self._fetchers) <= self.slots:
+            return False
+        self._fetchers.discard(asyncio.current_task())
+        return True
+
+    def _on_fetcher_done(self, fetcher: asyncio.Task) -> None:
+        self._fetchers.discard(fetcher)
+        if not self._fetchers and self._fetchers_idle is not None:
+            self._fetchers_idle.set()
+
+    async def _run_pipeline(self) -> None:
+        """两段式流水线：下载阶段（异步 I/O）→ 有界交接队列 → 转码阶段（ffmpeg 进程，按 CPU 核数并发）
+
+        下载阶段把流完整写入断点续传缓存后交给转码阶段，立即开始下一个下载；
+        交接队列满时下载阶段等待，避免下载远远领先于转码而堆积大量缓存文件。
+        下载协程在没有等待中的任务时退出，之后加入或继续的任务由 _kick 重新补足。
+        """
+        self._handoff = asyncio.Queue(maxsize=self.transcode_workers)
+        self._fetchers_idle = asyncio.Event()
+        transcoders = [asyncio.create_task(self._transcode_worker()) for _ in range(self.transcode_workers)]
+        reporter = asyncio.create_task(self._report_progress())
+        if self.tuner is not None:
+            helpers = [reporter, asyncio.create_task(self._tune_slots())]
+        else:
+            helpers = [reporter]
+        stopped = False
+        try:
+            while True:
+                self._spawn_fetchers()
+                await self._fetchers_idle.wait()
+                await self._handoff.join()
                 with self.lock:
-                    # 如果队列空且没有活动任务，退出线程
-                    if self.task_queue.empty() and not self.active_tasks:
+                    # 等待转码期间又有任务被加入或继续：继续处理
+                    if not self.is_running or not (self._fetchers or self.registry.count("pending")):
+                        self.is_running = False
                         break
+        except asyncio.CancelledError:
+            stopped = True
+            raise
+        finally:
+            for t in (*self._fetchers, *self._jobs.values(), *transcoders, *helpers):
+                t.cancel()
+            await asyncio.gather(*self._fetchers, *transcoders, *helpers, return_exceptions=True)
+            if stopped:
+                # 等所有 ffmpeg 进程结束后再放回，才能删除写了一半的输出文件
+                self._requeue_active()
+            self._fetchers_idle = None
+            self._handoff = None
+            self._intents.clear()
+            self._handed_off.clear()
+            self._progress.clear()
+            self._samples.clear()
+
+        logger.info("所有下载任务已完成")
+        self.queue_completed.emit()
+
+    async def _fetch(self, task: DownloadTask) -> PartialFile | Path:
+        # 原始流已缓存时跳过下载，直接交给转码阶段
+        if (source := await cached_source(task.bvid, task.part - 1)) is not None:
+            logger.info(f"使用已缓存的原始流: {task.title} ({source.name})")
+            return source
+        r = await resolve_stream(task.bvid, task.part - 1)
+        if task.partial_key != r.partial.key:
+            task.partial_key = r.partial.key
+        return await fetch_resolved(
+            r, on_progress=lambda received, total, key=task.key: self._on_bytes(key, received, total)
+        )
+
+    async def _transcode(self, task: DownloadTask, source: PartialFile | Path) -> None:
+        tags = await source_tags(task.bvid, task.part - 1, task.output_file)
+        await transcode_fetched(source, task.output_file, tags)
+
+    async def _fetch_worker(self) -> None:
+        """下载阶段：不断取出等待中的任务，下载完成后交给转码阶段"""
+        assert self._handoff is not None
+        handoff = self._handoff
+        while not self._retire_fetcher() and (task := self._take_pending()) is not None:
+            job = asyncio.create_task(self._fetch(task))
+            self._jobs[task.key] = job
+            self._downloading += 1
+            try:
+                source = await job
+            except asyncio.CancelledError:
+                intent = self._intents.pop(task.key, None)
+                if intent is None or not job.cancelled():
+                    raise
+                self._after_interrupt(task, intent)
+                continue
+            except Exception as e:
+                self._finish(task, e)
                 continue
+            finally:
+                self._jobs.pop(task.key, None)
+                self._downloading -= 1
+            if self.tuner is not None:
+                self.tuner.record_success()
+            self._handed_off.add(task.key)
+            await handoff.put((task, source))
+
+    async def _transcode_worker(self) -> None:
+        """转码阶段：ffmpeg 在独立进程中运行，这里只等待其结束"""
+        assert self._handoff is not None
+        handoff = self._handoff
+        while True:
+            task, source = await handoff.get()
+            self._handed_off.discard(task.key)
+            try:
+                if intent := self._intents.pop(task.key, None):
+                    self._after_interrupt(task, intent)
+                    continue
+                with self.lock:
+                    self.registry.transition(task, DownloadStatus.TRANSCODING)
+                # 让界面尽快显示“转码中”
+                self._progress.setdefault(task.key, TaskProgress(task.key))
+                self._progress_dirty.add(task.key)
 
-        # 工作线程结束，最后一个线程发送完成信号
+                job = asyncio.create_task(self._transcode(task, source))
+                self._jobs[task.key] = job
+                try:
+                    await job
+                except asyncio.CancelledError:
+                    intent = self._intents.pop(task.key, None)
+                    if intent is None or not job.cancelled():
+                        raise
+                    self._after_interrupt(task, intent, transcoding=True)
+                    continue
+                finally:
+                    self._jobs.pop(task.key, None)
+                self._finish(task, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._finish(task, e)
+            finally:
+                handoff.task_done()
+
+    def _requeue_active(self) -> None:
+        """停止时把进行中的任务放回等待队列（数据保留在断点续传缓存中，下次启动时续传）
+
+        转码被中断的任务删除写了一半的输出文件，以免被当作已下载的歌曲。
+        """
         with self.lock:
-            # 检查是否是最后一个活动线程
-            alive_workers = sum(1 for t in self.worker_threads if t.is_alive() and t != current_thread())
-            if alive_workers == 0 and self.task_queue.empty() and not self.active_tasks:
-                logger.info("所有下载任务已完成")
-                self.is_running = False
-                self.queue_completed.emit()
-
+            active = self.registry.snapshot("active")
+            for task in active:
+                if task.status is DownloadStatus.TRANSCODING:
+                    try:
+                        task.output_file.unlink(missing_ok=True)
+                    except OSError:
+                        logger.opt(exception=True).warning(f"删除未完成的输出文件失败: {task.output_file}")
+            self.registry.requeue_front(active)
+            self.is_running = False
+
+    # -------- 查询与清理 --------
     def get_status(self) -> dict:
         """获取队列状态
 
@@ -215,82 +854,79 @@ class DownloadQueueManager(QObject):
             包含队列状态信息的字典
         """
         with self.lock:
-            return {
-                "is_running": self.is_running,
-                "pending": self.task_queue.qsize(),
-                "active": len(self.active_tasks),
-                "completed": len(self.completed_tasks),
-                "failed": len(self.failed_tasks),
-                "total": (
-                    self.task_queue.qsize()
-                    + len(self.active_tasks)
-                    + len(self.completed_tasks)
-                    + len(self.failed_tasks)
-                ),
-            }
+            counts = self.registry.counts()
+            return {"is_running": self.is_running, **counts, "total": sum(counts.values())}
 
     def clear_completed(self) -> None:
         """清除已完成和失败的任务记录"""
         with self.lock:
-            self.completed_tasks.clear()
-            self.failed_tasks.clear()
-            logger.info("已清除完成和失败的任务记录")
+            if self.journal is not None:
+                self.journal.record_remove(t.key for t in self.registry.snapshot("failed"))
+            self.registry.clear("completed", "failed")
+        logger.info("已清除完成和失败的任务记录")
+        self.tasks_reset.emit()
 
     def clear_all(self) -> int:
-        """清空所有任务（等待中、已完成、失败）
+        """清空所有任务：取消进行中的任务，移除等待中、暂停、已完成和失败的任务
 
         Returns:
             int: 清除的任务数量
         """
-        if self.is_running:
-            logger.warning("队列运行中，无法清空")
-            return 0
-
         with self.lock:
-            # 清空等待队列
-            pending_count = len(self.pending_tasks)
-            while not self.task_queue.empty():
-                try:
-                    self.task_queue.get_nowait()
-                    self.task_queue.task_done()
-                except Exception:
-                    break
-            self.pending_tasks.clear()
-
-            # 清空已完成和失败
-            completed_count = len(self.completed_tasks)
-            failed_count = len(self.failed_tasks)
-            self.completed_tasks.clear()
-            self.failed_tasks.clear()
-
-            total = pending_count + completed_count + failed_count
-            logger.info(f"已清空所有任务: 等待{pending_count}，完成{completed_count}，失败{failed_count}")
-            return total
-
-    def get_all_tasks(self) -> dict[str, list[DownloadTask]]:
+            removed = [t for bucket in ("pending", "paused", "failed") for t in self.registry.snapshot(bucket)]
+            if self.journal is not None:
+                self.journal.record_remove(t.key for t in removed)
+            pending_count = self.registry.clear("pending") + self.registry.clear("paused")
+            completed_count = self.registry.clear("completed")
+            failed_count = self.registry.clear("failed")
+            active = [t.key for t in self.registry.snapshot("active")]
+
+        for key in active:
+            self._interrupt(key, "cancel")
+        for task in removed:
+            self._discard_partial(task)
+
+        total = pending_count + completed_count + failed_count + len(active)
+        logger.info(
+            f"已清空所有任务: 等待{pending_count}，进行中{len(active)}，完成{completed_count}，失败{failed_count}"
+        )
+        self.tasks_reset.emit()
+        return total
+
+    def get_all_tasks(self, recent: int | None = None) -> dict[str, list[DownloadTask]]:
         """获取所有任务列表
 
+        Args:
+            recent: 只返回最近的若干个已完成 / 失败任务，None 表示全部
+
         Returns:
             包含各状态任务列表的字典
         """
         with self.lock:
             return {
-                "pending": self.pending_tasks.copy(),
-                "active": self.active_tasks.copy(),
-                "completed": self.completed_tasks.copy(),
-                "failed": self.failed_tasks.copy(),
+                "pending": self.registry.snapshot("pending"),
+                "active": self.registry.snapshot("active"),
+                "paused": self.registry.snapshot("paused"),
+                "completed": self.registry.snapshot("completed", recent),
+                "failed": self.registry.snapshot("failed", recent),
             }
 
+    def get_task_states(self, keys: Iterable[TaskKey]) -> dict[TaskKey, DownloadStatus | None]:
+        """查询一组任务的当前状态（已被移除的为 None）"""
+        with self.lock:
+            return {key: task.status if (task := self.registry.get(key)) else None for key in keys}
+
     def get_active_tasks(self) -> list[DownloadTask]:
         """获取正在下载的任务列表"""
         with self.lock:
-            return self.active_tasks.copy()
+            return self.registry.snapshot("active")
 
     def get_pending_tasks(self) -> list[DownloadTask]:
         """获取等待中的任务列表"""
         with self.lock:
-            return self.pending_tasks.copy()
+            return self.registry.snapshot("pending")
 
     def get_pending_count(self) -> int:
         """获取等待中的任务数量"""
-        return self.task_queue.qsize()
+        with self.lock:
+            return self.registry.count("pending")
@@ -0,0 +1,122 @@
+"""下载并发数自动调节
+
+按 AIMD（加性增、乘性减）调整下载队列同时下载的任务数，每 TUNE_INTERVAL_S 秒根据这段时间的统计决定一次：
+- 出现风控（412 / 调度器冷却中）或失败率过高：并发数减半，并保持若干个周期不再增加
+- 上次增加并发后总吞吐量没有明显提升（链路已跑满，只是把带宽分给更多连接）：退回一档，一段时间内不再试探更高的并发
+- 所有名额都在下载且还有等待中的任务：并发数 +1
+
+并发数始终在配置的 [MinSlots, MaxSlots] 之间，每次调整都会写日志，便于根据实际情况修改参数。
+"""
+
+from __future__ import annotations
+
+import time
+
+from loguru import logger
+
+from src.config import cfg
+from src.utils.text import format_size
+
+TUNE_INTERVAL_S = 3.0
+# 启动时的并发数（限制在配置范围内）
+INITIAL_SLOTS = 3
+# 增加一个并发后吞吐量至少提升的比例，否则视为链路已跑满
+MIN_GAIN = 0.1
+# 一个周期内失败率超过该值（且至少 2 次失败）时减小并发
+MAX_ERROR_RATE = 0.3
+# 减小并发后保持的周期数
+DECREASE_HOLD = 3
+# 判定链路跑满后，不再试探更高并发的周期数
+CEILING_HOLD = 20
+
+
+class ConcurrencyTuner:
+    """AIMD 并发控制器（只在异步运行时线程中使用，不加锁）"""
+
+    def __init__(self, min_slots: int, max_slots: int, initial: int = INITIAL_SLOTS):
+        self.min_slots = max(1, min_slots)
+        self.max_slots = max(self.min_slots, max_slots)
+        self.slots = min(self.max_slots, max(self.min_slots, initial))
+        self._bytes = 0
+        self._successes = 0
+        self._failures = 0
+        self._risk = 0
+        self._window_start = time.monotonic()
+        self._last: tuple[int, float] | None = None  # 上个周期的 (并发数, 吞吐量)
+        self._hold = 0
+        self._ceiling = self.max_slots
+        self._ceiling_hold = 0
+
+    @classmethod
+    def from_config(cls) -> ConcurrencyTuner:
+        return cls(int(cfg.download_min_slots.value), int(cfg.download_max_slots.value))
+
+    # -------- 统计 --------
+    def record_bytes(self, n: int) -> None:
+        self._bytes += n
+
+    def record_success(self) -> None:
+        self._successes += 1
+
+    def record_failure(self, risk_control: bool = False) -> None:
+        self._failures += 1
+        if risk_control:
+            self._risk += 1
+
+    # -------- 决策 --------
+    def update(self, busy: int, backlog: bool, cooling_down: bool = False) -> int:
+        """结束一个统计周期并返回新的并发数
+
+        Args:
+            busy: 当前正在下载的任务数
+            backlog: 是否还有等待中的任务
+            cooling_down: 请求调度器是否处于风控冷却期
+        """
+        now = time.monotonic()
+        elapsed = max(now - self._window_start, 1e-3)
+        throughput = self._bytes / elapsed
+        successes, failures, risk = self._successes, self._failures, self._risk
+        self._bytes = self._successes = self._failures = self._risk = 0
+        self._window_start = now
+
+        if self._ceiling_hold:
+            self._ceiling_hold -= 1
+            if not self._ceiling_hold:
+                self._ceiling = self.max_slots
+
+        old = self.slots
+        per_slot = throughput / busy if busy else 0.0
+        stats = f"吞吐 {format_size(throughput)}/s，单任务 {format_size(per_slot)}/s，成功 {successes}，失败 {failures}"
+
+        if risk or (cooling_down and not self._hold):
+            self._decrease(f"触发风控，{stats}")
+        elif failures >= 2 and failures / (failures + successes) > MAX_ERROR_RATE:
+            self._decrease(f"失败率过高，{stats}")
+        elif self._hold:
+            self._hold -= 1
+        elif busy < self.slots or not backlog:
+            # 名额没有用满，吞吐量受任务数量限制而不是并发数，这个周期不作判断
+            pass
+        elif self._last is not None and self._last[0] < self.slots and throughput < self._last[1] * (1 + MIN_GAIN):
+            self.slots = max(self.min_slots, self.slots - 1)
+            self._ceiling, self._ceiling_hold = self.slots, CEILING_HOLD
+            logger.info(f"下载并发 {old} -> {self.slots}：增加并发后吞吐量没有提升，{stats}")
+        elif self.slots < min(self.max_slots, self._ceiling):
+            self.slots += 1
+            logger.info(f"下载并发 {old} -> {self.slots}：名额已用满，{stats}")
+        else:
+            logger.debug(f"下载并发保持 {self.slots}，{stats}")
+
+        # 只用名额用满时的吞吐量作为下次比较的基准
+        if self.slots < old:
+            self._last = None
+        elif busy >= old and throughput > 0:
+            self._last = (old, throughput)
+        return self.slots
+
+    def _decrease(self, reason: str) -> None:
+        old = self.slots
+        self.slots = max(self.min_slots, self.slots // 2)
+        self._hold = DECREASE_HOLD
+        self._last = None
+        logger.info(f"下载并发 {old} -> {self.slots}：{reason}")
@@ -0,0 +1,127 @@
+"""本地曲库索引
+
+记录每个 (BV 号, 分P) 下载到的文件，保存在 DATA_DIR/library_index.json：
+{"BVxxxx": {"1": "歌名.mp3", ...}, ...}（文件名相对于 MUSIC_DIR）
+
+批量导入据此跳过已经下载过的视频，不再根据标题猜测文件名；文件被删除或移走后对应记录自动失效。
+建立索引之前下载的文件由 seed() 根据文件中的来源标签补录。
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import DATA_DIR, MUSIC_DIR
+
+
+class LibraryIndex:
+    def __init__(self, path: Path, music_dir: Path = MUSIC_DIR):
+        self.path = path
+        self.music_dir = music_dir
+        self._entries: dict[str, dict[str, str]] = {}
+        self._loaded = False
+        self._seeded = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> None:
+        """调用方需持锁"""
+        if self._loaded:
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+            self._entries = {bvid: dict(parts) for bvid, parts in raw.items() if isinstance(parts, dict)}
+        except FileNotFoundError:
+            pass
+        except Exception:
+            logger.opt(exception=True).warning("曲库索引读取失败，将重新建立")
+        self._loaded = True
+
+    def _save(self) -> None:
+        """调用方需持锁"""
+        try:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entries, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+        except OSError:
+            logger.exception(f"曲库索引保存失败: {self.path}")
+
+    def _resolve(self, name: str) -> Path:
+        return self.music_dir / name
+
+    def add(self, bvid: str, part: int, file: Path) -> None:
+        """记录下载完成的文件"""
+        try:
+            name = str(file.relative_to(self.music_dir))
+        except ValueError:
+            name = str(file)
+        with self._lock:
+            self._ensure_loaded()
+            self._entries.setdefault(bvid, {})[str(part)] = name
+            self._save()
+
+    def lookup(self, bvid: str, part: int = 1) -> Path | None:
+        """已下载的文件路径；没有记录或文件已不存在时返回 None"""
+        with self._lock:
+            self._ensure_loaded()
+            name = self._entries.get(bvid, {}).get(str(part))
+        if name is None:
+            return None
+        file = self._resolve(name)
+        return file if file.exists() else None
+
+    def find_file(self, file: Path) -> tuple[str, int] | None:
+        """反查文件对应的 (BV 号, 分P)，不是通过下载得到的文件返回 None"""
+        try:
+            name = str(file.relative_to(self.music_dir))
+        except ValueError:
+            name = str(file)
+        with self._lock:
+            self._ensure_loaded()
+            for bvid, parts in self._entries.items():
+                for part, entry in parts.items():
+                    if entry == name:
+                        return bvid, int(part)
+        return None
+
+    def seed(self, read_source: Callable[[Path], tuple[str, int] | None]) -> int:
+        """扫描曲库目录，补录索引中还没有的文件（每次运行只扫描一次），返回补录的数量
+
+        read_source 读取文件的来源 (BV 号, 分P)，读不到时返回 None（见 src/bili_api/tags.py）。
+        """
+        with self._lock:
+            if self._seeded:
+                return 0
+            self._ensure_loaded()
+            known = {name for parts in self._entries.values() for name in parts.values()}
+        files = [fp for fp in self.music_dir.iterdir() if fp.is_file() and fp.name not in known]
+        found = [(source, fp.name) for fp in files if (source := read_source(fp)) is not None]
+        with self._lock:
+            added = 0
+            for (bvid, part), name in found:
+                parts = self._entries.setdefault(bvid, {})
+                current = parts.get(str(part))
+                if current is not None and self._resolve(current).exists():
+                    continue
+                parts[str(part)] = name
+                added += 1
+            if added:
+                self._save()
+            self._seeded = True
+        if added:
+            logger.info(f"曲库索引补录了 {added} 个已有文件")
+        return added
+
+    def missing(self, keys: list[tuple[str, int]]) -> list[tuple[str, int]]:
+        """筛选出曲库中还没有的 (BV 号, 分P)"""
+        with self._lock:
+            self._ensure_loaded()
+            known = {key: self._entries.get(key[0], {}).get(str(key[1])) for key in keys}
+        return [key for key, name in known.items() if name is None or not self._resolve(name).exists()]
+
+
+library_index = LibraryIndex(DATA_DIR / "library_index.json")
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
 
-from bilibili_api import sync
 from loguru import logger
 
-from src.bili_api import search_on_bilibili, search_song_list, search_bvid_on_bilibili
+from src.bili_api import (
+    filter_song_list,
+    iter_search_pages,
+    search_bvid_on_bilibili,
+    search_on_bilibili,
+    search_song_list,
+)
+from src.bili_api.search import save_search_results
 from src.core.song_list import SongList
+from src.utils.async_runtime import run_sync
 from src.utils.text import format_date_str
 
 
@@ -81,26 +90,42 @@ def compute_relevance(item: dict, query: str) -> float:
         return 0.0
 
 
+def relevance_key(item: dict, query: str) -> tuple[float, datetime]:
+    """相关度排序键：(相关度, 日期)，按降序排列；空查询时相关度恒为 0。"""
+    q = (query or "").strip()
+    score = compute_relevance(item, q) if q else 0.0
+    return score, parse_date(str(item.get("date", "")))
+
+
 def sort_song_list_by_relevance(slist: SongList, query: str) -> None:
     """按相关度排序；空查询则退化为日期倒序。"""
-    q = (query or "").strip()
     try:
-        data = slist.get_data()
-        if not q:
-            data.sort(key=lambda x: parse_date(str(x.get("date", ""))), reverse=True)
-            return
-        data.sort(
-            key=lambda x: (
-                compute_relevance(x, q),
-                parse_date(str(x.get("date", ""))),
-            ),
-            reverse=True,
-        )
+        slist.get_data().sort(key=lambda x: relevance_key(x, query), reverse=True)
     except Exception:
         logger.exception("相关度排序失败，退化为日期排序")
         sort_song_list_by_date_desc(slist)
 
 
+async def iter_search(search_content: str) -> AsyncIterator[SongList]:
+    """流式标题搜索：每返回一页就产出该页过滤后的结果。
+
+    全部页面结束后再把原始结果合并写入 search_data.json（在线程中执行，不阻塞事件循环）。
+    """
+    collected = SongList()
+    try:
+        async for rows in iter_search_pages(search_content):
+            page_list = SongList()
+            for item in rows:
+                page_list.append_info(item)
+                collected.append_info(item)
+
+            filter_song_list(page_list, search_content, "title")
+            if len(page_list) > 0:
+                yield page_list
+    finally:
+        await asyncio.to_thread(save_search_results, collected)
+
+
 def perform_search(search_content: str, mode: str = "title") -> SongList | None:
     """执行搜索：先查本地，必要时或增量用 bilibili 搜索补充。
 
@@ -119,7 +144,7 @@ def perform_search(search_content: str, mode: str = "title") -> SongList | None:
 
             logger.info("没有在本地列表找到该 BV，正在尝试 bilibili 精确拉取")
             try:
-                sync(search_bvid_on_bilibili(search_content))
+                run_sync(search_bvid_on_bilibili(search_content))
             except Exception as e:
                 logger.exception("bilibili BV 精确拉取失败")
                 _LAST_SEARCH_ERROR = str(e)
@@ -132,7 +157,7 @@ def perform_search(search_content: str, mode: str = "title") -> SongList | None:
         if main_search_list is None:
             logger.info("没有在本地列表找到该歌曲，正在尝试 bilibili 搜索")
             try:
-                sync(search_on_bilibili(search_content))
+                run_sync(search_on_bilibili(search_content))
                 main_search_list = search_song_list(search_content, mode)
             except Exception as e:
                 logger.exception("bilibili 搜索失败")
@@ -146,7 +171,7 @@ def perform_search(search_content: str, mode: str = "title") -> SongList | None:
         logger.info(main_search_list.get_data())
 
         try:
-            sync(search_on_bilibili(search_content))
+            run_sync(search_on_bilibili(search_content))
             if more_search_list := search_song_list(search_content, mode):
                 delta = len(more_search_list.get_data()) - len(main_search_list.get_data())
                 logger.info(f"bilibili 获取增量 {delta} 个有效视频数据:")
@@ -1,9 +1,12 @@
 """下载队列对话框
 
 显示下载队列状态和进度的UI组件。
+
+任务列表使用 model/view：任务加入时追加行，状态或进度变化时只刷新对应的行，不再定时重建整个列表。
+选中任务后可以暂停 / 继续、取消或优先下载。
 """
 
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
 from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import (
     QDialog,
@@ -11,8 +14,7 @@ from PyQt6.QtWidgets import (
     QHBoxLayout,
     QWidget,
     QGraphicsDropShadowEffect,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
 )
 from qfluentwidgets import (
     FluentIcon as FIF,
@@ -31,7 +33,128 @@ from qfluentwidgets import (
 )
 
 from src.i18n import t
-from src.core.download_queue import DownloadQueueManager, DownloadTask
+from src.core.download_queue import DownloadQueueManager, DownloadStatus, DownloadTask, TaskProgress
+from src.utils.text import format_seconds, format_size
+
+# 状态 -> (图标, 深色主题颜色, 浅色主题颜色)
+_STATUS_STYLES = {
+    DownloadStatus.PENDING: ("⏳", "#FFB800", "#D68000"),
+    DownloadStatus.DOWNLOADING: ("⬇️", "#00A0E9", "#0078D4"),
+    DownloadStatus.TRANSCODING: ("🔄", "#00A0E9", "#0078D4"),
+    DownloadStatus.PAUSED: ("⏸️", "#A0A0A0", "#707070"),
+    DownloadStatus.SUCCESS: ("✅", "#10C010", "#107C10"),
+    DownloadStatus.FAILED: ("❌", "#E81123", "#D13438"),
+}
+
+
+class DownloadTaskModel(QAbstractListModel):
+    """下载任务列表模型（按加入顺序）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tasks: list[DownloadTask] = []
+        self._rows: dict[tuple[str, int], int] = {}
+        self._progress: dict[tuple[str, int], TaskProgress] = {}
+        # 批量加入任务时合并为一次插入
+        self._incoming: list[DownloadTask] = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self._flush_incoming)
+
+    def reset_tasks(self, tasks: list[DownloadTask]) -> None:
+        """整体替换任务列表（打开对话框或清空队列时）"""
+        self.beginResetModel()
+        self._tasks = list(tasks)
+        self._rows = {task.key: row for row, task in enumerate(self._tasks)}
+        self._progress = {k: v for k, v in self._progress.items() if k in self._rows}
+        self._incoming.clear()
+        self.endResetModel()
+
+    def add_task(self, task: DownloadTask) -> None:
+        self._incoming.append(task)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_incoming(self) -> None:
+        new: list[DownloadTask] = []
+        for task in self._incoming:
+            if task.key not in self._rows:
+                self._rows[task.key] = len(self._tasks) + len(new)
+                new.append(task)
+        self._incoming.clear()
+        if not new:
+            return
+        first = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self._tasks.extend(new)
+        self.endInsertRows()
+
+    def remove_task(self, task: DownloadTask) -> None:
+        """任务被取消：删除这一行"""
+        self._flush_incoming()
+        row = self._rows.get(task.key)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tasks[row]
+        self._progress.pop(task.key, None)
+        self._rows = {item.key: r for r, item in enumerate(self._tasks)}
+        self.endRemoveRows()
+
+    def task_at(self, row: int) -> DownloadTask | None:
+        return self._tasks[row] if 0 <= row < len(self._tasks) else None
+
+    def refresh_task(self, task: DownloadTask) -> None:
+        """任务状态变化：只刷新这一行"""
+        row = self._rows.get(task.key)
+        if row is None:
+            self.add_task(task)
+            return
+        if row < len(self._tasks):
+            index = self.index(row)
+            self.dataChanged.emit(index, index)
+
+    def update_progress(self, items: list[TaskProgress]) -> None:
+        for progress in items:
+            self._progress[progress.key] = progress
+            row = self._rows.get(progress.key)
+            if row is not None and row < len(self._tasks):
+                index = self.index(row)
+                self.dataChanged.emit(index, index)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._tasks):
+            return None
+        task = self._tasks[index.row()]
+        icon, dark_color, light_color = _STATUS_STYLES[task.status]
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = f"{icon} {task.title[:40]}... ({task.bvid})"
+            if task.priority > 0 and task.status is DownloadStatus.PENDING:
+                text = f"⬆ {text}"
+            if task.status is DownloadStatus.DOWNLOADING and (progress := self._progress.get(task.key)):
+                text += f"  {self._progress_text(progress)}"
+            elif task.status is DownloadStatus.TRANSCODING:
+                text += f"  {t('search.task_transcoding')}"
+            return text
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return QColor(dark_color if isDarkTheme() else light_color)
+        if role == Qt.ItemDataRole.ToolTipRole and task.status is DownloadStatus.FAILED:
+            return task.error_msg
+        return None
+
+    @staticmethod
+    def _progress_text(progress: TaskProgress) -> str:
+        received = format_size(progress.received)
+        if progress.total:
+            received += f" / {format_size(progress.total)}"
+        text = f"{received}  {format_size(progress.rate)}/s"
+        if progress.eta_s is not None:
+            text += f"  {t('search.task_eta', eta=format_seconds(progress.eta_s))}"
+        return text
 
 
 class QueueStatusWidget(CardWidget):
@@ -60,11 +183,13 @@ class QueueStatusWidget(CardWidget):
         self.active_label = BodyLabel(t("search.active_tasks", count=0))
         self.completed_label = BodyLabel(t("search.completed_tasks", count=0))
         self.failed_label = BodyLabel(t("search.failed_tasks", count=0))
+        self.paused_label = BodyLabel(t("search.paused_tasks", count=0))
 
         status_layout.addWidget(self.pending_label)
         status_layout.addWidget(self.active_label)
         status_layout.addWidget(self.completed_label)
         status_layout.addWidget(self.failed_label)
+        status_layout.addWidget(self.paused_label)
 
         layout.addLayout(status_layout)
 
@@ -88,6 +213,7 @@ class QueueStatusWidget(CardWidget):
         self.active_label.setText(t("search.active_tasks", count=status.get("active", 0)))
         self.completed_label.setText(t("search.completed_tasks", count=status.get("completed", 0)))
         self.failed_label.setText(t("search.failed_tasks", count=status.get("failed", 0)))
+        self.paused_label.setText(t("search.paused_tasks", count=status.get("paused", 0)))
         self._update_colors()
 
 
@@ -110,12 +236,18 @@ class DownloadQueueDialog(QDialog):
 
         self.setObjectName("downloadQueueDialog")
 
+        self.task_model = DownloadTaskModel(self)
+
         self._setup_ui()
-        self._connect_signals()
 
-        # 定时更新状态
-        self.update_timer = QTimer(self)
-        self.update_timer.timeout.connect(self._update_status)
+        # 合并短时间内的多次状态刷新（例如批量加入任务时）
+        self.status_timer = QTimer(self)
+        self.status_timer.setSingleShot(True)
+        self.status_timer.setInterval(100)
+        self.status_timer.timeout.connect(self._update_status)
+
+        self._connect_signals()
+        self._reload_tasks()
 
     def _setup_ui(self):
         """设置UI"""
@@ -196,12 +328,38 @@ class DownloadQueueDialog(QDialog):
         content_layout.addWidget(task_list_title)
 
         # 任务列表
-        self.task_list = QListWidget(self.card)
+        self.task_list = QListView(self.card)
+        self.task_list.setModel(self.task_model)
+        self.task_list.setUniformItemSizes(True)
         self.task_list.setMaximumHeight(150)
         self.task_list.setObjectName("taskListWidget")
+        self.task_list.selectionModel().currentChanged.connect(lambda *_: self._update_task_buttons())
         self._update_task_list_style()
         content_layout.addWidget(self.task_list)
 
+        # 选中任务的操作按钮
+        task_btn_layout = QHBoxLayout()
+        task_btn_layout.setSpacing(8)
+
+        self.pause_task_btn = PushButton(t("search.pause_task"), self.card)
+        self.pause_task_btn.setIcon(FIF.PAUSE)
+        self.pause_task_btn.clicked.connect(self._on_pause_task_clicked)
+
+        self.cancel_task_btn = PushButton(t("search.cancel_task"), self.card)
+        self.cancel_task_btn.setIcon(FIF.CLOSE)
+        self.cancel_task_btn.clicked.connect(self._on_cancel_task_clicked)
+
+        self.front_task_btn = PushButton(t("search.move_to_front"), self.card)
+        self.front_task_btn.setIcon(FIF.UP)
+        self.front_task_btn.clicked.connect(self._on_front_task_clicked)
+
+        task_btn_layout.addWidget(self.pause_task_btn)
+        task_btn_layout.addWidget(self.cancel_task_btn)
+        task_btn_layout.addWidget(self.front_task_btn)
+        task_btn_layout.addStretch()
+
+        content_layout.addLayout(task_btn_layout)
+
         # 按钮布局
         btn_layout = QHBoxLayout()
         btn_layout.setSpacing(12)
@@ -210,11 +368,16 @@ class DownloadQueueDialog(QDialog):
         self.start_btn.setIcon(FIF.PLAY)
         self.start_btn.clicked.connect(self._on_start_clicked)
 
+        self.pause_btn = PushButton(t("search.pause_queue"), self.card)
+        self.pause_btn.setIcon(FIF.PAUSE)
+        self.pause_btn.clicked.connect(self._on_pause_clicked)
+
         self.clear_btn = PushButton(t("search.clear_queue"), self.card)
         self.clear_btn.setIcon(FIF.DELETE)
         self.clear_btn.clicked.connect(self._on_clear_clicked)
 
         btn_layout.addWidget(self.start_btn)
+        btn_layout.addWidget(self.pause_btn)
         btn_layout.addWidget(self.clear_btn)
         btn_layout.addStretch()
 
@@ -227,37 +390,37 @@ class DownloadQueueDialog(QDialog):
         """更新任务列表样式"""
         if isDarkTheme():
             self.task_list.setStyleSheet("""
-                QListWidget {
+                QListView {
                     background-color: rgb(32, 32, 32);
                     border: 1px solid rgb(58, 58, 58);
                     border-radius: 6px;
                     padding: 4px;
                     color: #FFFFFF;
                 }
-                QListWidget::item {
+                QListView::item {
                     padding: 6px;
                     border-radius: 4px;
                     margin: 2px;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: rgb(45, 45, 45);
                 }
             """)
         else:
             self.task_list.setStyleSheet("""
-                QListWidget {
+                QListView {
                     background-color: rgb(245, 245, 245);
                     border: 1px solid rgb(229, 229, 229);
                     border-radius: 6px;
                     padding: 4px;
                     color: #1F1F1F;
                 }
-                QListWidget::item {
+                QListView::item {
                     padding: 6px;
                     border-radius: 4px;
                     margin: 2px;
                 }
-                QListWidget::item:hover {
+                QListView::item:hover {
                     background-color: rgb(235, 235, 235);
                 }
             """)
@@ -288,10 +451,31 @@ class DownloadQueueDialog(QDialog):
 
     def _connect_signals(self):
         """连接信号"""
+        self.queue_manager.task_added.connect(self._on_task_added)
         self.queue_manager.task_started.connect(self._on_task_started)
         self.queue_manager.task_completed.connect(self._on_task_completed)
         self.queue_manager.task_failed.connect(self._on_task_failed)
+        self.queue_manager.task_updated.connect(self._on_task_updated)
+        self.queue_manager.task_cancelled.connect(self._on_task_cancelled)
+        self.queue_manager.tasks_reset.connect(self._on_tasks_reset)
         self.queue_manager.queue_completed.connect(self._on_queue_completed)
+        self.queue_manager.progress_updated.connect(self.task_model.update_progress)
+
+    def _reload_tasks(self):
+        """从队列管理器重新载入整个任务列表"""
+        all_tasks = self.queue_manager.get_all_tasks()
+        self.task_model.reset_tasks(
+            all_tasks["active"]
+            + all_tasks["pending"]
+            + all_tasks["paused"]
+            + all_tasks["completed"]
+            + all_tasks["failed"]
+        )
+        self._update_task_buttons()
+
+    def _schedule_status_update(self):
+        if self.isVisible() and not self.status_timer.isActive():
+            self.status_timer.start()
 
     def _update_status(self):
         """更新状态显示"""
@@ -313,59 +497,68 @@ class DownloadQueueDialog(QDialog):
             self.progress_bar.setValue(0)
             self.progress_label.setText(t("search.queue_empty"))
 
-        # 更新任务列表
-        self._update_task_list()
-
         # 更新按钮状态
         is_running = status.get("is_running", False)
 
-        self.start_btn.setEnabled(not is_running and status.get("pending", 0) > 0)
-        self.clear_btn.setEnabled(not is_running)
-
-    def _update_task_list(self):
-        """更新任务列表显示"""
-        self.task_list.clear()
-
-        all_tasks = self.queue_manager.get_all_tasks()
-
-        # 显示等待中的任务
-        for task in all_tasks["pending"]:
-            icon = "⏳"
-            text = f"{icon} {task.title[:40]}... ({task.bvid})"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor("#FFB800") if isDarkTheme() else QColor("#D68000"))
-            self.task_list.addItem(item)
-
-        # 显示下载中的任务
-        for task in all_tasks["active"]:
-            icon = "⬇️"
-            text = f"{icon} {task.title[:40]}... ({task.bvid})"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor("#00A0E9") if isDarkTheme() else QColor("#0078D4"))
-            self.task_list.addItem(item)
-
-        # 显示最近完成的任务（最多5个）
-        for task in all_tasks["completed"][-5:]:
-            icon = "✅"
-            text = f"{icon} {task.title[:40]}... ({task.bvid})"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor("#10C010") if isDarkTheme() else QColor("#107C10"))
-            self.task_list.addItem(item)
-
-        # 显示最近失败的任务（最多3个）
-        for task in all_tasks["failed"][-3:]:
-            icon = "❌"
-            text = f"{icon} {task.title[:40]}... ({task.bvid})"
-            item = QListWidgetItem(text)
-            item.setForeground(QColor("#E81123") if isDarkTheme() else QColor("#D13438"))
-            self.task_list.addItem(item)
+        resumable = status.get("pending", 0) + status.get("paused", 0)
+        self.start_btn.setEnabled(not is_running and resumable > 0)
+        self.start_btn.setText(t("search.resume_queue" if status.get("paused", 0) else "search.start_queue"))
+        self.pause_btn.setEnabled(status.get("pending", 0) + status.get("active", 0) > 0)
+        self.clear_btn.setEnabled(status.get("total", 0) > 0)
+        self._update_task_buttons()
+
+    def _selected_task(self) -> DownloadTask | None:
+        return self.task_model.task_at(self.task_list.currentIndex().row())
+
+    def _update_task_buttons(self):
+        """根据选中任务的状态更新操作按钮"""
+        task = self._selected_task()
+        status = task.status if task is not None else None
+        resumable = status in (DownloadStatus.PAUSED, DownloadStatus.FAILED)
+        self.pause_task_btn.setText(t("search.resume_task" if resumable else "search.pause_task"))
+        self.pause_task_btn.setIcon(FIF.PLAY if resumable else FIF.PAUSE)
+        self.pause_task_btn.setEnabled(status is not None and status is not DownloadStatus.SUCCESS)
+        self.cancel_task_btn.setEnabled(status is not None and status is not DownloadStatus.SUCCESS)
+        self.front_task_btn.setEnabled(status is DownloadStatus.PENDING)
 
     def _on_start_clicked(self):
         """开始下载按钮点击"""
         if not self.queue_manager.is_running:
-            self.queue_manager.start()
+            # 有暂停的任务时一并继续
+            if self.queue_manager.get_status().get("paused", 0):
+                self.queue_manager.resume_all()
+            else:
+                self.queue_manager.start()
             self.start_btn.setEnabled(False)
 
+    def _on_pause_clicked(self):
+        """暂停全部按钮点击"""
+        self.queue_manager.pause_all()
+
+    def _on_pause_task_clicked(self):
+        """暂停 / 继续选中的任务"""
+        task = self._selected_task()
+        if task is None:
+            return
+        if task.status in (DownloadStatus.PAUSED, DownloadStatus.FAILED):
+            self.queue_manager.resume_task(task.key)
+            if not self.queue_manager.is_running:
+                self.queue_manager.start()
+        else:
+            self.queue_manager.pause_task(task.key)
+
+    def _on_cancel_task_clicked(self):
+        """取消选中的任务"""
+        task = self._selected_task()
+        if task is not None:
+            self.queue_manager.cancel_task(task.key)
+
+    def _on_front_task_clicked(self):
+        """优先下载选中的任务"""
+        task = self._selected_task()
+        if task is not None:
+            self.queue_manager.move_to_front(task.key)
+
     def _on_clear_clicked(self):
         """清空队列按钮点击"""
         # 清空所有任务
@@ -378,19 +571,41 @@ class DownloadQueueDialog(QDialog):
                 duration=2000,
                 parent=self,
             )
-        self._update_status()
+
+    def _on_task_added(self, task: DownloadTask):
+        """任务加入"""
+        self.task_model.add_task(task)
+        self._schedule_status_update()
 
     def _on_task_started(self, task: DownloadTask):
         """任务开始"""
-        self._update_status()
+        self.task_model.refresh_task(task)
+        self._schedule_status_update()
 
     def _on_task_completed(self, task: DownloadTask):
         """任务完成"""
-        self._update_status()
+        self.task_model.refresh_task(task)
+        self._schedule_status_update()
 
     def _on_task_failed(self, task: DownloadTask):
         """任务失败"""
-        self._update_status()
+        self.task_model.refresh_task(task)
+        self._schedule_status_update()
+
+    def _on_task_updated(self, task: DownloadTask):
+        """任务暂停 / 继续 / 优先级变化"""
+        self.task_model.refresh_task(task)
+        self._schedule_status_update()
+
+    def _on_task_cancelled(self, task: DownloadTask):
+        """任务被取消"""
+        self.task_model.remove_task(task)
+        self._schedule_status_update()
+
+    def _on_tasks_reset(self):
+        """批量暂停 / 继续 / 清空后重新载入列表"""
+        self._reload_tasks()
+        self._schedule_status_update()
 
     def _on_queue_completed(self):
         """队列完成"""
@@ -413,20 +628,11 @@ class DownloadQueueDialog(QDialog):
         self._update_separator_style()
         self._update_task_list_style()
         self.status_widget._update_colors()
-        # 窗口显示时启动定时器并立即更新一次
+        # 窗口显示时立即更新一次（隐藏期间不刷新状态标签，任务列表模型始终保持同步）
         self._update_status()
-        self.update_timer.start(500)
-
-    def hideEvent(self, event):  # type: ignore[override]
-        """隐藏事件"""
-        super().hideEvent(event)
-        # 窗口隐藏时停止定时器
-        self.update_timer.stop()
 
     def closeEvent(self, event):  # type: ignore[override]
         """关闭事件"""
-        # 停止定时器
-        self.update_timer.stop()
         # 隐藏而不是关闭
         self.hide()
         event.ignore()
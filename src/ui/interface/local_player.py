@@ -15,7 +15,16 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
 )
 from qfluentwidgets import FluentIcon as FIF
-from qfluentwidgets import InfoBar, InfoBarPosition, TableWidget, TitleLabel, TransparentToolButton
+from qfluentwidgets import (
+    CheckBox,
+    InfoBar,
+    InfoBarPosition,
+    MessageBoxBase,
+    SubtitleLabel,
+    TableWidget,
+    TitleLabel,
+    TransparentToolButton,
+)
 
 from src.i18n import t
 from src.app_context import app_context
@@ -28,6 +37,10 @@ from src.ui.widgets.song_cell import build_song_cell, SongTableWidgetItem
 from src.utils.cover import get_cover_pixmap
 from src.ui.widgets.pixmap_utils import rounded_pixmap
 from src.core.queue_service import queue_service
+from src.core.library_index import library_index
+from src.bili_api.music import export_cached
+from src.bili_api.tags import read_source
+from src.utils.thread import AsyncTask
 
 import shutil
 import time
@@ -66,6 +79,33 @@ class NumericTableWidgetItem(QTableWidgetItem):
         super().setText(atext)
 
 
+class ExportFormatsDialog(MessageBoxBase):
+    """选择导出格式的对话框"""
+
+    FORMATS = ["mp3", "ogg", "wav", "m4a"]
+
+    def __init__(self, current: str, parent=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel(t("local_player.export_title"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+        self.viewLayout.addSpacing(6)
+
+        self.checkBoxes: dict[str, CheckBox] = {}
+        for fmt in self.FORMATS:
+            if fmt == current:
+                continue
+            box = CheckBox(fmt, self)
+            self.checkBoxes[fmt] = box
+            self.viewLayout.addWidget(box)
+
+        self.yesButton.setText(t("common.ok"))
+        self.cancelButton.setText(t("common.cancel"))
+        self.widget.setMinimumWidth(300)
+
+    def selected(self) -> list[str]:
+        return [fmt for fmt, box in self.checkBoxes.items() if box.isChecked()]
+
+
 class LocalPlayerInterface(QWidget):
     """本地播放器GUI"""
 
@@ -76,6 +116,7 @@ class LocalPlayerInterface(QWidget):
         super().__init__(parent=parent)
         self.stateTooltip = None
         self.main_window = main_window
+        self._export_task: AsyncTask | None = None
         self._first_load = True  # 标记首次加载，用于控制无效文件提示
 
         self.setAcceptDrops(True)
@@ -114,6 +155,8 @@ class LocalPlayerInterface(QWidget):
         self.addQueueAllBtn.setToolTip(t("local_player.add_all_tooltip"))
         self.openFolderBtn = TransparentToolButton(FIF.FOLDER, self)
         self.openFolderBtn.setToolTip(t("local_player.open_folder_tooltip"))
+        self.exportBtn = TransparentToolButton(FIF.SAVE_AS, self)
+        self.exportBtn.setToolTip(t("local_player.export_tooltip"))
 
         title_layout.addWidget(self.titleLabel, alignment=Qt.AlignmentFlag.AlignLeft)
         title_layout.addWidget(self.refreshButton, alignment=Qt.AlignmentFlag.AlignRight)
@@ -121,6 +164,7 @@ class LocalPlayerInterface(QWidget):
         title_layout.addWidget(self.openInfoTip, alignment=Qt.AlignmentFlag.AlignRight)
         title_layout.addWidget(self.openPlayer, alignment=Qt.AlignmentFlag.AlignRight)
         title_layout.addWidget(self.openFolderBtn, alignment=Qt.AlignmentFlag.AlignRight)
+        title_layout.addWidget(self.exportBtn, alignment=Qt.AlignmentFlag.AlignRight)
         title_layout.addWidget(self.addQueueAllBtn, alignment=Qt.AlignmentFlag.AlignRight)
         title_layout.addWidget(self.delSongBtn, alignment=Qt.AlignmentFlag.AlignRight)
         title_layout.addWidget(self.addQueueButton, alignment=Qt.AlignmentFlag.AlignRight)
@@ -137,6 +181,7 @@ class LocalPlayerInterface(QWidget):
         self.delSongBtn.clicked.connect(self.del_song)
         self.addQueueAllBtn.clicked.connect(self.add_all_to_queue)
         self.openFolderBtn.clicked.connect(self.open_music_folder)
+        self.exportBtn.clicked.connect(self.export_song)
 
         # 监听表头点击事件，禁用封面列排序
         header = self.tableView.horizontalHeader()
@@ -208,7 +253,7 @@ class LocalPlayerInterface(QWidget):
 
     def _audio_extensions_for_scan(self) -> list[str]:
         """本地歌曲扫描扩展名（保持与 read_all_audio_info 行为一致）"""
-        return [".mp3", ".ogg", ".wav"]
+        return [".mp3", ".ogg", ".wav", ".m4a"]
 
     def _local_songs_cache_path(self) -> Path:
         return CACHE_DIR / self._LOCAL_SONGS_CACHE_FILENAME
@@ -608,6 +653,76 @@ class LocalPlayerInterface(QWidget):
                 parent=self.parent(),
             )
 
+    def export_song(self):
+        """把选中的歌曲从已缓存的原始流导出为其他格式（一次 ffmpeg 调用输出全部所选格式）"""
+
+        def warn(content: str) -> None:
+            InfoBar.warning(
+                t("common.fail"),
+                content,
+                orient=Qt.Orientation.Horizontal,
+                position=InfoBarPosition.TOP,
+                duration=2000,
+                parent=self.parent(),
+            )
+
+        if self._export_task is not None and self._export_task.isRunning():
+            warn(t("local_player.export_running"))
+            return
+
+        current_item = self.tableView.currentItem()
+        if current_item is None:
+            logger.warning("没有选中的歌曲")
+            return
+        item = self.tableView.item(current_item.row(), self._name_col())
+        file_name = item and (item.data(Qt.ItemDataRole.UserRole) or item.text())
+        file_path = getMusicLocalStr(str(file_name)) if file_name else None
+        if file_path is None:
+            return
+
+        # 曲库索引之外再读取文件的来源标签（曲库索引建立前下载的文件）
+        source = library_index.find_file(Path(file_path)) or read_source(Path(file_path))
+        if source is None:
+            warn(t("local_player.export_not_downloaded"))
+            return
+        bvid, part = source
+
+        dialog = ExportFormatsDialog(Path(file_path).suffix.lstrip(".").lower(), self.main_window)
+        if not dialog.exec() or not (formats := dialog.selected()):
+            return
+
+        self._export_task = AsyncTask(lambda: export_cached(bvid, formats, part - 1))
+        self._export_task.task_finished.connect(self._on_export_finished)
+        self._export_task.task_failed.connect(self._on_export_failed)
+        self._export_task.start()
+
+    def _on_export_finished(self, outputs: list[Path]):
+        InfoBar.success(
+            t("common.success"),
+            t("local_player.export_success", count=len(outputs)),
+            orient=Qt.Orientation.Horizontal,
+            position=InfoBarPosition.TOP,
+            duration=1500,
+            parent=self.parent(),
+        )
+        if outputs:
+            self.load_local_songs()
+
+    def _on_export_failed(self, error: BaseException):
+        content = (
+            t("local_player.export_not_cached")
+            if isinstance(error, FileNotFoundError)
+            else t("local_player.export_failed", error=str(error))
+        )
+        InfoBar.error(
+            t("common.fail"),
+            content,
+            orient=Qt.Orientation.Horizontal,
+            position=InfoBarPosition.TOP,
+            duration=3000,
+            parent=self.parent(),
+        )
+
     def add_all_to_queue(self):
         """添加列表所有歌曲到播放列表"""
         try:
@@ -28,20 +28,26 @@ from qfluentwidgets import (
 
 from src.i18n import t
 from src.app_context import app_context
-from src.bili_api import create_video_list_file, run_music_download, search_song_list, get_video_parts_sync
+from src.bili_api import create_video_list_file, run_music_download, search_song_list
+from src.bili_api.metadata import metadata_store
+from src.bili_api.music import get_video_parts, part_output_file, parts_from_meta
+from src.bili_api.scheduler import scheduler
 from src.config import ASSETS_DIR, MUSIC_DIR, cfg
 from src.core.song_list import SongList
 from src.core.search_core import (
     perform_search,
     get_last_search_error,
+    iter_search,
+    relevance_key,
     sort_song_list_by_date_desc,
     sort_song_list_by_relevance,
 )
-from src.core.download_queue import DownloadQueueManager, DownloadTask
+from src.core.download_journal import QueueJournal
+from src.core.download_queue import QUEUE_JOURNAL_PATH, DownloadQueueManager, DownloadTask
 from src.ui.components.download_queue_dialog import DownloadQueueDialog
 from src.ui.components.part_selection_dialog import MultiPartChoiceDialog, PartSelectionDialog
 from src.utils.text import fix_filename, format_date_str
-from src.utils.thread import SimpleThread
+from src.utils.thread import AsyncStream, AsyncTask, SimpleThread
 
 if TYPE_CHECKING:
     from src.ui.main_window import MainWindow
@@ -62,6 +68,11 @@ def showLoading(target):
     return TeachingTip.make(view, target, duration=-1)
 
 
+# 分P预取：滚动停止多久后开始预取（毫秒），以及可见区域之后额外预取的行数
+PREFETCH_DEBOUNCE_MS = 400
+PREFETCH_LOOKAHEAD_ROWS = 5
+
+
 class SearchInterface(QWidget):
     """搜索GUI"""
 
@@ -77,8 +88,8 @@ class SearchInterface(QWidget):
         self.setObjectName("searchInterface")
         self._download_thread: SimpleThread | None = None
 
-        # 初始化下载队列管理器
-        self.download_queue = DownloadQueueManager(max_workers=3)
+        # 初始化下载队列管理器（恢复上次未完成的任务，并发数按配置自动调节）
+        self.download_queue = DownloadQueueManager(journal=QueueJournal(QUEUE_JOURNAL_PATH))
         self.queue_dialog: DownloadQueueDialog | None = None
 
         # 布局与表格
@@ -164,6 +175,17 @@ class SearchInterface(QWidget):
         # 状态
         self.search_result = SongList()
         self._last_query = ""
+        self._rank_keys: list[tuple] = []
+        self._search_stream: AsyncStream | None = None
+
+        # 可见行分P信息的后台预取（滚动/写表后防抖触发）
+        self._prefetch_task: AsyncTask | None = None
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(PREFETCH_DEBOUNCE_MS)
+        self._prefetch_timer.timeout.connect(self._prefetch_visible_parts)
+        if scroll_bar := self.tableView.verticalScrollBar():
+            scroll_bar.valueChanged.connect(lambda _v: self._prefetch_timer.start())
 
         # 启动后自动获取列表（无加载动画）
         QTimer.singleShot(0, lambda: self.getVideo_btn(auto=True))
@@ -234,39 +256,49 @@ class SearchInterface(QWidget):
         except Exception:
             logger.exception("获取歌曲列表失败")
 
+    @staticmethod
+    def show_search_error(err: str) -> None:
+        # 避免 UI 里显示过长堆栈信息
+        msg = err.strip().replace("\n", " ")
+        # 412/-412 风控：用更友好的提示
+        if re.search(r"(?:错误代码[:：]\s*-?412\b|状态码[:：]\s*412\b|['\"]code['\"]\s*[:=]\s*-?412\b)", msg):
+            msg = "风控（412）"
+            if (remaining := scheduler.cooldown_remaining()) > 0:
+                msg += f"，约 {remaining:.0f} 秒后恢复请求"
+        if len(msg) > 160:
+            msg = msg[:160] + "..."
+        InfoBar.error(
+            title=t("common.error"),
+            content=msg,
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            parent=app_context.main_window,
+            duration=4000,
+        )
+
+    @staticmethod
+    def show_no_results() -> None:
+        logger.warning(t("search.search_result_empty"))
+        InfoBar.warning(
+            title=t("common.warning"),
+            content=t("search.no_results"),
+            orient=Qt.Orientation.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            parent=app_context.main_window,
+            duration=2000,
+        )
+
     @staticmethod
     def do_search(search_content: str, mode: str = "title"):
         result = perform_search(search_content, mode)
         if result is None:
             err = get_last_search_error()
             if err:
-                # 避免 UI 里显示过长堆栈信息
-                msg = err.strip().replace("\n", " ")
-                # 412/-412 风控：用更友好的提示
-                if re.search(r"(?:错误代码[:：]\s*-?412\b|['\"]code['\"]\s*[:=]\s*-?412\b)", msg):
-                    msg = "风控（412）"
-                if len(msg) > 160:
-                    msg = msg[:160] + "..."
-                InfoBar.error(
-                    title=t("common.error"),
-                    content=msg,
-                    orient=Qt.Orientation.Horizontal,
-                    isClosable=True,
-                    position=InfoBarPosition.BOTTOM_RIGHT,
-                    parent=app_context.main_window,
-                    duration=4000,
-                )
+                SearchInterface.show_search_error(err)
             else:
-                logger.warning(t("search.search_result_empty"))
-                InfoBar.warning(
-                    title=t("common.warning"),
-                    content=t("search.no_results"),
-                    orient=Qt.Orientation.Horizontal,
-                    isClosable=True,
-                    position=InfoBarPosition.BOTTOM_RIGHT,
-                    parent=app_context.main_window,
-                    duration=2000,
-                )
+                SearchInterface.show_no_results()
         return result
 
     def on_search_finished(self, main_search_list: SongList | None) -> None:
@@ -299,6 +331,7 @@ class SearchInterface(QWidget):
             return
 
         self.tableView.clear()
+        self.tableView.setRowCount(0)
         self.tableView.setColumnCount(4)
         self.tableView.setHorizontalHeaderLabels(
             [t("common.header_title"), t("common.video_blogger"), t("common.date"), t("common.bvid")]
@@ -329,8 +362,50 @@ class SearchInterface(QWidget):
         # BV 号大小写敏感：BV 模式必须保留原始大小写；标题搜索才做 lower()
         search_content = raw_text if mode == "bvid" else raw_text.lower()
         self._last_query = search_content
-        self._search_ = self.do_search(search_content, mode)
-        self.on_search_finished(self._search_)
+
+        # BV 模式是精确唯一匹配，仍走一次性搜索
+        if mode == "bvid":
+            self._search_ = self.do_search(search_content, mode)
+            self.on_search_finished(self._search_)
+            return
+
+        # 标题模式：先展示本地结果，再把 bilibili 每页结果流式追加并重新排序
+        local_list = search_song_list(search_content, mode)
+        if local_list is not None:
+            logger.info(f"本地获取 {len(local_list.get_data())} 个有效视频数据")
+            sort_song_list_by_relevance(local_list, search_content)
+            self.search_result = local_list
+            self.writeList()
+            self._close_search_loading()
+
+        self._search_stream = AsyncStream(lambda: iter_search(search_content))
+        self._search_stream.item_ready.connect(self.on_search_page)
+        self._search_stream.task_finished.connect(lambda _: self.on_search_stream_finished(None))
+        self._search_stream.task_failed.connect(self.on_search_stream_finished)
+        self._search_stream.start()
+
+    def _close_search_loading(self) -> None:
+        """有结果可展示后立即收起加载动画（不必等待全部页面返回）"""
+        if self.loading:
+            self.loading.close()
+            self.loading = None
+
+    def on_search_page(self, page_list: SongList) -> None:
+        """bilibili 某一页搜索结果到达"""
+        self.writeList(page_list.get_data())
+        self._close_search_loading()
+
+    def on_search_stream_finished(self, error: Exception | None) -> None:
+        """全部搜索页结束（或出错）"""
+        self._search_stream = None
+        if len(self.search_result) == 0:
+            if error is not None:
+                self.show_search_error(str(error))
+            else:
+                self.show_no_results()
+        elif error is not None:
+            logger.opt(exception=error).warning("bilibili 搜索失败（增量阶段）")
+        self.on_search_finished(None)
 
     # 当爬虫任务结束时
     def on_c_task_finished(self):
@@ -409,20 +484,90 @@ class SearchInterface(QWidget):
                     100, lambda: self.main_window.localPlayerInterface.select_and_highlight_song(downloaded_file_name)
                 )
 
-    def writeList(self):
-        """将搜索结果写入表格（参考local_player实现）"""
+    def writeList(self, new_rows: list[dict] | None = None):
+        """将搜索结果写入表格（参考local_player实现）
+
+        new_rows 为 None 时整表重写；否则把新行按相关度插入到已排序结果中，
+        只新增对应的表格行，已存在的 BV 会被跳过。
+        """
+        if new_rows is not None:
+            self._insert_ranked_rows(new_rows)
+            return
+
         search_result = self.search_result
         logger.info(f"总计获取 {len(search_result.get_data())} 个有效视频数据:")
         logger.info(search_result.get_data())
         self.tableView.setRowCount(len(search_result.get_data()))
 
         for i, songInfo in enumerate(search_result.get_data()):
-            self.tableView.setItem(i, 0, QTableWidgetItem(songInfo["title"]))
-            self.tableView.setItem(i, 1, QTableWidgetItem(songInfo["author"]))
-            self.tableView.setItem(i, 2, QTableWidgetItem(format_date_str(songInfo["date"])))
-            self.tableView.setItem(i, 3, QTableWidgetItem(songInfo["bv"]))
+            self._set_row(i, songInfo)
 
+        self._rank_keys = [relevance_key(item, self._last_query) for item in search_result.get_data()]
         self._setup_table_resize_policy()
+        self._prefetch_timer.start()
+
+    def _set_row(self, row: int, songInfo: dict) -> None:
+        self.tableView.setItem(row, 0, QTableWidgetItem(songInfo["title"]))
+        self.tableView.setItem(row, 1, QTableWidgetItem(songInfo["author"]))
+        self.tableView.setItem(row, 2, QTableWidgetItem(format_date_str(songInfo["date"])))
+        self.tableView.setItem(row, 3, QTableWidgetItem(songInfo["bv"]))
+
+    def _insert_ranked_rows(self, new_rows: list[dict]) -> None:
+        data = self.search_result.get_data()
+        if len(self._rank_keys) != len(data):
+            self._rank_keys = [relevance_key(item, self._last_query) for item in data]
+        known = {item.get("bv") for item in data}
+
+        inserted = 0
+        for songInfo in new_rows:
+            if songInfo.get("bv") in known:
+                continue
+            known.add(songInfo.get("bv"))
+
+            # 降序二分：找到第一个排序键小于新行的位置（相同键保持先到先排）
+            key = relevance_key(songInfo, self._last_query)
+            lo, hi = 0, len(self._rank_keys)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self._rank_keys[mid] >= key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            self._rank_keys.insert(lo, key)
+            data.insert(lo, songInfo)
+            self.tableView.insertRow(lo)
+            self._set_row(lo, songInfo)
+            inserted += 1
+
+        if inserted:
+            logger.info(f"bilibili 追加 {inserted} 个有效视频数据，当前共 {len(data)} 个")
+            self._prefetch_timer.start()
+
+    def _prefetch_visible_parts(self) -> None:
+        """在后台预取当前可见行（及其后几行）的分P信息，供下载时直接使用"""
+        row_count = self.tableView.rowCount()
+        viewport = self.tableView.viewport()
+        if row_count == 0 or viewport is None:
+            return
+        first = self.tableView.rowAt(0)
+        if first < 0:
+            return
+        last = self.tableView.rowAt(viewport.height() - 1)
+        if last < 0:
+            last = row_count - 1
+        last = min(row_count - 1, last + PREFETCH_LOOKAHEAD_ROWS)
+
+        data = self.search_result.get_data()
+        bvids = [data[row]["bv"] for row in range(first, min(last + 1, len(data))) if data[row].get("bv")]
+        bvids = [bv for bv in bvids if metadata_store.peek(bv) is None]
+        if not bvids:
+            return
+
+        # 滚走后旧的预取不再需要
+        if self._prefetch_task is not None and self._prefetch_task.isRunning():
+            self._prefetch_task.cancel()
+        self._prefetch_task = AsyncTask(lambda: metadata_store.prefetch(bvids))
+        self._prefetch_task.start()
 
     def _on_table_double_click(self, row: int, _column: int) -> None:
         """表格双击时触发下载当前行。"""
@@ -468,14 +613,20 @@ class SearchInterface(QWidget):
 
         bvid = info["bv"]
 
+        # 已预取过分P信息时直接弹出选择对话框
+        if (meta := metadata_store.peek(bvid, allow_stale=True)) is not None:
+            self.on_parts_fetched(parts_from_meta(meta), index, info)
+            return
+
         # 显示加载动画并禁用按钮，开始获取分P信息
         self.loading = showLoading(self.DownloadBtn)
         self.DownloadBtn.setEnabled(False)
         self.main_window.setEnabled(False)
 
-        # 启动线程获取分P信息
-        self._parts_thread = SimpleThread(lambda: get_video_parts_sync(bvid))
+        # 在共享事件循环上获取分P信息
+        self._parts_thread = AsyncTask(lambda: get_video_parts(bvid))
         self._parts_thread.task_finished.connect(lambda parts: self.on_parts_fetched(parts, index, info))
+        self._parts_thread.task_failed.connect(lambda _exc: self.on_parts_fetched([], index, info))
         self._parts_thread.start()
 
     def on_parts_fetched(self, parts_info: list[dict], index: int, info: dict):
@@ -533,25 +684,11 @@ class SearchInterface(QWidget):
         else:
             # 多个分P，检查是否有文件存在（使用分P标题）
             existing_files = []
+            part_titles = {p["page"]: p["part"] for p in parts_info}
             for part_num in selected_parts:
-                # 查找对应分P的标题
-                part_title = None
-                for part_info in parts_info:
-                    if part_info["page"] == part_num:
-                        part_title = part_info["part"]
-                        break
-
-                # 生成与下载时相同的文件名
-                if part_title:
-                    safe_part_title = fix_filename(part_title).replace(" ", "").replace("_", "", 1)
-                    output_file = MUSIC_DIR / f"{title}_{safe_part_title}.{fileType}"
-                    display_name = part_title
-                else:
-                    output_file = MUSIC_DIR / f"{title}_P{part_num}.{fileType}"
-                    display_name = f"P{part_num}"
-
-                if output_file.exists():
-                    existing_files.append(display_name)
+                # 与下载时相同的文件名
+                if part_output_file(title, part_num, parts_info, fileType).exists():
+                    existing_files.append(part_titles.get(part_num) or f"P{part_num}")
 
             if existing_files:
                 existing_str = ", ".join(existing_files)
@@ -582,7 +719,7 @@ class SearchInterface(QWidget):
         # 创建并启动下载线程
         thread = SimpleThread(
             lambda idx=index, sr=self.search_result, ft=fileType, parts=selected_parts: run_music_download(
-                idx, sr, ft, parts
+                idx, sr, ft, parts, parts_info
             )
         )
         thread.task_finished.connect(self.on_download_finished)
@@ -607,8 +744,7 @@ class SearchInterface(QWidget):
             return
 
         fileType = cfg.download_type.value
-        added_count = 0
-        skipped_count = 0
+        tasks: list[DownloadTask] = []
 
         for row in sorted(selected_rows):
             info = self.search_result.select_info(row)
@@ -619,20 +755,17 @@ class SearchInterface(QWidget):
             output_file = MUSIC_DIR / f"{title}.{fileType}"
 
             # 创建下载任务
-            task = DownloadTask(
-                index=row,
-                title=info["title"],
-                bvid=info["bv"],
-                search_list=self.search_result,
-                file_type=fileType,
-                output_file=output_file,
+            tasks.append(
+                DownloadTask(
+                    title=info["title"],
+                    bvid=info["bv"],
+                    file_type=fileType,
+                    output_file=output_file,
+                )
             )
 
-            # 添加任务，检查是否重复
-            if self.download_queue.add_task(task):
-                added_count += 1
-            else:
-                skipped_count += 1
+        # 批量添加任务，跳过重复任务
+        added_count, skipped_count = self.download_queue.add_tasks(tasks)
 
         # 显示添加结果
         if added_count > 0:
@@ -21,8 +21,8 @@ from src.i18n import t
 from src.app_context import app_context
 from src.config import PlayMode, Theme, cfg
 from src.utils.file import on_fix_music
-from src.utils.thread import SimpleThread
-from src.bili_api.music import import_custom_songs_and_download
+from src.utils.thread import AsyncStream
+from src.core.custom_import import import_custom_songs
 from src.ui.interface.play_queue import PlayQueueInterface
 from bilibili_api import request_settings
 
@@ -201,12 +201,32 @@ class SettingsCard(GroupHeaderCardWidget):
         self.languageComboBox.currentIndexChanged.connect(lambda idx: changeLanguage(language_items[idx]))
 
         # 下载格式设置（保持原有代码）
-        items = ["mp3", "ogg", "wav"]
+        items = ["mp3", "ogg", "wav", "m4a"]
         self.downloadFormatComboBox = ComboBox(self)
         self.downloadFormatComboBox.addItems(items)
         self.downloadFormatComboBox.setCurrentIndex(items.index(cfg.download_type.value))
         self.downloadFormatComboBox.currentIndexChanged.connect(lambda idx: changeDownloadType(items[idx]))
 
+        # 音质预设（同时决定下载的音频流与编码码率）
+        self.quality_keys = ["best", "balanced", "data_saver", "target"]
+        self.downloadQualityComboBox = ComboBox(self)
+        self.downloadQualityComboBox.addItems([t(f"settings.download_quality_{key}") for key in self.quality_keys])
+        self.downloadQualityComboBox.setCurrentIndex(self.quality_keys.index(cfg.download_quality.value))
+        self.downloadQualityComboBox.currentIndexChanged.connect(self.change_download_quality)
+
+        # 自定义目标码率（仅 target 预设使用）
+        self.targetKbpsSpinBox = SpinBox(self)
+        self.targetKbpsSpinBox.setRange(32, 320)
+        self.targetKbpsSpinBox.setSingleStep(32)
+        self.targetKbpsSpinBox.setValue(cfg.download_target_kbps.value)
+        self.targetKbpsSpinBox.setEnabled(cfg.download_quality.value == "target")
+        self.targetKbpsSpinBox.valueChanged.connect(self.change_target_kbps)
+
+        # 原始音频流缓存开关
+        self.sourceCacheSwitch = SwitchButton(parent=self)
+        self.sourceCacheSwitch.setChecked(cfg.source_cache_enabled.value)
+        self.sourceCacheSwitch.checkedChanged.connect(self.on_source_cache_switch_changed)
+
         # 主题模式设置
         theme_display = get_theme_display()
         theme_items = [theme_display[t] for t in Theme]
@@ -284,6 +304,24 @@ class SettingsCard(GroupHeaderCardWidget):
             t("settings.download_format_desc"),
             self.downloadFormatComboBox,
         )
+        self.addGroup(
+            FluentIcon.SPEED_HIGH,
+            t("settings.download_quality"),
+            t("settings.download_quality_desc"),
+            self.downloadQualityComboBox,
+        )
+        self.addGroup(
+            FluentIcon.SPEED_MEDIUM,
+            t("settings.target_kbps"),
+            t("settings.target_kbps_desc"),
+            self.targetKbpsSpinBox,
+        )
+        self.addGroup(
+            FluentIcon.SAVE_AS,
+            t("settings.source_cache"),
+            t("settings.source_cache_desc", size=cfg.source_cache_max_mb.value),
+            self.sourceCacheSwitch,
+        )
         self.addGroup(
             FluentIcon.GLOBE,
             t("settings.display_language"),
@@ -422,6 +460,25 @@ class SettingsCard(GroupHeaderCardWidget):
             duration=1500,
         )
 
+    def change_download_quality(self, index: int) -> None:
+        """更改音质预设"""
+        key = self.quality_keys[index]
+        cfg.download_quality.value = key
+        cfg.save()
+        self.targetKbpsSpinBox.setEnabled(key == "target")
+        InfoBar.success(
+            t("common.settings_success"),
+            t("settings.download_quality_set", preset=t(f"settings.download_quality_{key}")),
+            parent=app_context.main_window,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=1500,
+        )
+
+    def change_target_kbps(self, value: int) -> None:
+        """更改自定义目标码率"""
+        cfg.download_target_kbps.value = value
+        cfg.save()
+
     def on_player_bar_switch_changed(self, checked: bool) -> None:
         cfg.enable_player_bar.value = checked
         cfg.save()
@@ -433,6 +490,17 @@ class SettingsCard(GroupHeaderCardWidget):
             duration=1500,
         )
 
+    def on_source_cache_switch_changed(self, checked: bool) -> None:
+        cfg.source_cache_enabled.value = checked
+        cfg.save()
+        InfoBar.success(
+            t("common.settings_success"),
+            t("settings.source_cache_set", status=t("common.enabled") if checked else t("common.disabled")),
+            parent=app_context.main_window,
+            position=InfoBarPosition.BOTTOM_RIGHT,
+            duration=1500,
+        )
+
     def on_minimize_to_tray_changed(self, checked: bool) -> None:
         if cfg.minimize_to_tray.value == checked:
             return
@@ -513,31 +581,56 @@ class SettingsCard(GroupHeaderCardWidget):
             parent=app_context.main_window,
         )
 
-        # 启动线程
-        self._custom_download_thread = SimpleThread(import_custom_songs_and_download)
-        self._custom_download_thread.task_finished.connect(self.on_custom_songs_download_finished)
+        # 通过搜索页的下载队列批量下载，逐步回传进度
+        queue = app_context.main_window.searchInterface.download_queue  # type: ignore[union-attr]
+        self._custom_download_thread = AsyncStream(lambda: import_custom_songs(queue), self)
+        self._custom_download_thread.item_ready.connect(self.on_custom_songs_download_finished)
+        self._custom_download_thread.task_failed.connect(
+            lambda e: self.on_custom_songs_download_finished({"status": "error", "message": str(e)})
+        )
         self._custom_download_thread.start()
 
     def on_custom_songs_download_finished(self, result: dict):
-        """自定义歌曲下载完成回调"""
-        self.customSongsBtn.setEnabled(True)
-        self._custom_download_thread = None
-
+        """自定义歌曲下载进度与完成回调"""
         status = result.get("status")
         message = result.get("message", "")
 
+        if status == "progress":
+            data = result.get("data", {})
+            if result.get("stage") == "metadata":
+                self.customSongsBtn.setText(f"{data.get('current', 0)}/{data.get('total', 0)}")
+            else:
+                done = data.get("success", 0) + data.get("failed", 0) + data.get("cancelled", 0)
+                self.customSongsBtn.setText(f"{done}/{done + data.get('remaining', 0) + data.get('paused', 0)}")
+            return
+
+        self.customSongsBtn.setEnabled(True)
+        self.customSongsBtn.setText(t("settings.download"))
+        self._custom_download_thread = None
+
         if status == "success":
             data = result.get("data", {})
             success_count = data.get("success", 0)
             failed_count = data.get("failed", 0)
+            skipped_count = data.get("skipped", 0)
 
             InfoBar.success(
                 t("common.success"),
-                f"{message} (成功: {success_count}, 失败: {failed_count})",
+                f"{message} (成功: {success_count}, 失败: {failed_count}, 已有: {skipped_count})",
                 position=InfoBarPosition.BOTTOM_RIGHT,
                 parent=app_context.main_window,
                 duration=3000,
             )
+        elif status == "paused":
+            data = result.get("data", {})
+            InfoBar.warning(
+                t("common.warning"),
+                f"{message} (成功: {data.get('success', 0)}, 失败: {data.get('failed', 0)}, "
+                f"暂停: {data.get('paused', 0)}, 已有: {data.get('skipped', 0)})",
+                position=InfoBarPosition.BOTTOM_RIGHT,
+                parent=app_context.main_window,
+                duration=5000,
+            )
         elif status == "created_dir":
             InfoBar.info(
                 t("common.info"),
@@ -416,6 +416,26 @@ class MainWindow(MSFluentWindow):
         except Exception:
             logger.exception("停止下载队列时出错")
 
+        # 保存视频元数据缓存
+        try:
+            from src.bili_api.metadata import metadata_store
+
+            metadata_store.flush()
+        except Exception:
+            logger.exception("保存视频元数据时出错")
+
+        # 关闭共享 HTTP 会话与全局异步运行时
+        try:
+            from src.bili_api.http_client import close_async_sessions, close_sessions
+            from src.utils.async_runtime import runtime
+
+            close_sessions()
+            if runtime.is_running():
+                runtime.submit(close_async_sessions()).result(timeout=2)
+            runtime.stop()
+        except Exception:
+            logger.exception("关闭异步运行时时出错")
+
         # 终止系统主题监听器
         self.themeListener.terminate()
         self.themeListener.deleteLater()
@@ -0,0 +1,120 @@
+"""全局异步运行时
+
+在后台线程中维持一个长期存活的 asyncio 事件循环，所有 bilibili_api 请求共用：
+- 同一个事件循环 → bilibili_api 的请求客户端（连接池）按事件循环缓存，可被复用
+- WBI / 凭据等按循环缓存的状态也只初始化一次
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Coroutine
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+
+class AsyncRuntime:
+    """后台事件循环服务
+
+    - start(): 启动后台线程（应用启动时调用一次，重复调用无副作用）
+    - submit(coro): 线程安全地提交协程，返回 concurrent.futures.Future
+    - run(coro): 阻塞等待协程结果，供原有同步调用点使用（替代 bilibili_api.sync）
+    - stop(): 关闭循环（应用退出时调用）
+    """
+
+    def __init__(self, name: str = "AsyncRuntime"):
+        self._name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """获取后台事件循环（未启动时自动启动）"""
+        self.start()
+        assert self._loop is not None
+        return self._loop
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_loop_thread(self) -> bool:
+        """当前是否处于后台事件循环线程中"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def start(self) -> None:
+        with self._lock:
+            if self.is_running():
+                return
+
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run_loop, name=self._name, daemon=True)
+            self._thread.start()
+
+        self._ready.wait()
+        logger.info(f"异步运行时已启动: {self._name}")
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            try:
+                # 取消残留任务，避免退出时报 "Task was destroyed but it is pending"
+                pending = asyncio.all_tasks(loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            except Exception:
+                logger.exception("关闭异步运行时时出错")
+            finally:
+                loop.close()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> Future[T]:
+        """提交协程到后台事件循环执行"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+        """阻塞执行协程并返回结果
+
+        不允许在后台循环线程内调用（会导致死锁），此时应直接 await。
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在异步运行时线程内同步等待协程，请直接 await")
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, callback, *args) -> None:
+        """线程安全地在后台循环中调度普通回调"""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 3.0) -> None:
+        with self._lock:
+            if not self.is_running() or self._loop is None:
+                return
+            loop, thread = self._loop, self._thread
+
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+        logger.info(f"异步运行时已停止: {self._name}")
+
+
+# 全局唯一实例
+runtime = AsyncRuntime()
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: float | None = None) -> T:
+    """在全局运行时上阻塞执行协程"""
+    return runtime.run(coro, timeout)
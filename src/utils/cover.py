@@ -9,12 +9,13 @@ from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon, QPainter, QPixmap
 from qfluentwidgets import FluentIcon as FIF
 
-import requests
-from bilibili_api import video, sync
-
-from src.config import CACHE_DIR, VIDEO_DIR, ASSETS_DIR, USER_AGENT, cfg
+from src.config import CACHE_DIR, VIDEO_DIR, ASSETS_DIR
 from src.core.data_io import load_from_all_data
-from src.bili_api.common import get_credential
+from src.bili_api.http_client import http_get
+from src.bili_api.metadata import metadata_store
+from src.bili_api.tags import read_source
+from src.core.library_index import library_index
+from src.utils.async_runtime import run_sync
 from src.utils.memory_cache import MemoryCache
 
 
@@ -238,10 +239,15 @@ def _normalize_text(s: str) -> str:
 
 
 def _match_bvid_by_audio(audio_path: Path) -> Optional[str]:
-    """根据音频文件名在本地视频数据里匹配 BV 号。
+    """查找音频文件对应的 BV 号。
 
-    策略：归一化文件名与标题，互相包含则认为匹配，取最优（最长匹配）。
+    优先读取下载时写入的来源标签，其次查曲库索引（wav 没有可读的来源标签）；
+    都没有的文件（旧版本下载或外部导入）再在本地视频数据里按文件名匹配：
+    归一化文件名与标题，互相包含则认为匹配，取最优（最长匹配）。
     """
+    source = read_source(audio_path) or library_index.find_file(audio_path)
+    if source is not None:
+        return source[0]
     try:
         # 避免在大量歌曲“无封面/首次运行”场景下反复聚合本地 data.json
         total = _VIDEO_SONGLIST_MEM_CACHE.get_or_set(
@@ -279,31 +285,11 @@ def _match_bvid_by_audio(audio_path: Path) -> Optional[str]:
 def _fetch_bilibili_cover_bytes(bvid: str) -> Optional[bytes]:
     """通过 BVID 获取视频封面二进制数据。"""
     try:
-        v = video.Video(bvid, credential=get_credential())
-        info = sync(v.get_info())
-        # 常见结构含 pic 或 View.pic
-        cover_url = None
-        if isinstance(info, dict):
-            cover_url = info.get("pic")
-            if not cover_url and "View" in info and isinstance(info["View"], dict):
-                cover_url = info["View"].get("pic")
+        cover_url = run_sync(metadata_store.get(bvid)).pic
         if not cover_url:
             return None
 
-        # 应用代理设置
-        proxies = {}
-        if cfg.enable_proxy.value and cfg.proxy_url.value:
-            proxies = {
-                "http": cfg.proxy_url.value,
-                "https": cfg.proxy_url.value,
-            }
-
-        resp = requests.get(
-            cover_url,
-            timeout=8,
-            headers={"User-Agent": USER_AGENT},
-            proxies=proxies,
-        )
+        resp = http_get(cover_url, timeout=8)
         if resp.status_code == 200 and resp.content:
             return resp.content
         return None
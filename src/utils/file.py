@@ -124,14 +124,14 @@ def read_all_audio_info(
 
     参数:
         directory (str | Path): 要扫描的目录
-        extensions (list): 支持的音频扩展名列表，默认为 [".mp3", ".ogg", ".wav"]
+        extensions (list): 支持的音频扩展名列表，默认为 [".mp3", ".ogg", ".wav", ".m4a"]
 
     返回:
         list[tuple[str, float]]: [(文件名, 时长), ...]
     """
 
     if extensions is None:
-        extensions = [".mp3", ".ogg", ".wav"]
+        extensions = [".mp3", ".ogg", ".wav", ".m4a"]
 
     results: list[tuple[str, float]] = []
 
@@ -1,5 +1,11 @@
-from collections.abc import Callable
-from PyQt6.QtCore import QThread, pyqtSignal
+from collections.abc import AsyncIterator, Callable, Coroutine
+from concurrent.futures import Future
+from typing import Any
+
+from loguru import logger
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+
+from src.utils.async_runtime import runtime
 
 
 class SimpleThread(QThread):
@@ -11,3 +17,82 @@ class SimpleThread(QThread):
 
     def run(self):
         self.task_finished.emit(self.call())
+
+
+class AsyncTask(QObject):
+    """把协程提交到全局异步运行时，并通过 Qt 信号回传结果
+
+    用法与 SimpleThread 保持一致：构造时传入协程工厂，调用 start() 后
+    在 task_finished 中拿到返回值；协程抛出异常时发出 task_failed。
+    信号从后台循环线程发出，Qt 会自动排队到接收者所在线程（通常是主线程）。
+    """
+
+    task_finished: pyqtSignal = pyqtSignal(object)
+    task_failed: pyqtSignal = pyqtSignal(object)
+
+    def __init__(self, factory: Callable[[], Coroutine[Any, Any, object]], parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.factory = factory
+        self.future: Future | None = None
+
+    def start(self) -> None:
+        self.future = runtime.submit(self.factory())
+        self.future.add_done_callback(self._on_done)
+
+    def isRunning(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def cancel(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.opt(exception=exc).warning("异步任务执行失败")
+            self.task_failed.emit(exc)
+        else:
+            self.task_finished.emit(future.result())
+
+
+class AsyncStream(QObject):
+    """消费异步生成器，把每个产出项通过 item_ready 信号逐个回传
+
+    生成器耗尽后发出 task_finished(None)，出错时发出 task_failed。
+    """
+
+    item_ready: pyqtSignal = pyqtSignal(object)
+    task_finished: pyqtSignal = pyqtSignal(object)
+    task_failed: pyqtSignal = pyqtSignal(object)
+
+    def __init__(self, factory: Callable[[], AsyncIterator[object]], parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.factory = factory
+        self.future: Future | None = None
+
+    def start(self) -> None:
+        self.future = runtime.submit(self._consume())
+        self.future.add_done_callback(self._on_done)
+
+    def isRunning(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def cancel(self) -> None:
+        if self.future is not None:
+            self.future.cancel()
+
+    async def _consume(self) -> None:
+        async for item in self.factory():
+            self.item_ready.emit(item)
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is not None:
+            logger.opt(exception=exc).warning("异步流任务执行失败")
+            self.task_failed.emit(exc)
+        else:
+            self.task_finished.emit(None)
@@ -0,0 +1,76 @@
+from src.core import download_journal
+from src.core.download_journal import QueueJournal
+
+
+def _record(bvid: str, part: int = 1, status: str = "pending") -> dict:
+    return {
+        "title": bvid,
+        "bvid": bvid,
+        "part": part,
+        "file_type": "mp3",
+        "output_file": f"{bvid}.mp3",
+        "status": status,
+    }
+
+
+def test_replay_applies_add_state_remove(tmp_path):
+    path = tmp_path / "queue.jsonl"
+    journal = QueueJournal(path)
+    journal.record_add([_record("BV1"), _record("BV2"), _record("BV3", 2)])
+    journal.record_state("BV1", 1, "failed", "网络错误")
+    journal.record_state("BV3", 2, "paused", priority=5)
+    journal.record_remove([("BV2", 1)])
+    journal.close()
+
+    records = QueueJournal(path).replay()
+    assert [(r["bvid"], r["part"]) for r in records] == [("BV1", 1), ("BV3", 2)]
+    assert records[0]["status"] == "failed" and records[0]["error_msg"] == "网络错误"
+    assert records[1]["status"] == "paused" and records[1]["priority"] == 5
+
+
+def test_replay_after_compaction(tmp_path):
+    path = tmp_path / "queue.jsonl"
+    journal = QueueJournal(path)
+    journal.record_add([_record("BV1"), _record("BV2")])
+    for _ in range(10):
+        journal.record_state("BV1", 1, "pending", priority=1)
+    journal.record_remove([("BV2", 1)])
+
+    live = journal.replay()
+    journal.compact(live)
+    assert path.read_text(encoding="utf-8").count("\n") == 1
+
+    # 压缩后继续追加，重新打开时两部分都能回放
+    journal.record_add([_record("BV4")])
+    journal.record_state("BV1", 1, "failed", "超时")
+    journal.close()
+
+    reopened = QueueJournal(path)
+    records = reopened.replay()
+    assert [r["bvid"] for r in records] == ["BV1", "BV4"]
+    assert records[0]["priority"] == 1
+    assert records[0]["status"] == "failed" and records[0]["error_msg"] == "超时"
+    assert not reopened.needs_compaction(len(records))
+
+
+def test_replay_skips_truncated_line(tmp_path):
+    path = tmp_path / "queue.jsonl"
+    journal = QueueJournal(path)
+    journal.record_add([_record("BV1")])
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "task": {"bvid": "BV2"')
+
+    assert [r["bvid"] for r in QueueJournal(path).replay()] == ["BV1"]
+
+
+def test_needs_compaction_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(download_journal, "COMPACT_MIN_LINES", 10)
+    journal = QueueJournal(tmp_path / "queue.jsonl")
+    journal.record_add([_record(f"BV{i}") for i in range(10)])
+    assert not journal.needs_compaction(live=1)
+    journal.record_state("BV0", 1, "pending")
+    assert journal.needs_compaction(live=1)
+    # 存活任务多时阈值随之提高
+    assert not journal.needs_compaction(live=3)
+    journal.close()
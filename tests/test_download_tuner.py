@@ -0,0 +1,83 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("qfluentwidgets")
+
+from src.core import download_tuner
+from src.core.download_tuner import DECREASE_HOLD, ConcurrencyTuner
+
+
+@pytest.fixture(autouse=True)
+def fake_clock(monkeypatch):
+    """每次读取时间前进一个调节周期，吞吐量 = 本周期字节数 / 周期长度"""
+    clock = itertools.count(step=download_tuner.TUNE_INTERVAL_S)
+    monkeypatch.setattr(download_tuner, "time", SimpleNamespace(monotonic=lambda: next(clock)))
+
+
+def _saturated(tuner: ConcurrencyTuner, per_slot: int = 1_000_000) -> int:
+    """名额用满且还有等待任务，吞吐量与并发数成正比"""
+    tuner.record_bytes(per_slot * tuner.slots)
+    return tuner.update(busy=tuner.slots, backlog=True)
+
+
+def test_initial_slots_clamped_to_bounds():
+    assert ConcurrencyTuner(0, 0).slots == 1
+    assert ConcurrencyTuner(1, 2, initial=3).slots == 2
+    assert ConcurrencyTuner(5, 8, initial=3).slots == 5
+    tuner = ConcurrencyTuner(4, 2)
+    assert (tuner.min_slots, tuner.max_slots) == (4, 4)
+
+
+def test_increase_stops_at_max_slots():
+    tuner = ConcurrencyTuner(1, 5, initial=1)
+    history = [_saturated(tuner) for _ in range(10)]
+    assert history[:4] == [2, 3, 4, 5]
+    assert max(history) == 5
+    assert tuner.slots == 5
+
+
+def test_no_increase_when_slots_not_saturated():
+    tuner = ConcurrencyTuner(1, 5, initial=2)
+    tuner.record_bytes(1_000_000)
+    assert tuner.update(busy=1, backlog=True) == 2
+    tuner.record_bytes(2_000_000)
+    assert tuner.update(busy=2, backlog=False) == 2
+
+
+def test_risk_control_halves_and_holds():
+    tuner = ConcurrencyTuner(1, 8, initial=8)
+    tuner.record_failure(risk_control=True)
+    assert tuner.update(busy=8, backlog=True) == 4
+    # 减小后保持若干周期不再增加
+    for _ in range(DECREASE_HOLD):
+        assert _saturated(tuner) == 4
+    assert _saturated(tuner) == 5
+
+
+def test_decrease_never_below_min_slots():
+    tuner = ConcurrencyTuner(3, 8, initial=8)
+    for _ in range(5):
+        tuner.record_failure(risk_control=True)
+        tuner.update(busy=tuner.slots, backlog=True)
+    assert tuner.slots == 3
+
+
+def test_high_error_rate_decreases():
+    tuner = ConcurrencyTuner(1, 8, initial=6)
+    tuner.record_success()
+    for _ in range(2):
+        tuner.record_failure()
+    assert tuner.update(busy=6, backlog=True) == 3
+
+
+def test_backs_off_when_extra_slot_adds_no_throughput():
+    tuner = ConcurrencyTuner(1, 8, initial=2)
+    tuner.record_bytes(4_000_000)
+    assert tuner.update(busy=2, backlog=True) == 3
+    # 多一个并发吞吐量没有提升：退回一档，之后不再试探更高的并发
+    tuner.record_bytes(4_000_000)
+    assert tuner.update(busy=3, backlog=True) == 2
+    for _ in range(5):
+        assert _saturated(tuner, per_slot=2_000_000) == 2
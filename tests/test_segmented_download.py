@@ -0,0 +1,152 @@
+from itertools import pairwise
+
+import pytest
+
+pytest.importorskip("qfluentwidgets")
+pytest.importorskip("bilibili_api")
+
+from src.bili_api import partial
+from src.bili_api.downloader import (
+    BYTES_PER_CONNECTION,
+    MAX_SEGMENT_SIZE,
+    MIN_SEGMENT_SIZE,
+    plan_segments,
+)
+from src.bili_api.partial import PartialFile, _merge
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def partial_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(partial, "PARTIAL_DIR", tmp_path)
+    return tmp_path
+
+
+# -------- plan_segments --------
+@pytest.mark.parametrize(
+    "total",
+    [1, MIN_SEGMENT_SIZE - 1, MIN_SEGMENT_SIZE, MIN_SEGMENT_SIZE + 1, BYTES_PER_CONNECTION + 1, 37 * MB + 5, 1024 * MB],
+)
+@pytest.mark.parametrize("max_connections", [1, 4, 16])
+def test_segments_cover_file_without_gaps(total, max_connections):
+    connections, segments = plan_segments(total, max_connections)
+    assert 1 <= connections <= max_connections
+    assert segments[0].start == 0
+    assert segments[-1].end == total - 1
+    for i, (prev, seg) in enumerate(pairwise(segments), start=1):
+        assert seg.index == i
+        assert seg.start == prev.end + 1
+    assert sum(seg.size for seg in segments) == total
+    # 除最后一段外，段大小都在上下限之间
+    for seg in segments[:-1]:
+        assert MIN_SEGMENT_SIZE <= seg.size <= MAX_SEGMENT_SIZE
+    assert 0 < segments[-1].size <= MAX_SEGMENT_SIZE
+
+
+def test_small_file_single_segment():
+    assert plan_segments(1, 4)[0] == 1
+    connections, segments = plan_segments(MIN_SEGMENT_SIZE, 4)
+    assert connections == 1
+    assert [(s.start, s.end) for s in segments] == [(0, MIN_SEGMENT_SIZE - 1)]
+
+
+def test_one_byte_over_min_segment_splits():
+    _, segments = plan_segments(MIN_SEGMENT_SIZE + 1, 4)
+    assert [s.size for s in segments] == [MIN_SEGMENT_SIZE, 1]
+
+
+def test_connections_follow_file_size():
+    assert plan_segments(BYTES_PER_CONNECTION, 8)[0] == 1
+    assert plan_segments(BYTES_PER_CONNECTION + 1, 8)[0] == 2
+    assert plan_segments(100 * BYTES_PER_CONNECTION, 8)[0] == 8
+    assert plan_segments(100 * BYTES_PER_CONNECTION, 0)[0] == 1
+
+
+def test_large_file_segments_capped():
+    _, segments = plan_segments(1024 * MB, 2)
+    assert max(s.size for s in segments) == MAX_SEGMENT_SIZE
+    assert len(segments) == 128
+
+
+# -------- PartialFile --------
+def test_merge_overlapping_and_adjacent_ranges():
+    assert _merge([[10, 19], [0, 4], [5, 9], [30, 40], [35, 38]]) == [[0, 19], [30, 40]]
+    assert _merge([]) == []
+
+
+def test_round_trip_restores_progress(partial_dir):
+    pf = PartialFile("BV1xx4y1x7xx/123:30280.m4a")
+    assert pf.key == "BV1xx4y1x7xx_123_30280.m4a"
+    assert pf.prepare("https://cdn/a", 10, "etag-1") == 0
+    pf.write(0, b"abcd")
+    pf.mark_done(0, 3)
+    pf.write(6, b"ghij")
+    pf.mark_done(6, 9)
+    pf.close()
+
+    loaded = PartialFile("BV1xx4y1x7xx/123:30280.m4a")
+    assert (loaded.url, loaded.length, loaded.etag) == ("https://cdn/a", 10, "etag-1")
+    assert loaded.completed == [[0, 3], [6, 9]]
+    assert loaded.done_bytes == 8
+    assert not loaded.is_complete()
+    assert loaded.covered_prefix(0, 9) == 4
+    assert loaded.covered_prefix(2, 9) == 2
+    assert loaded.covered_prefix(4, 9) == 0
+    assert loaded.covered_prefix(6, 7) == 2
+
+    # 同一文件（地址可以不同）保留进度并能读回数据
+    assert loaded.prepare("https://cdn/b", 10, "etag-1") == 8
+    assert loaded.read(6, 4) == b"ghij"
+    loaded.write(4, b"ef")
+    loaded.mark_done(4, 5)
+    assert loaded.completed == [[0, 9]]
+    assert loaded.is_complete()
+    loaded.close()
+
+
+@pytest.mark.parametrize(("length", "etag"), [(11, "etag-1"), (10, "etag-2"), (None, "etag-1")])
+def test_server_change_discards_progress(length, etag):
+    pf = PartialFile("key")
+    pf.prepare("https://cdn/a", 10, "etag-1")
+    pf.write(0, b"abcd")
+    pf.mark_done(0, 3)
+    pf.close()
+
+    reloaded = PartialFile("key")
+    assert reloaded.prepare("https://cdn/a", length, etag) == 0
+    assert reloaded.completed == []
+    reloaded.close()
+    assert PartialFile("key").completed == []
+
+
+def test_missing_data_file_discards_progress(partial_dir):
+    pf = PartialFile("key")
+    pf.prepare("https://cdn/a", 10, None)
+    pf.write(0, b"abcd")
+    pf.mark_done(0, 3)
+    pf.close()
+    (partial_dir / "key.part").unlink()
+
+    reloaded = PartialFile("key")
+    assert reloaded.prepare("https://cdn/a", 10, None) == 0
+    reloaded.close()
+
+
+def test_discard_removes_files(partial_dir):
+    pf = PartialFile("key")
+    pf.prepare("https://cdn/a", 10, None)
+    pf.write(0, b"abcd")
+    pf.mark_done(0, 3)
+    pf.discard()
+
+    assert list(partial_dir.iterdir()) == []
+    fresh = PartialFile("key")
+    assert (fresh.url, fresh.length, fresh.completed) == (None, None, [])
+    # 重复删除不报错
+    fresh.discard()
+
+
+def test_corrupt_manifest_starts_over(partial_dir):
+    (partial_dir / "key.json").write_text("{not json", encoding="utf-8")
+    assert PartialFile("key").completed == []
@@ -0,0 +1,139 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt6")
+pytest.importorskip("qfluentwidgets")
+pytest.importorskip("bilibili_api")
+
+from src.core.download_queue import _BUCKETS, DownloadStatus, DownloadTask, TaskRegistry
+
+
+def _task(bvid: str, priority: int = 0, status: DownloadStatus = DownloadStatus.PENDING) -> DownloadTask:
+    return DownloadTask(bvid, bvid, "mp3", Path(f"{bvid}.mp3"), status=status, priority=priority)
+
+
+def _assert_consistent(registry: TaskRegistry) -> None:
+    """每个任务恰好在与其状态对应的分组中，分组计数与任务总数一致"""
+    seen = set()
+    for bucket in registry.counts():
+        for task in registry.snapshot(bucket):
+            assert _BUCKETS[task.status] == bucket
+            assert registry.get(task.key) is task
+            assert task.key not in seen
+            seen.add(task.key)
+    assert len(seen) == len(registry) == sum(registry.counts().values())
+
+
+def _drain(registry: TaskRegistry) -> list[str]:
+    order = []
+    while (task := registry.pop_pending()) is not None:
+        order.append(task.bvid)
+    return order
+
+
+def test_add_rejects_duplicates():
+    registry = TaskRegistry()
+    assert registry.add(_task("BV1"))
+    assert not registry.add(_task("BV1"))
+    assert registry.add(_task("BV2", status=DownloadStatus.PAUSED))
+    assert registry.counts() == {"pending": 1, "active": 0, "paused": 1, "completed": 0, "failed": 0}
+    _assert_consistent(registry)
+
+
+def test_pop_pending_by_priority_then_insertion_order():
+    registry = TaskRegistry()
+    for bvid, priority in [("BV1", 0), ("BV2", 1), ("BV3", 0), ("BV4", 1)]:
+        registry.add(_task(bvid, priority))
+    assert [t.bvid for t in registry.snapshot("pending")] == ["BV2", "BV4", "BV1", "BV3"]
+    assert _drain(registry) == ["BV2", "BV4", "BV1", "BV3"]
+    assert registry.count("active") == 4
+    _assert_consistent(registry)
+
+
+def test_set_priority_and_move_to_front():
+    registry = TaskRegistry()
+    tasks = [_task(f"BV{i}") for i in range(4)]
+    for task in tasks:
+        registry.add(task)
+    registry.set_priority(tasks[2], 5)
+    registry.move_to_front(tasks[3])
+    # 同优先级内保持原有顺序
+    registry.set_priority(tasks[1], 0)
+    assert _drain(registry) == ["BV3", "BV2", "BV0", "BV1"]
+    _assert_consistent(registry)
+
+
+def test_transitions_keep_buckets_consistent():
+    registry = TaskRegistry()
+    tasks = [_task(f"BV{i}") for i in range(5)]
+    for task in tasks:
+        registry.add(task)
+
+    first = registry.pop_pending()
+    assert first is tasks[0]
+    registry.transition(first, DownloadStatus.TRANSCODING)
+    registry.transition(first, DownloadStatus.SUCCESS)
+    registry.transition(tasks[1], DownloadStatus.PAUSED)
+    registry.transition(tasks[2], DownloadStatus.FAILED)
+    _assert_consistent(registry)
+
+    # 暂停 / 失败的任务恢复后排到等待队列末尾
+    registry.transition(tasks[1], DownloadStatus.PENDING)
+    registry.transition(tasks[2], DownloadStatus.PENDING)
+    assert [t.bvid for t in registry.snapshot("pending")] == ["BV3", "BV4", "BV1", "BV2"]
+    _assert_consistent(registry)
+
+    registry.remove(tasks[3])
+    assert tasks[3].key not in registry
+    assert _drain(registry) == ["BV4", "BV1", "BV2"]
+    _assert_consistent(registry)
+
+
+def test_requeue_front_keeps_given_order():
+    registry = TaskRegistry()
+    for bvid in ["BV1", "BV2", "BV3"]:
+        registry.add(_task(bvid))
+    active = [registry.pop_pending(), registry.pop_pending()]
+    registry.requeue_front(reversed(active))
+    assert registry.count("active") == 0
+    assert _drain(registry) == ["BV2", "BV1", "BV3"]
+    _assert_consistent(registry)
+
+
+def test_history_trimmed_and_dropped_tasks_can_be_added_again():
+    registry = TaskRegistry(history_limit=2)
+    tasks = [_task(f"BV{i}") for i in range(3)]
+    for task in tasks:
+        registry.add(task)
+        registry.transition(task, DownloadStatus.SUCCESS)
+    assert [t.bvid for t in registry.snapshot("completed")] == ["BV1", "BV2"]
+    assert registry.snapshot("completed", last=1) == [tasks[2]]
+    assert tasks[0].key not in registry
+    assert registry.add(_task("BV0"))
+    _assert_consistent(registry)
+
+
+def test_clear_buckets():
+    registry = TaskRegistry()
+    for bvid in ["BV1", "BV2", "BV3"]:
+        registry.add(_task(bvid))
+    registry.transition(registry.pop_pending(), DownloadStatus.FAILED)
+    assert registry.clear("pending") == 2
+    assert registry.pop_pending() is None
+    assert registry.clear("failed", "completed") == 1
+    assert len(registry) == 0
+    _assert_consistent(registry)
+
+
+def test_stale_heap_entries_rebuilt():
+    registry = TaskRegistry()
+    tasks = [_task(f"BV{i}") for i in range(3)]
+    for task in tasks:
+        registry.add(task)
+    # 反复调整优先级产生大量过期条目，取出顺序仍然正确
+    for priority in range(200):
+        registry.set_priority(tasks[priority % 3], priority)
+    assert len(registry._heap) <= 2 * len(tasks) + 64 + 1
+    assert _drain(registry) == ["BV1", "BV0", "BV2"]
+    _assert_consistent(registry)